@@ -30,6 +30,8 @@ class BoundedBom:
         root_directory: str,
         products_source: str,
         output_root: str,
+        seed: int | None = None,
+        unique_trees: dict | None = None,
     ):
         self.products_info = products_info
         self.machines_info = machines_info
@@ -41,6 +43,8 @@ class BoundedBom:
         self.root_directory = root_directory
         self.products_source = products_source
         self.output_root = output_root
+        self.seed = seed
+        self.unique_trees = unique_trees or {}
 
 
 class BoundedBoms:
@@ -112,6 +116,8 @@ class BoundedBomDecoder(JSONDecoder):
             root_directory = b.get("root_directory", "bounded_products")
             products_source = b.get("products_source")
             output_root = b.get("output_root", "bounded_output")
+            seed = b.get("seed")
+            unique_trees = b.get("unique_trees", {})
 
             if n_nodes is None or k_trees is None:
                 log.error("Missing required keys 'n_nodes' or 'k_trees' in bounded config entry.")
@@ -123,6 +129,10 @@ class BoundedBomDecoder(JSONDecoder):
                 log.error(f"Invalid children bounds: min={min_children}, max={max_children}.")
                 continue
 
+            if unique_trees.get("label", "productid") not in ("productid", "pname", "none"):
+                log.error(f"Invalid unique_trees label: {unique_trees.get('label')} (productid | pname | none).")
+                continue
+
             products_info = [cls._product_info_from_entry(e) for e in outputs]
             mblock = b.get("machines_info")
             if not mblock:
@@ -143,6 +153,8 @@ class BoundedBomDecoder(JSONDecoder):
                     root_directory=root_directory,
                     products_source=products_source,
                     output_root=output_root,
+                    seed=seed,
+                    unique_trees=unique_trees,
                 )
             )
         return BoundedBoms.get_all()
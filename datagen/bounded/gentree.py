@@ -18,6 +18,7 @@ from datagen.multi.gentree import (
     simple_render_tree,
 )
 
+from datagen.common.pathsampler import InsufficientProductsError
 from datagen.common.sequencer import Sequencer
 from datagen.multi.metainfo import MetaInfo
 from datagen.multi.prodmachine import ProdMachines, ProdMachinesAll
@@ -28,10 +29,6 @@ from datagen.multi.root_dir import RootDir
 log = logging.getLogger("main")
 
 
-class InsufficientProductsError(Exception):
-    pass
-
-
 # ------------- helperi eligibilitate / atasare -------------
 def _pid(prod) -> int:
     return getattr(prod, "pid", getattr(prod, "productid", 0))
@@ -39,43 +36,57 @@ def _pid(prod) -> int:
 def _code(prod) -> str:
     return getattr(prod, "code", getattr(prod, "pname", ""))
 
-def _path_product_ids(leaf) -> set[int]:
-    s = set()
-    n = leaf
-    while n is not None:
-        pid = getattr(n, "productid", None)
-        if pid is not None:
-            s.add(pid)
-        n = n.parent
-    return s
+class _PathIndex:
+    """
+    Produsele de pe calea root->nod, pentru fiecare nod al arborelui: un bitset (int, bitul pid setat) mostenit de la
+    parinte si numarul produselor distincte. Sunt tinute separat de noduri, ca sa nu ajunga in exportul JSON
+    """
 
-def _leaves_of(root) -> List:
-    return [n for n in PreOrderIter(root) if len(getattr(n, "children", [])) == 0]
+    def __init__(self, root):
+        self.bits: Dict[object, int] = {}
+        self.sizes: Dict[object, int] = {}
+
+        # parintii sunt vizitati inaintea copiilor, deci fiecare nod isi mosteneste bitsetul
+        for n in PreOrderIter(root):
+            self.add(n)
+
+    def add(self, node) -> None:
+        """Inregistreaza un nod nou, al carui parinte este deja inregistrat"""
+        parent = node.parent
+        bits = self.bits.get(parent, 0) if parent is not None else 0
+        size = self.sizes.get(parent, 0) if parent is not None else 0
+
+        pid = getattr(node, "productid", None)
+        if pid is not None and not (bits >> pid) & 1:
+            bits |= 1 << pid
+            size += 1
+
+        self.bits[node] = bits
+        self.sizes[node] = size
+
+    def capacity(self, leaf, products_count: int, max_children: int) -> int:
+        """
+        Capacitate maxima de noi copii pe frunza, tinand cont de:
+          - limita max_children per nod
+          - produse distincte deja pe calea root->leaf
+        """
+        by_max = max(0, max_children - _current_children_count(leaf))
+        by_products = max(0, products_count - self.sizes[leaf])
+        return min(by_max, by_products)
+
+    def pick(self, leaf, products: List, rng: random.Random):
+        """Alege un produs cu id unic  pe calea root->leaf"""
+        used = self.bits[leaf]
+        tries = min(5 * len(products), 2000)
+        for _ in range(tries):
+            p = rng.choice(products)
+            if not (used >> _pid(p)) & 1:
+                return p
+        return None
 
 def _current_children_count(node) -> int:
     return len(getattr(node, "children", []))
 
-def _eligible_capacity_for_leaf(leaf, products_count: int, max_children: int) -> int:
-    """
-    Capacitate maxima de noi copii pe frunza, tinand cont de:
-      - limita max_children per nod
-      - produse distincte deja pe calea root->leaf
-    """
-    by_max = max(0, max_children - _current_children_count(leaf))
-    used_on_path = len(_path_product_ids(leaf))
-    by_products = max(0, products_count - used_on_path)
-    return min(by_max, by_products)
-
-def _pick_product_for_leaf(leaf, products: List, rng: random.Random):
-    """Alege un produs cu id unic  pe calea root->leaf"""
-    used = _path_product_ids(leaf)
-    tries = min(5 * len(products), 2000)
-    for _ in range(tries):
-        p = rng.choice(products)
-        if _pid(p) not in used:
-            return p
-    return None
-
 def _attach_child(parent, product, qty_triplet: Tuple[int, int, int]):
     opid = Sequencer().index
     MetaInfo().add_metainfo(product, opid)
@@ -114,14 +125,16 @@ def create_tree_bounded(
     products_count = len(products)
     remaining = n_total - 1  # root deja exista
 
+    # produsele de pe caile root->nod si frontiera (frunzele, in preordine), actualizate incremental
+    paths = _PathIndex(root)
+    frontier = [n for n in PreOrderIter(root) if _current_children_count(n) == 0]
+
     # ---- Faza A: n-ary controlat de [min_children, max_children]
     while remaining > 0:
-        leaves = _leaves_of(root)
-
         # frunze capabile sa primeasca cel putin min_children copii acum
         elig = []
-        for lf in leaves:
-            cap = _eligible_capacity_for_leaf(lf, products_count, max_children)
+        for lf in frontier:
+            cap = paths.capacity(lf, products_count, max_children)
             if cap >= min_children:
                 elig.append((lf, cap))
 
@@ -133,7 +146,8 @@ def create_tree_bounded(
             break
 
         rng.shuffle(elig)
-        leaves_sel = [lf for (lf, cap) in elig[: min(len(elig), Lmax)]]
+        selected = elig[: min(len(elig), Lmax)]
+        leaves_sel = [lf for (lf, cap) in selected]
 
         # alocare minim
         alloc: Dict[object, int] = {lf: min_children for lf in leaves_sel}
@@ -141,37 +155,36 @@ def create_tree_bounded(
         if remaining_after_min < 0:
             remaining_after_min = 0
 
-        # extra - peste minim
-        extras: Dict[object, int] = {}
-        total_extra_cap = 0
-        for lf in leaves_sel:
-            cap_now = _eligible_capacity_for_leaf(lf, products_count, max_children)
-            ex = max(0, cap_now - min_children)
-            extras[lf] = ex
-            total_extra_cap += ex
+        # extra - peste minim (capacitatea nu s-a schimbat de la calculul eligibilitatii)
+        extras: Dict[object, int] = {lf: max(0, cap - min_children) for (lf, cap) in selected}
+        total_extra_cap = sum(extras.values())
 
         budget = min(remaining_after_min, total_extra_cap)
 
-        # distribuire round-robin aleator
+        # distribuire round-robin aleator: la fiecare tura, cate un copil pentru fiecare frunza care mai are extra
         order = leaves_sel[:]
         rng.shuffle(order)
-        i = 0
-        while budget > 0 and any(v > 0 for v in extras.values()):
-            lf = order[i % len(order)]
-            if extras[lf] > 0:
+        active = [lf for lf in order if extras[lf] > 0]
+        while budget > 0 and active:
+            next_active = []
+            for lf in active:
+                if budget == 0:
+                    break
                 alloc[lf] += 1
                 extras[lf] -= 1
                 budget -= 1
-            i += 1
+                if extras[lf] > 0:
+                    next_active.append(lf)
+            active = next_active
 
         # atasam conform alocarilor
         added = 0
         for lf, c_i in alloc.items():
             for _ in range(c_i):
-                prod = _pick_product_for_leaf(lf, products, rng)
+                prod = paths.pick(lf, products, rng)
                 if not prod:
                     continue
-                _attach_child(lf, prod, qty_triplet)
+                paths.add(_attach_child(lf, prod, qty_triplet))
                 remaining -= 1
                 added += 1
                 if remaining == 0:
@@ -182,6 +195,9 @@ def create_tree_bounded(
         if added == 0:
             break  # nu am reusit sa adaugam nimic în pasul asta; trecem la verticale
 
+        # frunzele extinse sunt inlocuite, pe pozitia lor, de copiii noi (toti frunze), deci preordinea se pastreaza
+        frontier = [c for lf in frontier for c in (lf.children or (lf,))]
+
     # ---- Faza B: verticale 
     if remaining > 0:
         vcfg = vertical_cfg or {}
@@ -199,34 +215,42 @@ def create_tree_bounded(
         if max_d < min_d:
             max_d = min_d
 
+        # frunzele care pot primi inca 1 copil (respecta max_children si eligibilitatea), in preordine. Un lant
+        # inlocuieste frunza de start cu ultimul nod al lantului, pe aceeasi pozitie
+        starts = [lf for lf in frontier if paths.capacity(lf, products_count, max_children) >= 1]
+
         attempts = 0
         max_attempts = 5 * remaining  # limita de incercari 
         while remaining > 0 and attempts < max_attempts:
-            # frunze care pot primi inca 1 copil (respecta max_children si eligibilitatea)
-            starts = []
-            for lf in _leaves_of(root):
-                if _eligible_capacity_for_leaf(lf, products_count, max_children) >= 1:
-                    starts.append(lf)
             if not starts:
                 break
 
-            start = rng.choice(starts)
+            # echivalent cu rng.choice(starts), dar pastram si pozitia
+            k = rng.randrange(len(starts))
+            start = starts[k]
             chain_len = min(remaining, rng.randint(min_d, max_d))
 
             curr = start
             steps = 0
             while steps < chain_len and remaining > 0:
                 # verifica capacitatea pentru nodul curent (start sau copilul abia creat)
-                if _eligible_capacity_for_leaf(curr, products_count, max_children) < 1:
+                if paths.capacity(curr, products_count, max_children) < 1:
                     break
-                prod = _pick_product_for_leaf(curr, products, rng)
+                prod = paths.pick(curr, products, rng)
                 if not prod:
                     break
                 child = _attach_child(curr, prod, qty_triplet)
+                paths.add(child)
                 remaining -= 1
                 steps += 1
                 curr = child  # lantul in jos
 
+            if curr is not start:
+                if paths.capacity(curr, products_count, max_children) >= 1:
+                    starts[k] = curr
+                else:
+                    del starts[k]
+
             attempts += 1
 
         if remaining > 0:
@@ -7,9 +7,11 @@ import os, random, logging
 from anytree import Node, Resolver, RenderTree
 
 from datagen.common.utility import check_and_create_if_not_exists, get_abs_file_path
+from datagen.common.context import GenerationContext
+from datagen.common.rng import entry_sequences, random_generator, seed_generators
 from datagen.common.sequencer import Sequencer
 from datagen.common.rootprod import RootProduct, RootNode
-from datagen.common.stocks import Stocks
+from datagen.common.treesignature import TreeSignatures
 
 from datagen.multi.quantity import Quantity
 from datagen.multi.metainfo import MetaInfo
@@ -22,6 +24,8 @@ from datagen.fixed.main import (
     _prepare_products,
     _compute_output_dir,
     _create_run_folder,
+    _tree_signatures,
+    _build_unique_tree,
 )
 
 # Afisare / export
@@ -45,16 +49,23 @@ def _set_rootdir_from_output_dir(output_dir: str) -> None:
         RootDir().set(".")
 
 
-def _build_one_tree(bom, products, output_dir, output_file_base, idx: int):
-    # reset state comun
-    Sequencer().reset()
-    MetaInfo().reset_machines()
-    MetaInfo().reset_operations()
-    Stocks().reset()
-    ProdMachinesAll.reset()
-    RootProduct.reset()
-    RootNode().reset()
+def _build_one_tree(bom, products, output_dir, output_file_base, idx: int, context: GenerationContext = None,
+                    signatures: TreeSignatures = None):
+    """
+    Construieste un arbore intr-un context de generare propriu (unul nou daca nu este dat), in locul resetarii
+    starii comune intre arbori. Generatoarele aleatoare sunt initializate din fluxul arborelui
+    """
+    context = context or GenerationContext()
+    globals_sequence, tree_sequence = context.seed_sequence.spawn(2)
+    seed_generators(globals_sequence)
+
+    with context.activate():
+        _generate_one_tree(bom, products, output_dir, output_file_base, idx, random_generator(tree_sequence),
+                           signatures)
+
 
+def _generate_one_tree(bom, products, output_dir, output_file_base, idx: int, rng: random.Random,
+                       signatures: TreeSignatures = None):
     # root product
     root_product = random.choice(products)
     if not hasattr(root_product, "operations"):
@@ -93,7 +104,6 @@ def _build_one_tree(bom, products, output_dir, output_file_base, idx: int):
         bom.products_info[0].quantity.max,
     )
 
-    rng = random.Random()
     try:
         create_tree_bounded(
             root=root,
@@ -109,6 +119,10 @@ def _build_one_tree(bom, products, output_dir, output_file_base, idx: int):
         log.warning(str(e))
         return
 
+    # arborele izomorf cu unul generat inainte nu este salvat (DuplicateTreeError), ci regenerat de apelant
+    if signatures is not None:
+        signatures.add(root)
+
     # atasare operations_list si salvam
     resolver = Resolver("name")
     root_node = resolver.get(root, "/root")
@@ -143,7 +157,10 @@ def start_bounded(configuration_file_path: str) -> None:
     if not all_boms:
         raise SystemExit("No bounded BOMs found in configuration.")
 
-    for bom in all_boms:
+    for bom, bom_sequence in zip(all_boms, entry_sequences([b.seed for b in all_boms])):
+        # fiecare arbore are propriul flux aleator, derivat din fluxul BOM-ului
+        tree_sequences = iter(bom_sequence.spawn(len(bom.products_info) * bom.k_trees))
+
         # pregateste produsele la locul standard (multiboms/<root_dir>/rand_products.json)
         products = _prepare_products(bom)
 
@@ -152,13 +169,23 @@ def start_bounded(configuration_file_path: str) -> None:
         run_output_dir = _create_run_folder(base_output_dir)
         log.info(f"[bounded] Run output dir: {run_output_dir}")
 
+        # semnaturile pentru unicitatea arborilor acestui BOM
+        signatures = _tree_signatures(bom, "bounded")
+
         for prod_info in bom.products_info:
             base_name = prod_info.output_file
             for idx in range(1, bom.k_trees + 1):
-                _build_one_tree(
-                    bom=bom,
-                    products=products,
-                    output_dir=run_output_dir,
-                    output_file_base=base_name,
-                    idx=idx,
+                _build_unique_tree(
+                    lambda context, signatures: _build_one_tree(
+                        bom=bom,
+                        products=products,
+                        output_dir=run_output_dir,
+                        output_file_base=base_name,
+                        idx=idx,
+                        context=context,
+                        signatures=signatures,
+                    ),
+                    next(tree_sequences),
+                    signatures,
+                    "bounded",
                 )
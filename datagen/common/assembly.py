@@ -6,8 +6,12 @@ to generate a unit execution time and also the class modelling the Overall Equip
 """
 
 import random
+from functools import lru_cache
 from typing import Dict
 
+import numpy as np
+from scipy.stats import truncnorm
+
 
 class UnitAssemblyTime(object):
     """
@@ -50,3 +54,33 @@ class Oee:
         self.min = dct.get("min", 0)
         self.max = dct.get("max", 1)
         self.distribution = dct.get("distribution", "uniform")
+
+
+@lru_cache(maxsize=None)
+def truncated_normal(minimum: float, maximum: float, mean: float, std_dev: float):
+    """
+    Builds the truncated normal distribution of the OEE values. Building a frozen scipy distribution is expensive, so
+    the distribution is built once for every set of parameters and reused afterwards
+    """
+    return truncnorm((minimum - mean) / std_dev, (maximum - mean) / std_dev, loc=mean, scale=std_dev)
+
+
+def sample_oee(oee, mean: float, std_dev: float, size: int) -> np.ndarray:
+    """
+    Draws the OEE values for a number of machines in a single call. The values are the same as the ones drawn one at a
+    time for every machine, with the same seed
+
+    :param oee: the OEE parameters of the BOM (min, max and the statistical distribution)
+    :param mean: the mean of the normal distribution
+    :param std_dev: the standard deviation of the normal distribution
+    :param size: the number of machines
+    :return: the OEE values, rounded to 3 decimals
+    """
+    if oee.distribution == "normal":
+        values = truncated_normal(oee.min, oee.max, mean, std_dev).rvs(size=size)
+    elif oee.distribution == "uniform":
+        values = np.random.uniform(oee.min, oee.max, size=size)
+    else:
+        raise ValueError("Not a valid value for the statistical distribution")
+
+    return np.round(values, 3)
@@ -0,0 +1,476 @@
+"""
+Module holding the array-backed representation of a BOM tree. The generators append operations to a set of parallel
+arrays (parent index, operation id, product id, quantity and a CSR of machine alternatives) instead of building an
+anytree object per operation. The tree is turned into anytree nodes only when it has to be exported.
+"""
+
+import copy
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from anytree import AnyNode, Node
+
+
+# the attributes which have a dedicated column; every other attribute of a node is kept in the extras dictionary
+COLUMN_ATTRIBUTES = ("parentid", "operationid", "productid", "quantity", "code", "pname", "name", "machines")
+
+# the keys of a machine alternative which have a dedicated column in the machines CSR
+MACHINE_ATTRIBUTES = ("id", "name", "oee", "execution_time", "setup_time")
+
+# the attributes (of the nodes and of the machine alternatives) stored in an int64 column and in a string column
+INTEGER_ATTRIBUTES = ("operationid", "productid", "quantity", "id", "execution_time", "setup_time")
+STRING_ATTRIBUTES = ("name", "code", "pname")
+
+# the range of the values of an int64 column
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+# upper limit for the number of nodes allocated up front. Larger trees grow their arrays while they are built
+MAX_INITIAL_CAPACITY = 1 << 20
+
+
+def is_int64(value: Any) -> bool:
+    """
+    Checks if a value is an integer (and not a boolean) which fits an int64 column
+    """
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool) and INT64_MIN <= value <= INT64_MAX
+
+
+def _fits_column(key: str, value: Any) -> bool:
+    """
+    Checks if the value of an attribute (of a node or of a machine alternative) is stored in its column exactly, i.e.
+    it is read back with the same type and value
+    """
+    if key == "parentid":
+        return value is None or (is_int64(value) and value >= 0)
+    if key in INTEGER_ATTRIBUTES:
+        return is_int64(value)
+    if key in STRING_ATTRIBUTES:
+        return value is None or isinstance(value, str)
+    if key == "oee":
+        return isinstance(value, float) or (is_int64(value) and float(value) == value)
+    if key == "machines":
+        return isinstance(value, list) and all(isinstance(machine, dict) for machine in value)
+    return False
+
+
+class BomArrays:
+    """
+    Stores a BOM tree as parallel arrays indexed by the position of the operation in the tree. A node is always
+    appended after its parent, so the parent index of a node is smaller than its own index and the children of a node
+    appear in the order in which they were created.
+
+    For every node one keeps a layout, i.e. the ordered tuple of attribute names the node was created with. The layout
+    is used when the tree is converted back to anytree, so the exported JSON keeps exactly the same keys, in the same
+    order, as the nodes built directly with anytree. Every machine alternative has its own layout too.
+
+    A value which does not fit the type of its column (e.g. a float quantity or execution time, a missing parent id
+    written as -1) is kept in the extras of its node or machine alternative, so the conversion is lossless.
+    """
+
+    def __init__(self, capacity: int = 1024, machines_capacity: Optional[int] = None):
+        capacity = min(max(int(capacity), 1), MAX_INITIAL_CAPACITY)
+        machines_capacity = max(int(machines_capacity or capacity * 4), 1)
+
+        # number of nodes in the tree
+        self.size = 0
+
+        self.parent = np.full(capacity, -1, dtype=np.int64)
+        self.parentid = np.full(capacity, -1, dtype=np.int64)
+        self.operationid = np.zeros(capacity, dtype=np.int64)
+        self.productid = np.zeros(capacity, dtype=np.int64)
+        self.quantity = np.zeros(capacity, dtype=np.int64)
+        self.depth = np.zeros(capacity, dtype=np.int64)
+        self.layout = np.zeros(capacity, dtype=np.int32)
+
+        self.name: List[Optional[str]] = []
+        self.code: List[Optional[str]] = []
+        self.pname: List[Optional[str]] = []
+
+        # the attributes of a node which do not have a dedicated column (dates, metainfo, raw materials etc.) or whose
+        # value does not fit its column
+        self.extras: Dict[int, Dict[str, Any]] = {}
+
+        # the machine alternatives of node i are stored in [machines_indptr[i], machines_indptr[i + 1])
+        self.machines_indptr = np.zeros(capacity + 1, dtype=np.int64)
+        self.machine_layout = np.zeros(machines_capacity, dtype=np.int32)
+        self.machine_id = np.zeros(machines_capacity, dtype=np.int64)
+        self.machine_oee = np.zeros(machines_capacity, dtype=np.float64)
+        # True if the OEE of the machine alternative was an integer (e.g. 1 instead of 1.0)
+        self.machine_oee_int = np.zeros(machines_capacity, dtype=bool)
+        self.machine_execution_time = np.zeros(machines_capacity, dtype=np.int64)
+        self.machine_setup_time = np.zeros(machines_capacity, dtype=np.int64)
+        self.machine_name: List[Optional[str]] = []
+
+        # the keys of a machine alternative which do not have a dedicated column or whose value does not fit its column
+        self.machine_extras: Dict[int, Dict[str, Any]] = {}
+
+        # the registry of the distinct layouts used in the tree (for the nodes and for the machine alternatives)
+        self.layouts: List[Tuple[str, ...]] = []
+        self._layouts_index: Dict[Tuple[str, ...], int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _intern_layout(self, layout: Tuple[str, ...]) -> int:
+        """
+        Returns the index of the layout in the layouts registry, adding it if necessary
+        """
+        index = self._layouts_index.get(layout)
+        if index is None:
+            index = len(self.layouts)
+            self.layouts.append(layout)
+            self._layouts_index[layout] = index
+        return index
+
+    def _grow_nodes(self, required: int) -> None:
+        """
+        Doubles the capacity of the node columns until at least required nodes fit in
+        """
+        capacity = len(self.parent)
+        if required <= capacity:
+            return
+
+        while capacity < required:
+            capacity *= 2
+
+        for column, fill in (("parent", -1), ("parentid", -1), ("operationid", 0), ("productid", 0),
+                             ("quantity", 0), ("depth", 0), ("layout", 0)):
+            old = getattr(self, column)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+        indptr = np.zeros(capacity + 1, dtype=np.int64)
+        indptr[:len(self.machines_indptr)] = self.machines_indptr
+        self.machines_indptr = indptr
+
+    def _grow_machines(self, required: int) -> None:
+        """
+        Doubles the capacity of the machine alternatives columns until at least required entries fit in
+        """
+        capacity = len(self.machine_id)
+        if required <= capacity:
+            return
+
+        while capacity < required:
+            capacity *= 2
+
+        for column in ("machine_layout", "machine_id", "machine_oee", "machine_oee_int", "machine_execution_time",
+                       "machine_setup_time"):
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+    def add_node(self, parent: int, attributes: Dict[str, Any]) -> int:
+        """
+        Appends a node to the tree
+
+        :param parent: the index of the parent node, -1 for the root
+        :param attributes: the attributes of the node, in the order they have to be exported. If the node has a name
+            (i.e. it is an anytree Node and not an AnyNode), the name has to be the last key in the dictionary, as
+            anytree adds it after the other attributes
+        :return: the index of the new node
+        """
+        index = self.size
+        self._grow_nodes(index + 1)
+
+        self.parent[index] = parent
+        self.depth[index] = self.depth[parent] + 1 if parent >= 0 else 0
+        self.layout[index] = self._intern_layout(tuple(attributes))
+
+        self.parentid[index] = -1
+        self.name.append(None)
+        self.code.append(None)
+        self.pname.append(None)
+
+        machines = []
+        extras = {}
+        for key, value in attributes.items():
+            if key not in COLUMN_ATTRIBUTES or not _fits_column(key, value):
+                extras[key] = value
+            elif key == "machines":
+                machines = value
+            else:
+                self._set_column(index, key, value)
+        if extras:
+            self.extras[index] = extras
+
+        start = self.machines_indptr[index]
+        self._grow_machines(start + len(machines))
+        for position, machine in enumerate(machines, start):
+            self._set_machine(position, machine)
+        self.machines_indptr[index + 1] = start + len(machines)
+
+        self.size += 1
+        return index
+
+    def _set_column(self, index: int, key: str, value: Any) -> None:
+        """
+        Stores the value of an attribute of a node in its column (the value has to fit the column)
+        """
+        if key == "parentid":
+            self.parentid[index] = -1 if value is None else value
+        else:
+            getattr(self, key)[index] = value
+
+    def _set_machine(self, position: int, machine: Dict[str, Any]) -> None:
+        """
+        Stores a machine alternative at a position of the machines CSR (the next one, as the names are appended)
+        """
+        self.machine_layout[position] = self._intern_layout(tuple(machine))
+
+        name = None
+        extras = {}
+        for key, value in machine.items():
+            if key not in MACHINE_ATTRIBUTES or not _fits_column(key, value):
+                extras[key] = value
+            elif key == "name":
+                name = value
+            elif key == "oee":
+                self.machine_oee[position] = value
+                self.machine_oee_int[position] = not isinstance(value, float)
+            else:
+                getattr(self, f"machine_{key}")[position] = value
+
+        self.machine_name.append(name)
+        if extras:
+            self.machine_extras[position] = extras
+
+    def set_attribute(self, index: int, key: str, value: Any) -> None:
+        """
+        Sets an attribute of an already created node. A new attribute is appended at the end of the node's layout,
+        exactly like setting an attribute on an anytree node. The machines cannot be changed once the node is created
+        """
+        if key == "machines":
+            raise ValueError("The machines of a node cannot be changed after the node was added to the tree")
+
+        layout = self.layouts[self.layout[index]]
+        if key not in layout:
+            self.layout[index] = self._intern_layout(layout + (key,))
+
+        if key in COLUMN_ATTRIBUTES and _fits_column(key, value):
+            self._set_column(index, key, value)
+            extras = self.extras.get(index)
+            if extras and key in extras:
+                del extras[key]
+                if not extras:
+                    del self.extras[index]
+        else:
+            self.extras.setdefault(index, {})[key] = value
+
+    def machines_of(self, index: int) -> List[Dict[str, Any]]:
+        """
+        Builds the list of the machine alternatives of a node, as dictionaries
+        """
+        machines = []
+        for position in range(self.machines_indptr[index], self.machines_indptr[index + 1]):
+            extras = self.machine_extras.get(position, {})
+            machine = {}
+            for key in self.layouts[self.machine_layout[position]]:
+                if key in extras:
+                    machine[key] = extras[key]
+                elif key == "name":
+                    machine[key] = self.machine_name[position]
+                elif key == "oee":
+                    oee = float(self.machine_oee[position])
+                    machine[key] = int(oee) if self.machine_oee_int[position] else oee
+                else:
+                    machine[key] = int(getattr(self, f"machine_{key}")[position])
+            machines.append(machine)
+        return machines
+
+    def _present(self, layout: np.ndarray, key: str, extras: Dict[int, Dict[str, Any]],
+                 start: int) -> Tuple[np.ndarray, List[Any]]:
+        """
+        Finds the entries (nodes or machine alternatives) whose layout has the key
+
+        :param layout: the layout column of the entries, from position start on
+        :return: the mask of the entries whose value is kept in a column and the values kept in the extras
+        """
+        present = np.isin(layout, [i for i, keys in enumerate(self.layouts) if key in keys])
+        values = []
+        for position in sorted(extras):
+            if position >= start and key in extras[position]:
+                present[position - start] = False
+                values.append(extras[position][key])
+        return present, values
+
+    def machine_values(self, key: str) -> List[Any]:
+        """
+        Returns the values of a key of all the machine alternatives of the tree, skipping the machine alternatives
+        which do not have the key
+        """
+        count = int(self.machines_indptr[self.size])
+        present, values = self._present(self.machine_layout[:count], key, self.machine_extras, 0)
+
+        if key == "name":
+            values += [self.machine_name[position] for position in np.flatnonzero(present).tolist()]
+        elif key == "oee":
+            values += [int(oee) if is_int else oee for oee, is_int in
+                       zip(self.machine_oee[:count][present].tolist(), self.machine_oee_int[:count][present].tolist())]
+        elif key in MACHINE_ATTRIBUTES:
+            values += getattr(self, f"machine_{key}")[:count][present].tolist()
+        return values
+
+    def node_values(self, key: str, start: int = 0) -> List[Any]:
+        """
+        Returns the values of an attribute of the nodes of the tree, from the node at position start on, skipping the
+        nodes which do not have the attribute
+        """
+        present, values = self._present(self.layout[start:self.size], key, self.extras, start)
+
+        if key in ("name", "code", "pname"):
+            values += [getattr(self, key)[start + index] for index in np.flatnonzero(present).tolist()]
+        elif key == "machines":
+            values += [self.machines_of(start + index) for index in np.flatnonzero(present).tolist()]
+        elif key in COLUMN_ATTRIBUTES:
+            column = getattr(self, key)[start:self.size][present].tolist()
+            values += [None if key == "parentid" and value < 0 else value for value in column]
+        return values
+
+    def attributes_of(self, index: int) -> Dict[str, Any]:
+        """
+        Builds the attributes of a node, in the order given by its layout
+        """
+        extras = self.extras.get(index, {})
+        attributes = {}
+        for key in self.layouts[self.layout[index]]:
+            if key in extras:
+                attributes[key] = extras[key]
+            elif key == "parentid":
+                attributes[key] = None if self.parentid[index] < 0 else int(self.parentid[index])
+            elif key in ("operationid", "productid", "quantity"):
+                attributes[key] = int(getattr(self, key)[index])
+            elif key in ("name", "code", "pname"):
+                attributes[key] = getattr(self, key)[index]
+            else:
+                attributes[key] = self.machines_of(index)
+        return attributes
+
+    def to_anytree(self) -> Node:
+        """
+        Converts the arrays into an anytree tree. The conversion is iterative, so it works for any depth of the tree
+
+        :return: the root of the anytree tree
+        """
+        nodes = []
+        for index in range(self.size):
+            parent = nodes[self.parent[index]] if self.parent[index] >= 0 else None
+            attributes = self.attributes_of(index)
+
+            if "name" in attributes:
+                # anytree sets the name after the keyword arguments, so the attributes added after the node creation
+                # are set afterwards to preserve their order
+                keys = list(attributes)
+                position = keys.index("name")
+                before = {key: attributes[key] for key in keys[:position]}
+                node = Node(attributes["name"], parent=parent, **before)
+                for key in keys[position + 1:]:
+                    setattr(node, key, attributes[key])
+            else:
+                node = AnyNode(parent=parent, **attributes)
+
+            nodes.append(node)
+
+        return nodes[0] if nodes else None
+
+    def to_anynode_tree(self) -> AnyNode:
+        """
+        Converts the arrays into a tree of AnyNode objects, the tree anytree's JsonImporter builds from the exported
+        JSON. The attributes are copied, so the tree can be changed without changing the arrays
+
+        :return: the root of the anytree tree
+        """
+        nodes = []
+        for index in range(self.size):
+            parent = nodes[self.parent[index]] if self.parent[index] >= 0 else None
+            attributes = self.attributes_of(index)
+
+            # the machines are built for every call, the other attributes without a column may be shared containers
+            for key in self.extras.get(index, ()):
+                attributes[key] = copy.deepcopy(attributes[key])
+
+            nodes.append(AnyNode(parent=parent, **attributes))
+
+        return nodes[0] if nodes else None
+
+
+def _is_container(value: Any) -> bool:
+    return isinstance(value, (dict, list))
+
+
+def _copy_machines(machines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [machine.copy() for machine in machines]
+
+
+def _copier(value: Any) -> Callable[[Any], Any]:
+    """
+    Builds the function which copies the containers (lists and dictionaries) of a JSON-like value, keeping the other
+    values, which are immutable, shared. The shape of the value is inspected only once, so the flat lists and
+    dictionaries (e.g. the machine alternatives) are copied with a single list.copy / dict.copy call
+    """
+    if isinstance(value, dict):
+        copiers = {key: _copier(item) for key, item in value.items() if _is_container(item)}
+        if not copiers:
+            return dict.copy
+        # the copied items keep their position in the dictionary
+        return lambda original: {**original, **{key: copier(original[key]) for key, copier in copiers.items()}}
+
+    if isinstance(value, list):
+        if not any(_is_container(item) for item in value):
+            return list.copy
+        if all(isinstance(item, dict) and not any(_is_container(v) for v in item.values()) for item in value):
+            return lambda original: [item.copy() for item in original]
+        copiers = [_copier(item) if _is_container(item) else None for item in value]
+        return lambda original: [copier(item) if copier else item for copier, item in zip(copiers, original)]
+
+    return lambda original: original
+
+
+class AnyNodeTemplate:
+    """
+    The template of the AnyNode tree of a BOM: the attributes of every node, already converted to Python values, and
+    the children of every node. The template is built once from the arrays, then every clone only copies the mutable
+    attributes (the machines and the containers without a column, e.g. the metainfo) and links the nodes, so the
+    variants of an instance are built without converting the arrays again.
+    """
+
+    def __init__(self, arrays: BomArrays):
+        self.attributes: List[Dict[str, Any]] = [arrays.attributes_of(index) for index in range(arrays.size)]
+
+        # the attributes of every node which have to be copied for every clone, with the function copying each of them
+        self.mutable: List[Tuple[Tuple[str, Callable[[Any], Any]], ...]] = [
+            tuple((key, _copy_machines if key == "machines" else _copier(value))
+                  for key, value in attributes.items() if _is_container(value))
+            for attributes in self.attributes
+        ]
+
+        # the children of every node, in the order they were created
+        self.children: Dict[int, List[int]] = {}
+        for index in range(1, arrays.size):
+            self.children.setdefault(int(arrays.parent[index]), []).append(index)
+
+    def __len__(self) -> int:
+        return len(self.attributes)
+
+    def clone(self) -> Optional[AnyNode]:
+        """
+        Builds a new AnyNode tree, independent of the template and of the other clones
+
+        :return: the root of the tree
+        """
+        nodes = []
+        for attributes, mutable in zip(self.attributes, self.mutable):
+            node = AnyNode(**attributes)
+            for key, copier in mutable:
+                setattr(node, key, copier(attributes[key]))
+            nodes.append(node)
+
+        # the children are linked from the last parent to the first one, so every parent is still detached when its
+        # children are set and anytree does not walk up its ancestors to look for a loop
+        for parent in sorted(self.children, reverse=True):
+            nodes[parent].children = [nodes[child] for child in self.children[parent]]
+
+        return nodes[0] if nodes else None
@@ -0,0 +1,104 @@
+"""
+Module holding the catalog of the generated products. The assignment of the products to their alternative machines is
+kept as arrays (one entry for every product-machine pair), so the setup and execution times of the whole catalog are
+drawn and computed in a few vectorized steps. The per-product dictionaries are built only when the catalog is
+serialized.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+
+# the number of seconds in a time unit. A day is counted as 60 hours, as the generators always did
+SECONDS_PER_TIME_UNIT = {"seconds": 1, "minutes": 60, "hours": 60 * 60, "days": 60 * 60 * 60}
+
+
+def to_seconds(time_units: str, values):
+    """
+    Transforms one or more durations in seconds, based on the units in which the durations are expressed
+    """
+    if time_units not in SECONDS_PER_TIME_UNIT:
+        raise ValueError(f"Invalid time units {time_units}")
+
+    return values * SECONDS_PER_TIME_UNIT[time_units]
+
+
+def draw_steps(minimum: int, step: int, maximum: int, size: int) -> np.ndarray:
+    """
+    Draws size values of the form min + k * step, lower or equal to max
+    """
+    steps_number = (maximum - minimum) // step
+    return minimum + np.random.randint(0, steps_number + 1, size=size) * step
+
+
+class ProductCatalog:
+    """
+    The product-by-machine assignment of a list of products, stored as a CSR: the machines of the product i are the
+    entries [indptr[i], indptr[i + 1]) of the machine arrays
+    """
+
+    def __init__(self, products: Sequence[Any]):
+        """
+        :param products: the products, every one having a list of Machine instances in its machines attribute
+        """
+        self.products = products
+
+        self.counts = np.array([len(p.machines) for p in products], dtype=np.int64)
+        self.indptr = np.zeros(len(products) + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=self.indptr[1:])
+
+        self.machine_id = np.array([m.id for p in products for m in p.machines], dtype=np.int64)
+        self.machine_name: List[str] = [m.name for p in products for m in p.machines]
+        self.oee = np.array([m.oee for p in products for m in p.machines], dtype=np.float64)
+
+        # the position of the machine in the machines list of its product
+        self.rank = np.arange(len(self.machine_id)) - np.repeat(self.indptr[:-1], self.counts)
+
+        self.execution_time = np.zeros(len(self.machine_id), dtype=np.int64)
+        self.setup_time = np.zeros(len(self.machine_id), dtype=np.int64)
+
+    def identical_machines(self, allowed: bool, max_number_of_identical_machines: int) -> np.ndarray:
+        """
+        Returns the mask of the machines treated as identical: the first max_number_of_identical_machines machines
+        of every product, if identical machines are allowed at all
+        """
+        if not allowed:
+            return np.zeros(len(self.machine_id), dtype=bool)
+        return self.rank < max_number_of_identical_machines
+
+    def add_execution_times(self, time_units: str, minimum: int, step: int, maximum: int,
+                            identical: np.ndarray) -> None:
+        """
+        Draws a generic execution time for every product. The identical machines keep the generic time, converted
+        again in seconds, the other ones scale it with their OEE
+        """
+        generic_execution_time = to_seconds(time_units, draw_steps(minimum, step, maximum, len(self.products)))
+        generic_execution_time = np.repeat(generic_execution_time, self.counts)
+
+        self.execution_time = np.where(identical,
+                                       to_seconds(time_units, generic_execution_time),
+                                       (generic_execution_time / self.oee).astype(np.int64))
+
+    def add_setup_times(self, time_units: str, minimum: int, step: int, maximum: int, identical: np.ndarray) -> None:
+        """
+        Draws the setup times. The identical machines share a single setup time, the other ones get their own
+        """
+        shared_setup_time = to_seconds(time_units, draw_steps(minimum, step, maximum, 1)[0])
+        own_setup_time = to_seconds(time_units, draw_steps(minimum, step, maximum, len(self.machine_id)))
+
+        self.setup_time = np.where(identical, shared_setup_time, own_setup_time)
+
+    def machines_of(self, index: int, keys: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Builds the machine dictionaries of a product, with the keys in the specified order
+        """
+        machines = []
+        for position in range(self.indptr[index], self.indptr[index + 1]):
+            values = {"id": int(self.machine_id[position]),
+                      "name": self.machine_name[position],
+                      "oee": float(self.oee[position]),
+                      "execution_time": int(self.execution_time[position]),
+                      "setup_time": int(self.setup_time[position])}
+            machines.append({key: values[key] for key in keys})
+        return machines
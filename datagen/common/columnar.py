@@ -0,0 +1,269 @@
+"""
+Module holding the columnar binary format of the BOM trees, written alongside the nested JSON in a numpy .npz file. The
+tree is kept as flat arrays indexed by the position of the operation in the tree (parent index, operation id, product
+id, quantity), the machine alternatives as a CSR (indptr, machine id, OEE, execution time, setup time) and the
+maintenances found in the metainfo of the tree as an interval table (id, machine id, start date, end date).
+
+The layouts of BomArrays (the ordered attribute names of every node and of every machine alternative) and the values
+without a dedicated column (or which do not fit their column) are stored too, so a tree read back from the .npz file is
+exported in exactly the same JSON as the original one.
+
+Both formats are read with load_tree, which builds the arrays directly (anytree nodes are built only on demand).
+
+The JSON files of an existing dataset can be converted with:
+    python -m datagen.common.columnar file1.json file2.json ...
+"""
+
+import json
+import os
+import sys
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import datagen.common.config as config
+import datagen.common.jsonreader as jsonreader
+from datagen.common.bomarrays import BomArrays, is_int64
+from datagen.common.jsonwriter import HIDDEN_ATTRIBUTES
+
+NPZ_EXTENSION = ".npz"
+
+# the columns of the nodes and of the machine alternatives which are stored as they are
+NODE_COLUMNS = ("parent", "parentid", "operationid", "productid", "quantity", "layout")
+MACHINE_COLUMNS = ("machine_layout", "machine_id", "machine_oee", "machine_oee_int", "machine_execution_time",
+                   "machine_setup_time")
+
+# the string columns, stored together with a mask of the values which are not None
+STRING_COLUMNS = ("name", "code", "pname", "machine_name")
+
+# the keys of an encoded maintenance, in the order they are exported
+MAINTENANCE_KEYS = ("id", "machineid", "start_date", "end_date")
+
+
+def npz_file_path(json_file_path: str) -> str:
+    """
+    Returns the path of the .npz file written alongside a JSON file
+    """
+    return os.path.splitext(json_file_path)[0] + NPZ_EXTENSION
+
+
+def _build_arrays(root: Any, attributes_of: Callable[[Any], Dict[str, Any]],
+                  children_of: Callable[[Any], Iterable[Any]]) -> BomArrays:
+    """
+    Walks a tree depth-first (iteratively) and appends its nodes to a BomArrays instance
+    """
+    arrays = BomArrays()
+    stack: List[Tuple[Any, int]] = [(root, -1)]
+
+    while stack:
+        node, parent = stack.pop()
+        index = arrays.add_node(parent, attributes_of(node))
+        # the children are pushed in the reverse order, so they are added in their original order
+        stack.extend((child, index) for child in reversed(list(children_of(node))))
+
+    return arrays
+
+
+def arrays_from_anytree(root: Any) -> BomArrays:
+    """
+    Builds the BomArrays of an anytree tree, keeping the attributes in the order they are exported
+    """
+    return _build_arrays(root,
+                         lambda node: {key: value for key, value in node.__dict__.items()
+                                       if key not in HIDDEN_ATTRIBUTES},
+                         lambda node: node.children)
+
+
+def arrays_from_document(document: Dict[str, Any]) -> BomArrays:
+    """
+    Builds the BomArrays of a tree given as the nested dictionary of its JSON document
+    """
+    return _build_arrays(document,
+                         lambda node: {key: value for key, value in node.items() if key != "children"},
+                         lambda node: node.get("children", []))
+
+
+def _split_maintenances(extras: Dict[int, Dict[str, Any]]) -> Tuple[Dict[str, np.ndarray], Dict[int, Dict[str, Any]]]:
+    """
+    Moves the maintenances of the metainfo attributes into an interval table. The maintenances which cannot be stored
+    losslessly in the table (other keys, other date format) are left in the extras
+
+    :return: the columns of the table and the extras without the moved maintenances
+    """
+    owners, nodes, ids, machines, starts, ends = [], [], [], [], [], []
+    remaining = {}
+
+    for index, node_extras in extras.items():
+        metainfo = node_extras.get("metainfo")
+        maintenances = metainfo.get("maintenances") if isinstance(metainfo, dict) else None
+
+        if isinstance(maintenances, list) and all(isinstance(m, dict) and tuple(m) == MAINTENANCE_KEYS and
+                                                  is_int64(m["id"]) and is_int64(m["machineid"])
+                                                  for m in maintenances):
+            start = _parse_dates([m["start_date"] for m in maintenances])
+            end = _parse_dates([m["end_date"] for m in maintenances])
+
+            if start is not None and end is not None:
+                owners.append(index)
+                nodes.extend([index] * len(maintenances))
+                ids.extend(m["id"] for m in maintenances)
+                machines.extend(m["machineid"] for m in maintenances)
+                starts.append(start)
+                ends.append(end)
+
+                # the key is kept, so the maintenances are restored at their position in the metainfo
+                node_extras = dict(node_extras, metainfo=dict(metainfo, maintenances=None))
+
+        remaining[index] = node_extras
+
+    table = {"maintenance_owners": np.array(owners, dtype=np.int64),
+             "maintenance_node": np.array(nodes, dtype=np.int64),
+             "maintenance_id": np.array(ids, dtype=np.int64),
+             "maintenance_machineid": np.array(machines, dtype=np.int64),
+             "maintenance_start": np.concatenate(starts) if starts else np.array([], dtype="datetime64[us]"),
+             "maintenance_end": np.concatenate(ends) if ends else np.array([], dtype="datetime64[us]")}
+
+    return table, remaining
+
+
+def _parse_dates(values: List[Any]) -> Optional[np.ndarray]:
+    """
+    Parses dates written with the global date mask (%Y-%m-%d %H:%M:%S.%f) as datetime64 values
+
+    :return: the parsed dates, None if some of them cannot be formatted back exactly as they were
+    """
+    if not all(isinstance(value, str) for value in values):
+        return None
+
+    try:
+        dates = np.array([value.replace(" ", "T") for value in values], dtype="datetime64[us]")
+    except ValueError:
+        return None
+
+    return dates if _format_dates(dates) == values else None
+
+
+def _format_dates(dates: np.ndarray) -> List[str]:
+    """
+    Formats datetime64 values with the global date mask (%Y-%m-%d %H:%M:%S.%f)
+    """
+    return [value.replace("T", " ") for value in np.datetime_as_string(dates, unit="us").tolist()]
+
+
+def save_npz(arrays: BomArrays, file_path: str) -> None:
+    """
+    Writes a tree, given as BomArrays, in the columnar format
+
+    :param arrays: the tree
+    :param file_path: the path of the .npz file
+    """
+    size = arrays.size
+    machines = int(arrays.machines_indptr[size])
+
+    columns = {column: getattr(arrays, column)[:size] for column in NODE_COLUMNS}
+    columns["machines_indptr"] = arrays.machines_indptr[:size + 1]
+    columns.update({column: getattr(arrays, column)[:machines] for column in MACHINE_COLUMNS})
+
+    for column in STRING_COLUMNS:
+        values = getattr(arrays, column)
+        columns[column] = np.array(["" if value is None else value for value in values], dtype=str)
+        columns[f"{column}_mask"] = np.array([value is not None for value in values], dtype=bool)
+
+    columns["layouts"] = np.array(json.dumps(arrays.layouts))
+
+    table, extras = _split_maintenances(arrays.extras)
+    columns.update(table)
+    columns["extras_index"] = np.array(list(extras), dtype=np.int64)
+    columns["extras"] = np.array(json.dumps(list(extras.values())))
+    columns["machine_extras_index"] = np.array(list(arrays.machine_extras), dtype=np.int64)
+    columns["machine_extras"] = np.array(json.dumps(list(arrays.machine_extras.values())))
+
+    np.savez_compressed(file_path, **columns)
+
+
+def load_npz(file_path: str) -> BomArrays:
+    """
+    Reads a tree written in the columnar format
+
+    :param file_path: the path of the .npz file
+    :return: the tree, as BomArrays
+    """
+    arrays = BomArrays(capacity=1, machines_capacity=1)
+
+    with np.load(file_path) as data:
+        for column in NODE_COLUMNS + MACHINE_COLUMNS + ("machines_indptr",):
+            setattr(arrays, column, data[column])
+        arrays.size = len(arrays.parent)
+
+        for column in STRING_COLUMNS:
+            values, mask = data[column].tolist(), data[f"{column}_mask"].tolist()
+            setattr(arrays, column, [value if present else None for value, present in zip(values, mask)])
+
+        arrays.layouts = [tuple(layout) for layout in json.loads(data["layouts"].item())]
+        arrays._layouts_index = {layout: index for index, layout in enumerate(arrays.layouts)}
+
+        arrays.extras = dict(zip(data["extras_index"].tolist(), json.loads(data["extras"].item())))
+        arrays.machine_extras = dict(zip(data["machine_extras_index"].tolist(),
+                                         json.loads(data["machine_extras"].item())))
+
+        maintenances: Dict[int, List[Dict[str, Any]]] = {node: [] for node in data["maintenance_owners"].tolist()}
+        for node, values in zip(data["maintenance_node"].tolist(),
+                                zip(data["maintenance_id"].tolist(), data["maintenance_machineid"].tolist(),
+                                    _format_dates(data["maintenance_start"]), _format_dates(data["maintenance_end"]))):
+            maintenances[node].append(dict(zip(MAINTENANCE_KEYS, values)))
+
+    for node, node_maintenances in maintenances.items():
+        arrays.extras[node]["metainfo"]["maintenances"] = node_maintenances
+
+    return arrays
+
+
+def load_tree(file_path: str) -> BomArrays:
+    """
+    Reads a tree written in JSON or in the columnar format (.npz). The JSON file is parsed once and its nodes are
+    appended directly to the arrays, without building anytree nodes. The trees of any depth are read (see jsonreader)
+
+    :param file_path: the path of the .json or .npz file
+    :return: the tree, as BomArrays
+    """
+    if file_path.endswith(NPZ_EXTENSION):
+        return load_npz(file_path)
+
+    with open(file_path) as f:
+        return arrays_from_document(jsonreader.load(f))
+
+
+def export_npz(root: Any, json_file_path: str) -> Optional[str]:
+    """
+    Writes the .npz file of an exported tree alongside its JSON file, if the columnar format was selected
+    (config.EXPORT_NPZ)
+
+    :param root: the root of the anytree tree
+    :param json_file_path: the path of the JSON file of the tree
+    :return: the path of the .npz file, None if the columnar format is not selected
+    """
+    if not config.EXPORT_NPZ:
+        return None
+
+    file_path = npz_file_path(json_file_path)
+    save_npz(arrays_from_anytree(root), file_path)
+    return file_path
+
+
+def tree_document(arrays: BomArrays) -> Dict[str, Any]:
+    """
+    Builds the nested dictionary of the JSON document of a tree, with the children of a node in a "children" list
+    added after its attributes
+    """
+    documents = [arrays.attributes_of(index) for index in range(arrays.size)]
+    for index in range(1, arrays.size):
+        documents[arrays.parent[index]].setdefault("children", []).append(documents[index])
+    return documents[0] if documents else {}
+
+
+if __name__ == '__main__':
+    for json_file in sys.argv[1:]:
+        with open(json_file) as f:
+            save_npz(arrays_from_document(jsonreader.load(f)), npz_file_path(json_file))
+        print(f"{json_file} -> {npz_file_path(json_file)}")
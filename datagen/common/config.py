@@ -10,3 +10,12 @@ GENERATE_SIMPLE_TREE = True
 
 # if a path of the BOM will be printed in table format
 PRINT_TABULAR_TREE_PATHS = False
+
+# if the machines generated for a BOM are also written in a JSON file (boms/<bom>_machines.json for mono,
+# multiboms/<root_directory>/machines.json for multi). The generators keep the machines in memory and never read this
+# file back
+EXPORT_MACHINES_FILE = True
+
+# if every exported BOM tree is also written in the columnar .npz format (see datagen.common.columnar), alongside its
+# JSON file. Set from the command line with the --npz option
+EXPORT_NPZ = False
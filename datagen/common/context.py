@@ -0,0 +1,110 @@
+"""
+Module holding the generation context, i.e. the state built while one BOM (or one multi BOM) is generated: the id
+sequences, the machines and products, the stocks, the meta information, the maintenances and the cached BOM.
+
+The generators used to keep this state in class attributes of singletons, shared by the whole interpreter. The
+singletons are still the way the generator modules reach the state, but their class attributes are now views on the
+active GenerationContext. Every BOM is generated inside its own context, so nothing leaks from one BOM to the next and
+several BOMs can be generated in separate processes from the same configuration.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from datagen.common.maintenancestore import MaintenanceStore
+
+
+class GenerationContext:
+    """
+    Owns the state of the generation of a single BOM (mono mode), multi BOM (multi mode) or tree (fixed and bounded
+    modes)
+    """
+
+    def __init__(self, seed_sequence: Optional[np.random.SeedSequence] = None):
+        """
+        :param seed_sequence: the seed sequence of the BOM, from which the streams of its trees are spawned
+        """
+        self.seed_sequence = seed_sequence if seed_sequence is not None else np.random.SeedSequence()
+
+        # the last value of the operations/products/stocks ids sequence and of the machines ids sequence
+        self.sequence: int = 0
+        self.machine_sequence: int = 0
+
+        # the machines built for the BOM, as a list and indexed by their id
+        self.machines: List[Any] = []
+        self.machines_by_id: Dict[int, Any] = {}
+
+        # the products generated for a multi BOM
+        self.products: List[Any] = []
+
+        # the stocks of raw materials
+        self.stocks: List[Any] = []
+
+        # the meta information gathered while the tree is built (see MetaInfo)
+        self.meta_products: List[int] = []
+        self.meta_operations: List[int] = []
+        self.meta_machines: Dict[int, None] = {}
+        self.meta_prod_machines: List[Any] = []
+
+        # the distinct product-machines pairs of all the operations, by (product id, machines) key (see ProdMachinesAll)
+        self.prod_machines: Dict[Any, Any] = {}
+
+        # the maintenances of the machines involved in the BOM, in a sorted schedule per machine
+        self.maintenances: MaintenanceStore = MaintenanceStore()
+
+        # the root product and the root node of the tree
+        self.root_product: Optional[Any] = None
+        self.root_node: Optional[Any] = None
+
+        # the products and the nodes on the path currently walked in the tree
+        self.path_products: List[Any] = []
+        self.path_nodes: List[Any] = []
+
+        # the BOM and the multi BOM currently generated
+        self.bom: Optional[Any] = None
+        self.multi_bom: Optional[Any] = None
+
+        # the directory of the generated multi BOM files
+        self.root_dir: str = ""
+
+    @contextmanager
+    def activate(self) -> Iterator['GenerationContext']:
+        """
+        Makes this context the active one for the duration of a with block. The previously active context is restored
+        when the block ends
+        """
+        _active_contexts.append(self)
+        try:
+            yield self
+        finally:
+            _active_contexts.pop()
+
+
+# the stack of the activated contexts. The bottom one is used by the code which does not activate a context itself
+_active_contexts: List[GenerationContext] = [GenerationContext()]
+
+
+def current_context() -> GenerationContext:
+    """
+    Returns the active generation context
+    """
+    return _active_contexts[-1]
+
+
+class ContextAttribute:
+    """
+    Descriptor which turns a class attribute of a singleton into a view on a field of the active GenerationContext.
+    Reading the attribute (from the class or from an instance) returns the field of the active context, assigning it
+    through an instance sets the field
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        return getattr(current_context(), self.field)
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        setattr(current_context(), self.field, value)
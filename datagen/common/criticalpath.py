@@ -0,0 +1,91 @@
+"""
+Module holding the critical path of a BOM tree. An operation needs the quantity of its product multiplied by the
+quantities of all its ancestors (the cumulative quantity), and its processing time is the longest time among its
+machine alternatives (setup time + cumulative quantity * execution time). An operation can finish only after all its
+children finished, so its earliest finish is its processing time plus the largest earliest finish of its children,
+and the earliest finish of the root is the length of the longest processing path of the tree.
+
+All the values are computed in a single iterative depth-first walk: the cumulative quantity and the processing time
+when a node is entered, the earliest finish when it is left. The walk is linear in the number of nodes, instead of
+walking the path of every leaf up to the root, and works for any depth of the tree.
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+def processing_time(machines: List[Dict[str, Any]], quantity: int) -> int:
+    """
+    Returns the longest time among the machine alternatives of an operation, 0 if it has no machine
+    """
+    return max((machine["setup_time"] + quantity * machine["execution_time"] for machine in machines), default=0)
+
+
+class CriticalPath:
+    """
+    The cumulative quantity, the processing time and the earliest finish of every node of a tree, keyed by node
+    """
+
+    def __init__(self, root: Any):
+        self.root = root
+        self.cumulative_quantity: Dict[Any, int] = {}
+        self.processing_time: Dict[Any, int] = {}
+        self.earliest_finish: Dict[Any, int] = {}
+
+        # the child with the largest earliest finish of every inner node, from which the critical path is rebuilt
+        self.critical_child: Dict[Any, Any] = {}
+
+        self._walk()
+
+    def _walk(self) -> None:
+        # the nodes to visit, each with a flag telling if the node is entered (False) or left (True)
+        stack = [(self.root, False)]
+
+        while stack:
+            node, leaving = stack.pop()
+
+            if leaving:
+                finish = 0
+                for child in node.children:
+                    if self.earliest_finish[child] > finish or node not in self.critical_child:
+                        finish = self.earliest_finish[child]
+                        self.critical_child[node] = child
+                self.earliest_finish[node] = self.processing_time[node] + finish
+                continue
+
+            parent_quantity = self.cumulative_quantity[node.parent] if node is not self.root else 1
+            quantity = parent_quantity * node.quantity
+            self.cumulative_quantity[node] = quantity
+            self.processing_time[node] = processing_time(getattr(node, "machines", None) or [], quantity)
+
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+
+    @property
+    def length(self) -> int:
+        """
+        The length of the longest processing path of the tree, i.e. the earliest finish of the root
+        """
+        return self.earliest_finish[self.root]
+
+    def path(self) -> List[Any]:
+        """
+        Returns the nodes of the longest processing path, from the root to a leaf
+        """
+        nodes = [self.root]
+        while nodes[-1] in self.critical_child:
+            nodes.append(self.critical_child[nodes[-1]])
+        return nodes
+
+    def tightness(self, available: float) -> Optional[float]:
+        """
+        Returns the ratio between the length of the longest processing path and the time available (e.g. the seconds
+        between the start date and the delivery date); a value above 1 means the delivery date cannot be met
+        """
+        return self.length / available if available > 0 else None
+
+
+def critical_path(root: Any) -> CriticalPath:
+    """
+    Computes the critical path of the tree rooted in root
+    """
+    return CriticalPath(root)
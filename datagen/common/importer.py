@@ -9,7 +9,7 @@ import json
 from json import JSONDecoder
 from typing import List, Type
 
-from datagen.common.utility import get_abs_file_path
+from datagen.common.utility import get_abs_file_path, bom_artifact_file
 
 from datagen.mono.productgenerator import Product
 
@@ -48,10 +48,13 @@ class SProductDecoder(JSONDecoder):
     Helper class used to deserialize the entries in the products.json file
     """
 
-    def decode(self) -> List[SProduct]:
+    def decode(self, bom) -> List[SProduct]:
+        """
+        Reads the products generated for a BOM
+        """
         decoded_products = []
 
-        with open(get_abs_file_path("boms/products.json")) as f:
+        with open(get_abs_file_path(f"boms/{bom_artifact_file(bom.output_file, 'products')}")) as f:
             products_list = json.load(f)
 
             for crt_prod in products_list:
@@ -63,8 +66,10 @@ class SProductDecoder(JSONDecoder):
 
 
 if __name__ == "__main__":
+    from datagen.mono.boms_processing import BomDecoder
+
     decoder = SProductDecoder()
-    products = decoder.decode()
+    products = decoder.decode(BomDecoder.build("config/datagen.json")[0])
 
     for p in products:
         print(p.pname)
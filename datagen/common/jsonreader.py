@@ -0,0 +1,131 @@
+"""
+Module holding the JSON reader of the BOM trees. The documents are parsed with the json module, whose decoder is
+recursive and fails for the trees deeper than the recursion limit (every level of the tree is an object nested in the
+"children" list of its parent). Such documents are parsed again with an iterative parser, which keeps the open objects
+and lists on an explicit stack, so a tree of any depth is read. The iterative parser uses the string and number scanners
+of the json module and builds exactly the same values as json.loads.
+"""
+
+import json
+import re
+
+from json.decoder import JSONDecodeError, scanstring
+from json.scanner import NUMBER_RE
+from typing import Any, List, TextIO
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# the literals of the json module, with their values
+CONSTANTS = {"null": None, "true": True, "false": False,
+             "NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf")}
+
+# the states of the iterative parser: a value is expected, a key is expected or a value was just read
+VALUE, KEY, AFTER = range(3)
+
+
+def _scalar(s: str, index: int) -> Any:
+    """
+    Reads the string, number or literal starting at index
+    :return: (the value, the index after it)
+    """
+    if s.startswith('"', index):
+        return scanstring(s, index + 1)
+
+    for literal, value in CONSTANTS.items():
+        if s.startswith(literal, index):
+            return value, index + len(literal)
+
+    match = NUMBER_RE.match(s, index)
+    if match is None:
+        raise JSONDecodeError("Expecting value", s, index)
+
+    integer, fraction, exponent = match.groups()
+    if fraction or exponent:
+        return float(integer + (fraction or "") + (exponent or "")), match.end()
+    return int(integer), match.end()
+
+
+def _loads_iterative(s: str) -> Any:
+    """
+    Parses a JSON document without recursion
+    """
+    # the open objects and lists, each with the key of the value expected next (for the objects)
+    stack: List[List[Any]] = []
+    root = None
+
+    def attach(value: Any) -> None:
+        nonlocal root
+        if not stack:
+            root = value
+        elif isinstance(stack[-1][0], dict):
+            stack[-1][0][stack[-1][1]] = value
+        else:
+            stack[-1][0].append(value)
+
+    state = VALUE
+    index = WHITESPACE.match(s, 0).end()
+    while True:
+        if state == VALUE:
+            if s.startswith(("{", "["), index):
+                container = {} if s[index] == "{" else []
+                close = "}" if s[index] == "{" else "]"
+                attach(container)
+                stack.append([container, None])
+                index = WHITESPACE.match(s, index + 1).end()
+                if s.startswith(close, index):
+                    stack.pop()
+                    index += 1
+                    state = AFTER
+                else:
+                    state = KEY if close == "}" else VALUE
+                continue
+
+            value, index = _scalar(s, index)
+            attach(value)
+            state = AFTER
+
+        elif state == KEY:
+            if not s.startswith('"', index):
+                raise JSONDecodeError("Expecting property name enclosed in double quotes", s, index)
+            stack[-1][1], index = scanstring(s, index + 1)
+            index = WHITESPACE.match(s, index).end()
+            if not s.startswith(":", index):
+                raise JSONDecodeError("Expecting ':' delimiter", s, index)
+            index = WHITESPACE.match(s, index + 1).end()
+            state = VALUE
+            continue
+
+        index = WHITESPACE.match(s, index).end()
+        if not stack:
+            break
+
+        is_object = isinstance(stack[-1][0], dict)
+        if s.startswith(",", index):
+            index = WHITESPACE.match(s, index + 1).end()
+            state = KEY if is_object else VALUE
+        elif s.startswith("}" if is_object else "]", index):
+            stack.pop()
+            index += 1
+        else:
+            raise JSONDecodeError("Expecting ',' delimiter", s, index)
+
+    if index != len(s):
+        raise JSONDecodeError("Extra data", s, index)
+    return root
+
+
+def loads(s: str) -> Any:
+    """
+    Parses a JSON document of any depth
+    """
+    try:
+        return json.loads(s)
+    except RecursionError:
+        return _loads_iterative(s)
+
+
+def load(f: TextIO) -> Any:
+    """
+    Reads a JSON document of any depth from a file
+    """
+    return loads(f.read())
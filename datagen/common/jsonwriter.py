@@ -0,0 +1,95 @@
+"""
+Module holding the streaming JSON serializer of the BOM trees. The tree is written to the file depth-first, node by
+node, instead of being turned into one nested dictionary and one string with anytree's JsonExporter. Only the iterators
+over the children of the nodes on the current path are kept in memory, so the memory used is bounded by the depth of
+the tree, and the walk is iterative, so it works for any depth of the tree.
+
+The output is exactly the one of JsonExporter(indent=2, sort_keys=False): the same keys, in the same order, the children
+of a node in a "children" list added after its attributes and the same indentation.
+"""
+
+import json
+
+from typing import Any, List, TextIO
+
+# the number of spaces used for every level of indentation
+INDENT = 2
+
+# the attributes of an anytree node which are not exported (the links to the parent and to the children)
+HIDDEN_ATTRIBUTES = ("_NodeMixin__children", "_NodeMixin__parent")
+
+
+def _encode(value: Any, level: int) -> str:
+    """
+    Encodes an attribute value as it appears at the specified level of indentation of the document
+    """
+    # the strings are escaped by the encoder, so the only line breaks are the ones of the indentation
+    return json.dumps(value, indent=INDENT).replace("\n", "\n" + " " * (INDENT * level))
+
+
+def _open_node(node: Any, level: int, f: TextIO) -> bool:
+    """
+    Writes the attributes of a node whose opening brace is at the specified level of indentation. If the node has
+    children, the "children" list is opened and left open
+
+    :return: True if the children list of the node was opened, False if the node was written completely
+    """
+    attributes = [(key, value) for key, value in node.__dict__.items() if key not in HIDDEN_ATTRIBUTES]
+    has_children = len(node.children) > 0
+
+    if not attributes and not has_children:
+        f.write("{}")
+        return False
+
+    indent = "\n" + " " * (INDENT * (level + 1))
+    entries = [f"{indent}{json.dumps(key)}: {_encode(value, level + 1)}" for key, value in attributes]
+    if has_children:
+        entries.append(f'{indent}"children": [')
+
+    f.write("{" + ",".join(entries))
+    if not has_children:
+        f.write("\n" + " " * (INDENT * level) + "}")
+
+    return has_children
+
+
+def write_tree(root: Any, f: TextIO) -> None:
+    """
+    Writes a tree in JSON format, depth-first
+
+    :param root: the root node of the tree
+    :param f: the text stream the JSON document is written to
+    """
+    # for every node on the current path: its level of indentation, the iterator over its remaining children and the
+    # number of children already written
+    path: List[List[Any]] = []
+
+    if _open_node(root, 0, f):
+        path.append([0, iter(root.children), 0])
+
+    while path:
+        level, children, written = path[-1]
+        child = next(children, None)
+
+        if child is None:
+            # all the children were written, so the children list and the node itself are closed
+            f.write("\n" + " " * (INDENT * (level + 1)) + "]\n" + " " * (INDENT * level) + "}")
+            path.pop()
+            continue
+
+        f.write(("," if written else "") + "\n" + " " * (INDENT * (level + 2)))
+        path[-1][2] += 1
+
+        if _open_node(child, level + 2, f):
+            path.append([level + 2, iter(child.children), 0])
+
+
+def save_tree(root: Any, file_path: str) -> None:
+    """
+    Writes a tree in JSON format to a file, depth-first
+
+    :param root: the root node of the tree
+    :param file_path: the path of the JSON file
+    """
+    with open(file_path, "w") as f:
+        write_tree(root, f)
@@ -0,0 +1,195 @@
+"""
+Module holding the maintenance calendar engine shared by the mono and multi generators. The maintenance intervals of the
+production horizon and the interval-by-machine grid are built with numpy datetime64 arithmetic, the maintenance
+probability is applied to the whole grid as one Bernoulli mask and the maintenance windows of the selected cells are
+drawn together. The dates are kept as datetime64 values and formatted with datemask() only when they are exported.
+"""
+
+from datetime import datetime
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from datagen.common.scampdate import datemask
+
+MICROSECONDS_PER_HOUR = 60 * 60 * 1000 * 1000
+
+
+def parse_date(value: str) -> np.datetime64:
+    """
+    Parses a date written with the global date mask
+    """
+    return np.datetime64(datetime.strptime(value, datemask()), "us")
+
+
+def format_date(value: np.datetime64) -> str:
+    """
+    Formats a datetime64 value with the global date mask
+    """
+    return value.astype(datetime).strftime(datemask())
+
+
+def hours_to_timedelta(hours) -> np.ndarray:
+    """
+    Converts one or more (possibly fractional) numbers of hours to timedelta64 values, rounded to microseconds
+    """
+    return np.round(np.asarray(hours, dtype=np.float64) * MICROSECONDS_PER_HOUR).astype("timedelta64[us]")
+
+
+def interval_grid(start_date: np.datetime64, end_date: np.datetime64,
+                  interval_hours: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits the production horizon into consecutive maintenance intervals of interval_hours each. Only the intervals
+    which end before the end of the horizon are kept
+
+    :return: the start dates and the end dates of the intervals
+    """
+    interval = hours_to_timedelta(interval_hours)
+    occurrences = int((end_date - start_date) / interval)
+
+    offsets = np.arange(occurrences + 1) * interval
+    starts, ends = start_date + offsets[:-1], start_date + offsets[1:]
+
+    inside = ends <= end_date
+    return starts[inside], ends[inside]
+
+
+class InfeasibleMaintenanceError(ValueError):
+    """
+    Raised when no maintenance window fits inside a maintenance interval
+    """
+    pass
+
+
+class MaintenanceWindows:
+    """
+    Draws the maintenance windows inside the maintenance intervals. The start of a window is a whole number of hours,
+    between 1 and the number of duration steps in the interval, after the start of its interval. The duration is
+    chosen among the distinct values of min duration, max duration and min duration plus a random number of steps.
+    The window must end before the end of its interval.
+
+    Instead of drawing pairs until one fits, the feasible (start, duration) pairs of an interval are counted
+    analytically, every pair being weighted with the probability of its duration, and one uniform draw selects the
+    pair of a maintenance. The windows have the same distribution as the ones of the former rejection sampling.
+    """
+
+    def __init__(self, interval_hours: float, min_hours: float, max_hours: float, step_hours: float):
+        """
+        :param interval_hours: the length of the maintenance intervals
+        :param min_hours: the min duration of a maintenance
+        :param max_hours: the max duration of a maintenance
+        :param step_hours: the step of the maintenance durations
+        :raise InfeasibleMaintenanceError: if no maintenance window fits inside a maintenance interval
+        """
+        if not step_hours > 0 or not interval_hours > 0:
+            raise InfeasibleMaintenanceError(f"The maintenance step ({step_hours} hours) and the maintenance interval "
+                                             f"({interval_hours} hours) must be positive")
+        if min_hours > max_hours:
+            raise InfeasibleMaintenanceError(f"The min duration of a maintenance ({min_hours} hours) is greater than "
+                                             f"its max duration ({max_hours} hours)")
+
+        # number of steps in the interval [start_interval, end_interval], i.e. the latest start hour of a window
+        self.steps_number = int(interval_hours // step_hours)
+
+        self.durations, self.weights = self._duration_weights(int(hours_to_timedelta(min_hours).astype(np.int64)),
+                                                              int(hours_to_timedelta(max_hours).astype(np.int64)),
+                                                              int(hours_to_timedelta(step_hours).astype(np.int64)))
+
+        if not self._pairs_mass(np.array([hours_to_timedelta(interval_hours)]))[:, -1].all():
+            raise InfeasibleMaintenanceError(f"No maintenance of {min_hours} to {max_hours} hours, starting after a "
+                                             f"whole number of hours (1 to {self.steps_number}), fits inside a "
+                                             f"maintenance interval of {interval_hours} hours")
+
+    @staticmethod
+    def _duration_weights(min_duration: int, max_duration: int, step: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the possible durations of a maintenance (in microseconds) and their probabilities. For every number
+        of steps k (1 to the number of steps between min and max, all equally likely), the duration is chosen
+        uniformly among the distinct values of min, max and min + k * step. When max - min is shorter than a step,
+        the duration is chosen among min and max
+        """
+        steps_in_maintenance = (max_duration - min_duration) // step
+        if steps_in_maintenance == 0:
+            durations = np.unique([min_duration, max_duration])
+            return durations.astype("timedelta64[us]"), np.full(len(durations), 1 / len(durations))
+
+        stepped = min_duration + np.arange(1, steps_in_maintenance + 1, dtype=np.int64) * step
+
+        # the number of steps which reach exactly the max duration, if any, gives only two distinct values
+        reaching_max = int(np.count_nonzero(stepped == max_duration))
+        stepped = stepped[stepped != max_duration]
+
+        bound_weight = (len(stepped) / 3 + reaching_max / 2) / steps_in_maintenance
+        durations = np.concatenate(([min_duration, max_duration], stepped))
+        weights = np.concatenate(([bound_weight, bound_weight], np.full(len(stepped), 1 / (3 * steps_in_maintenance))))
+
+        return durations.astype("timedelta64[us]"), weights
+
+    def _feasible_starts(self, lengths: np.ndarray) -> np.ndarray:
+        """
+        Counts, for every interval length and every duration, the start hours (1 to steps_number) of the windows which
+        end before the end of the interval
+        """
+        hour = np.int64(MICROSECONDS_PER_HOUR)
+        durations = self.durations.astype(np.int64)[None, :]
+        lengths = lengths.astype("timedelta64[us]").astype(np.int64)[:, None]
+
+        latest = np.minimum(self.steps_number, (lengths - durations - 1) // hour)
+        return np.where(durations > 0, np.maximum(latest, 0), 0)
+
+    def _pairs_mass(self, lengths: np.ndarray) -> np.ndarray:
+        """
+        Computes, for every interval length, the cumulative probability mass of the feasible pairs, duration by duration
+        """
+        return np.cumsum(self._feasible_starts(lengths) * self.weights[None, :], axis=1)
+
+    def draw(self, interval_starts: np.ndarray, interval_ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Draws a maintenance window inside every given interval, with one uniform draw per window
+
+        :return: the start dates and the end dates of the windows
+        """
+        # the intervals of a grid have the same length, so the feasible pairs are counted once per distinct length
+        lengths, length_index = np.unique(interval_ends - interval_starts, return_inverse=True)
+        length_index = length_index.reshape(-1)
+
+        starts_count = self._feasible_starts(lengths)[length_index]
+        mass = self._pairs_mass(lengths)[length_index]
+
+        if len(mass) and not mass[:, -1].all():
+            raise InfeasibleMaintenanceError("No maintenance window fits inside a maintenance interval")
+
+        # the draw selects a duration (by the cumulative mass) and then a start hour inside the mass of the duration
+        draws = np.random.random(len(mass)) * (mass[:, -1] if len(mass) else 0)
+        chosen = np.minimum((mass <= draws[:, None]).sum(axis=1), len(self.durations) - 1)
+
+        rows = np.arange(len(mass))
+        before = np.where(chosen > 0, mass[rows, chosen - 1], 0)
+        offsets = np.minimum((draws - before) // self.weights[chosen], starts_count[rows, chosen] - 1) + 1
+
+        starts = interval_starts + hours_to_timedelta(offsets)
+        return starts, starts + self.durations[chosen]
+
+
+def draw_maintenances(intervals: Tuple[np.ndarray, np.ndarray], machine_ids: Sequence[int], probability: float,
+                      windows: MaintenanceWindows) -> List[Tuple[int, np.datetime64, np.datetime64]]:
+    """
+    Decides, for every (maintenance interval, machine) cell of the grid, if the machine has a maintenance in the
+    interval, then draws the maintenance windows of the selected cells
+
+    :param intervals: the start dates and the end dates of the maintenance intervals
+    :param machine_ids: the ids of the machines
+    :param probability: the probability of a maintenance in a cell
+    :param windows: the sampler of the maintenance windows
+    :return: the machine id, the start date and the end date of every maintenance, ordered by interval and then by the
+        position of the machine in machine_ids
+    """
+    interval_starts, interval_ends = intervals
+    machine_ids = np.asarray(machine_ids, dtype=np.int64)
+
+    selected = np.random.random((len(interval_starts), len(machine_ids))) < probability
+    rows, columns = np.nonzero(selected)
+
+    starts, ends = windows.draw(interval_starts[rows], interval_ends[rows])
+
+    return list(zip(machine_ids[columns].tolist(), starts, ends))
@@ -7,6 +7,8 @@ the support for basic serialization and other management operations on the list
 
 from json import JSONEncoder
 
+from datagen.common.context import ContextAttribute
+
 import datagen.multi.maintenance
 
 
@@ -15,12 +17,14 @@ class Maintenances(object):
     Holds the Maintenance objects generated during the product creation phase
     """
 
-    maintenances_list = set()
+    # the maintenances are kept in the active generation context, in a sorted schedule per machine (MaintenanceStore)
+    maintenances_list = ContextAttribute("maintenances")
 
     @classmethod
     def add(cls, maintenance: datagen.multi.maintenance.Maintenance) -> None:
         """
-        add a Maintenance object to the list of maintenances
+        add a Maintenance object to the schedule of its machine. A maintenance with the same machine and dates as an
+        existing one is ignored
         :param maintenance:
         :return:
         """
@@ -36,13 +40,26 @@ class Maintenances(object):
 
     @classmethod
     def get_maintenances(cls) -> list:
-        return list(set(cls.maintenances_list))
+        return list(cls.maintenances_list)
+
+    @classmethod
+    def get_machine_maintenances(cls, machine_id: int) -> list:
+        """
+        returns the maintenances of a machine, sorted by start date
+        """
+        return cls.maintenances_list.machine_maintenances(machine_id)
+
+    @classmethod
+    def has_conflict(cls, machine_id: int, start_date, end_date) -> bool:
+        """
+        checks if a machine has a maintenance overlapping the period [start_date, end_date)
+        """
+        return cls.maintenances_list.has_conflict(machine_id, start_date, end_date)
 
     @classmethod
     def to_json(cls):
-        maintenance_list = list(cls.maintenances_list)
-        maintenance_list.sort(key=lambda M: (M.machineid, M.start_date))
-        return [maintenance.to_json() for maintenance in maintenance_list]
+        # the store is already sorted by machine id and start date, so the maintenances are streamed in order
+        return [maintenance.to_json() for maintenance in cls.maintenances_list]
 
 
 class MaintenancesEncoder(JSONEncoder):
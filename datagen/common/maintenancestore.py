@@ -0,0 +1,134 @@
+"""
+Module holding the store of the maintenances generated for a BOM. The maintenances are kept per machine, in a schedule
+sorted by start date (and end date), so a maintenance is inserted with a binary search, the maintenances overlapping a
+period are found without scanning the whole schedule and the sorted output is streamed machine by machine, without
+sorting all the maintenances again.
+
+The store is agnostic of the maintenance class: it only needs the machineid, start_date and end_date attributes. The
+numpy dates of the generated maintenances are compared as Python values, which are much faster to compare.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+def _comparable(value: Any) -> Any:
+    """
+    Converts a numpy scalar (e.g. a datetime64 date) to the equivalent Python value
+    """
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class MachineSchedule:
+    """
+    The maintenances of a single machine, sorted by (start date, end date)
+    """
+
+    def __init__(self):
+        # the (start date, end date) keys of the maintenances and the maintenances themselves, in the same order
+        self.keys: List[Tuple[Any, Any]] = []
+        self.maintenances: List[Any] = []
+
+        # the longest maintenance of the schedule, which bounds the search of the overlapping maintenances
+        self.max_duration: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return len(self.maintenances)
+
+    def add(self, maintenance: Any) -> bool:
+        """
+        Inserts a maintenance at its position in the schedule. A maintenance with the same dates as an existing one is
+        not inserted again
+
+        :return: True if the maintenance was inserted, False if it was already in the schedule
+        """
+        key = (_comparable(maintenance.start_date), _comparable(maintenance.end_date))
+        position = bisect_left(self.keys, key)
+
+        if position < len(self.keys) and self.keys[position] == key:
+            return False
+
+        self.keys.insert(position, key)
+        self.maintenances.insert(position, maintenance)
+
+        duration = key[1] - key[0]
+        if self.max_duration is None or duration > self.max_duration:
+            self.max_duration = duration
+
+        return True
+
+    def overlapping(self, start_date: Any, end_date: Any) -> List[Any]:
+        """
+        Returns the maintenances which overlap the period [start_date, end_date), in the order of the schedule. Only
+        the maintenances starting after start_date - max_duration and before end_date are checked
+        """
+        if not self.maintenances:
+            return []
+
+        start_date, end_date = _comparable(start_date), _comparable(end_date)
+
+        first = bisect_right(self.keys, (start_date - self.max_duration,))
+        last = bisect_left(self.keys, (end_date,))
+
+        return [maintenance for key, maintenance in zip(self.keys[first:last], self.maintenances[first:last])
+                if key[1] > start_date]
+
+
+class MaintenanceStore:
+    """
+    The maintenances of all the machines, kept in a schedule per machine
+    """
+
+    def __init__(self):
+        self.schedules: Dict[int, MachineSchedule] = {}
+        self.size: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Streams the maintenances sorted by machine id, then by start date and end date
+        """
+        for machine_id in sorted(self.schedules):
+            yield from self.schedules[machine_id].maintenances
+
+    def add(self, maintenance: Any) -> bool:
+        """
+        Adds a maintenance to the schedule of its machine
+
+        :return: True if the maintenance was added, False if the machine already has a maintenance with the same dates
+        """
+        schedule = self.schedules.get(maintenance.machineid)
+        if schedule is None:
+            schedule = self.schedules[maintenance.machineid] = MachineSchedule()
+
+        added = schedule.add(maintenance)
+        self.size += added
+        return added
+
+    def clear(self) -> None:
+        self.schedules.clear()
+        self.size = 0
+
+    def machine_maintenances(self, machine_id: int) -> List[Any]:
+        """
+        Returns the maintenances of a machine, sorted by start date and end date
+        """
+        schedule = self.schedules.get(machine_id)
+        return list(schedule.maintenances) if schedule is not None else []
+
+    def overlapping(self, machine_id: int, start_date: Any, end_date: Any) -> List[Any]:
+        """
+        Returns the maintenances of a machine which overlap the period [start_date, end_date)
+        """
+        schedule = self.schedules.get(machine_id)
+        return schedule.overlapping(start_date, end_date) if schedule is not None else []
+
+    def has_conflict(self, machine_id: int, start_date: Any, end_date: Any) -> bool:
+        """
+        Checks if a machine has a maintenance overlapping the period [start_date, end_date)
+        """
+        return len(self.overlapping(machine_id, start_date, end_date)) > 0
@@ -0,0 +1,132 @@
+"""
+Module holding the sampler used to pick the products of the BOM nodes. A product cannot be used twice on the same
+root-to-leaf path, nor by two children of the same node, so the sampler keeps the excluded products apart and draws
+directly from the allowed ones, instead of picking at random until an allowed product comes out.
+"""
+
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class InsufficientProductsError(Exception):
+    """
+    Raised when no product is left to be used for a node, i.e. all of them are already used on the node's path or by
+    its siblings
+    """
+    pass
+
+
+def product_key(product: Any) -> int:
+    """
+    Returns the id of a product, for both the mono (productid) and the multi (pid) products
+    """
+    return getattr(product, "pid", getattr(product, "productid", None))
+
+
+class PathSampler:
+    """
+    Draws products uniformly among the ones which are not excluded. The products are kept in a permutation whose
+    prefix holds the allowed products, so excluding, including back and drawing a product are all O(1) operations.
+
+    A product is excluded by its id. The exclusions are counted, so a product excluded twice becomes available again
+    only after it is included back twice.
+    """
+
+    def __init__(self, products: Sequence, key: Callable[[Any], int] = product_key, rng=random):
+        """
+        :param products: the pool of products from which the nodes are populated
+        :param key: the function which returns the id of a product
+        :param rng: the random generator used for the draws (the random module or a random.Random instance)
+        """
+        self.products = products
+        self.rng = rng
+
+        # the indices of the allowed products are kept in order[:allowed], the excluded ones after them
+        self.order: List[int] = list(range(len(products)))
+        self.position: List[int] = list(range(len(products)))
+        self.allowed = len(products)
+
+        self.indices_of_key: Dict[int, List[int]] = {}
+        for index, product in enumerate(products):
+            self.indices_of_key.setdefault(key(product), []).append(index)
+
+        self.excluded: Dict[int, int] = {}
+
+        # the node of the tree whose path is currently excluded, -1 if none
+        self.node = -1
+
+    def __len__(self) -> int:
+        return self.allowed
+
+    def _swap(self, first: int, second: int) -> None:
+        """
+        Swaps two positions of the permutation
+        """
+        order, position = self.order, self.position
+        order[first], order[second] = order[second], order[first]
+        position[order[first]] = first
+        position[order[second]] = second
+
+    def exclude(self, key: int) -> None:
+        """
+        Excludes the product(s) with the specified id from the draws
+        """
+        count = self.excluded.get(key, 0)
+        self.excluded[key] = count + 1
+        if count == 0:
+            for index in self.indices_of_key.get(key, ()):
+                self.allowed -= 1
+                self._swap(self.position[index], self.allowed)
+
+    def include(self, key: int) -> None:
+        """
+        Takes back the exclusion of the product(s) with the specified id
+        """
+        count = self.excluded[key] - 1
+        if count > 0:
+            self.excluded[key] = count
+            return
+
+        del self.excluded[key]
+        for index in self.indices_of_key.get(key, ()):
+            self._swap(self.position[index], self.allowed)
+            self.allowed += 1
+
+    def follow(self, tree, node: int) -> None:
+        """
+        Moves the path exclusion to the path from the root to the specified node of the tree. Only the nodes below
+        the lowest common ancestor of the previous node and the new one are included back or excluded
+
+        :param tree: the BomArrays tree in which the nodes are created
+        :param node: the index of the node whose path products have to be excluded
+        """
+        target, current = node, self.node
+        entering: List[int] = []
+        while current != node:
+            if current >= 0 and (node < 0 or tree.depth[current] >= tree.depth[node]):
+                self.include(int(tree.productid[current]))
+                current = tree.parent[current]
+            else:
+                entering.append(node)
+                node = tree.parent[node]
+
+        for crt_node in reversed(entering):
+            self.exclude(int(tree.productid[crt_node]))
+
+        self.node = target
+
+    def draw(self, node: Optional[int] = None) -> Any:
+        """
+        Draws one of the allowed products
+
+        :param node: the operation id of the node for which the product is drawn, used in the error message
+        :return: the chosen product
+        """
+        if self.allowed == 0:
+            where = f" for the children of the operation {node}" if node is not None else ""
+            raise InsufficientProductsError(
+                f"No product is left to be chosen{where}: all the {len(self.products)} products are already used on "
+                f"the path or by the siblings. Increase the number of products or reduce the depth/children of the "
+                f"BOM.")
+
+        return self.products[self.order[self.rng.randrange(self.allowed)]]
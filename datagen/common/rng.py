@@ -0,0 +1,59 @@
+"""
+Module holding the derivation of the random streams used by the generators. Every entry of a configuration file (a
+BOM, a multi BOM, a fixed/bounded BOM or a perturbation) gets its own numpy SeedSequence, built from the seed of the
+entry and from its position in the file. The trees and the variants of an entry get child sequences spawned from it, so
+the output does not depend on the order in which the entries, trees or variants are generated.
+
+The generators draw from the random module and from the numpy global generator, so a sequence is used by seeding both
+of them before the entry, tree or variant is generated.
+"""
+
+import logging
+import random
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+log = logging.getLogger("main")
+
+
+def entry_sequences(seeds: Sequence[Optional[int]]) -> List[np.random.SeedSequence]:
+    """
+    Builds the seed sequences of the entries of a configuration file. The sequence of the entry i is the i-th child of
+    a root sequence built from the seed of the entry, so two entries with the same seed still get different streams.
+    The entries without a seed share the entropy of a fresh root sequence, which is logged so the run can be reproduced
+
+    :param seeds: the seed of every entry, None if the entry has no seed
+    :return: the seed sequence of every entry
+    """
+    run_entropy = None
+    sequences = []
+
+    for index, seed in enumerate(seeds):
+        if seed is None:
+            if run_entropy is None:
+                run_entropy = np.random.SeedSequence().entropy
+                log.info(f"No seed is configured, the entropy of the run is {run_entropy}")
+            seed = run_entropy
+
+        # the same sequence as np.random.SeedSequence(seed).spawn(index + 1)[index]
+        sequences.append(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+    return sequences
+
+
+def seed_generators(sequence: np.random.SeedSequence) -> None:
+    """
+    Seeds the random module and the numpy global generator from a seed sequence
+    """
+    state = sequence.generate_state(4)
+    random.seed(int.from_bytes(state.tobytes(), "little"))
+    np.random.seed(state)
+
+
+def random_generator(sequence: np.random.SeedSequence) -> random.Random:
+    """
+    Builds a random.Random instance seeded from a seed sequence
+    """
+    return random.Random(int.from_bytes(sequence.generate_state(4).tobytes(), "little"))
@@ -8,6 +8,7 @@ duplicated
 
 from datagen.common.importer import SProduct
 from anytree import Node
+from datagen.common.context import ContextAttribute, current_context
 
 
 class RootProduct:
@@ -19,7 +20,7 @@ class RootProduct:
     """
 
     instance: type['RootProduct'] = None
-    product: SProduct = None
+    product: SProduct = ContextAttribute("root_product")
 
     def __new__(cls, *args, **kwargs):
         if cls.instance is None:
@@ -30,7 +31,7 @@ class RootProduct:
         """
         Adds a root product which will be used at every product generation
         """
-        cls.product = p
+        current_context().root_product = p
 
     @classmethod
     def reset(cls):
@@ -38,7 +39,7 @@ class RootProduct:
         Resets the existent root product to be used for another BOM
         """
 
-        cls.product = None
+        current_context().root_product = None
 
 
 class RootNode:
@@ -49,7 +50,7 @@ class RootNode:
     """
 
     instance = None
-    node = None
+    node: Node = ContextAttribute("root_node")
 
     def __new__(cls):
         if cls.instance is None:
@@ -60,13 +61,13 @@ class RootNode:
         """
         Adds a root product which will be used at every product build
         """
-        cls.node = n
+        current_context().root_node = n
 
     @classmethod
     def reset(cls):
         """
         Resets the existent root product to be used for another BOM
         """
-        cls.node = None
+        current_context().root_node = None
 
 
@@ -4,6 +4,8 @@ Module responsible for generating the unique ids for the data generator
 @author: Adrian
 """
 
+from datagen.common.context import ContextAttribute, current_context
+
 
 class Sequencer(object):
     """
@@ -12,8 +14,8 @@ class Sequencer(object):
     @author Adrian
     """
 
-    # this will hold the current sequence
-    index = 0
+    # this will hold the current sequence, kept in the active generation context
+    index = ContextAttribute("sequence")
 
     _instance: object = None
 
@@ -23,12 +25,13 @@ class Sequencer(object):
         return cls._instance
 
     def __init__(self) -> int:
-        self.id = Sequencer.index
-        Sequencer.index += 1
+        context = current_context()
+        self.id = context.sequence
+        context.sequence += 1
 
     def reset(self) -> None:
         """
         Resets the sequencer
         :return: None
         """
-        Sequencer.index = 0
+        current_context().sequence = 0
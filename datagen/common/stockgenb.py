@@ -9,6 +9,7 @@ import string
 from abc import ABC, abstractmethod
 from typing import List
 
+from datagen.common.context import ContextAttribute
 from datagen.multi.randpgen import Product
 from datagen.multi.bom import MultiBom
 
@@ -18,8 +19,8 @@ RAW_MATERIALS_PERCENT = 0.2
 class StockGeneratorBase(ABC):
     # CLASS LEVEL VARIABLES
 
-    # holds all the stocks in the system
-    stocks = list()
+    # holds all the stocks in the system, the same list as Stocks.stocks
+    stocks = ContextAttribute("stocks")
 
     # the Bom object which is related to the raw materials stocks to be generated
     bom = None
@@ -6,6 +6,8 @@ This module contains the elements related to product stocks in the data generato
 
 from typing import Any
 
+from datagen.common.context import ContextAttribute
+
 
 class Acquisition:
     """
@@ -46,8 +48,8 @@ class Stocks:
     Class representing the collection of stocks in the system, together with some manipulation methods
     """
 
-    # holds all the stocks in the system
-    stocks = []
+    # holds all the stocks in the system, kept in the active generation context
+    stocks = ContextAttribute("stocks")
 
     _instance: object = None
 
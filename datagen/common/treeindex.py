@@ -0,0 +1,238 @@
+"""
+Module holding a persistent index of the BOM trees of the datasets, kept in a sqlite database. Every indexed file is
+mapped to the hash of its content, to the structural and the labelled signatures of its tree (see treesignature), to
+its number of nodes and to its depth, so checking if an instance already exists (up to isomorphism) is a single lookup
+instead of parsing the whole datasets directory again.
+
+The index is updated incrementally: a file whose size and modification time did not change is not read, a changed
+file whose content is already indexed (e.g. a copy) is not parsed, and only the new or changed trees are parsed. The
+files which are not BOM trees are indexed without signatures, so they are not parsed again either.
+
+The paths are stored relative to the directory of the database, so the datasets directory can be moved together with
+its index. The index of the datasets directory is updated and queried with:
+    python -m datagen.common.treeindex update [directory ...]
+    python -m datagen.common.treeindex lookup file1.json file2.json ...
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import datagen.common.jsonreader as jsonreader
+from datagen.common.treesignature import DEFAULT_LABEL, bom_files, document_summary, is_bom, load_document
+from datagen.common.utility import get_abs_file_path
+
+log = logging.getLogger("main")
+
+# the default location of the index, in the datasets directory of the repository
+DEFAULT_INDEX_FILE = os.path.join("..", "datasets", ".treeindex.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS trees (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    structural TEXT,
+    labelled TEXT,
+    nodes INTEGER,
+    depth INTEGER
+);
+CREATE INDEX IF NOT EXISTS trees_content_hash ON trees (content_hash);
+CREATE INDEX IF NOT EXISTS trees_structural ON trees (structural);
+CREATE INDEX IF NOT EXISTS trees_labelled ON trees (labelled);
+"""
+
+# the columns of a tree, besides its path and the stat of its file
+TREE_COLUMNS = ("structural", "labelled", "nodes", "depth")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _parse_tree(file_path: str, data: bytes, labelkey: str) -> Tuple[Optional[str], Optional[str], Optional[int],
+                                                                      Optional[int]]:
+    """
+    Parses the content of a file and computes the columns of its tree
+    :return: (structural signature, labelled signature, number of nodes, depth), all None if it is not a BOM tree
+    """
+    try:
+        document = load_document(file_path) if file_path.endswith(".npz") else jsonreader.loads(data.decode("utf-8"))
+    except (ValueError, OSError):
+        document = None
+
+    if not is_bom(document):
+        return None, None, None, None
+    return document_summary(document, labelkey)
+
+
+class TreeIndex:
+    """
+    The sqlite index of the BOM trees found under a directory
+    """
+
+    def __init__(self, index_file: Optional[str] = None, labelkey: str = DEFAULT_LABEL):
+        """
+        :param index_file: the path of the sqlite database; by default, the index of the datasets directory
+        :param labelkey: the label of the labelled signatures (productid or pname)
+        """
+        self.index_file = os.path.abspath(index_file or get_abs_file_path(DEFAULT_INDEX_FILE))
+        self.root = os.path.dirname(self.index_file)
+        self.labelkey = labelkey
+
+        self.connection = sqlite3.connect(self.index_file)
+        self.connection.executescript(SCHEMA)
+
+        # the labelled signatures of an index built with another label are no longer valid
+        row = self.connection.execute("SELECT value FROM settings WHERE key = 'labelkey'").fetchone()
+        if row is not None and row[0] != labelkey:
+            log.info(f"The index {self.index_file} was built with the label {row[0]}, it is built again")
+            self.connection.execute("DELETE FROM trees")
+        self.connection.execute("INSERT OR REPLACE INTO settings VALUES ('labelkey', ?)", (labelkey,))
+        self.connection.commit()
+
+    def __enter__(self) -> 'TreeIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM trees WHERE structural IS NOT NULL").fetchone()[0]
+
+    def _relative(self, file_path: str) -> str:
+        return os.path.relpath(os.path.abspath(file_path), self.root).replace(os.sep, "/")
+
+    def _absolute(self, path: str) -> str:
+        return os.path.normpath(os.path.join(self.root, path))
+
+    def update(self, paths: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Indexes the new and the changed files found under the paths given (the directory of the index by default) and
+        drops the indexed files under them which no longer exist
+
+        :return: the number of files parsed, unchanged, copied from an indexed content and removed
+        """
+        paths = [os.path.abspath(path) for path in (paths or [self.root])]
+        stats = {"parsed": 0, "unchanged": 0, "copied": 0, "removed": 0}
+
+        indexed = {path: (size, mtime_ns) for path, size, mtime_ns in
+                   self.connection.execute("SELECT path, size, mtime_ns FROM trees")}
+        seen = set()
+
+        for file_path in bom_files(paths):
+            if os.path.abspath(file_path) == self.index_file:
+                continue
+            path = self._relative(file_path)
+            seen.add(path)
+
+            stat = os.stat(file_path)
+            if indexed.get(path) == (stat.st_size, stat.st_mtime_ns):
+                stats["unchanged"] += 1
+                continue
+
+            with open(file_path, "rb") as f:
+                data = f.read()
+            digest = content_hash(data)
+
+            # the same content may already be indexed under another path (or under this one, only touched)
+            columns = self.connection.execute(f"SELECT {', '.join(TREE_COLUMNS)} FROM trees WHERE content_hash = ?",
+                                              (digest,)).fetchone()
+            if columns is not None:
+                stats["copied"] += 1
+            else:
+                columns = _parse_tree(file_path, data, self.labelkey)
+                stats["parsed"] += 1
+
+            self.connection.execute("INSERT OR REPLACE INTO trees VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (path, stat.st_size, stat.st_mtime_ns, digest, *columns))
+
+        # the indexed files under the paths updated which were not found again were deleted
+        for path in indexed.keys() - seen:
+            file_path = self._absolute(path)
+            if any(file_path == root or file_path.startswith(root + os.sep) for root in paths):
+                self.connection.execute("DELETE FROM trees WHERE path = ?", (path,))
+                stats["removed"] += 1
+
+        self.connection.commit()
+        return stats
+
+    def summary(self, file_path: str) -> Optional[Tuple[str, str, int, int]]:
+        """
+        Returns the columns of the tree of a file (indexed or not), parsing it only if its content is not indexed
+        :return: (structural signature, labelled signature, number of nodes, depth), None if it is not a BOM tree
+        """
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        columns = self.connection.execute(f"SELECT {', '.join(TREE_COLUMNS)} FROM trees WHERE content_hash = ?",
+                                          (content_hash(data),)).fetchone()
+        if columns is None:
+            columns = _parse_tree(file_path, data, self.labelkey)
+        return None if columns[0] is None else tuple(columns)
+
+    def lookup(self, file_path: str, structural: bool = False) -> List[str]:
+        """
+        Finds the indexed trees isomorphic with the tree of a file
+
+        :param structural: if True, the trees with the same structure are found, otherwise the trees with the same
+        structure and labels
+        :return: the paths of the isomorphic trees (without the file itself), sorted
+        """
+        columns = self.summary(file_path)
+        if columns is None:
+            return []
+
+        column, signature = ("structural", columns[0]) if structural else ("labelled", columns[1])
+        own_path = self._relative(file_path)
+        return [self._absolute(path) for (path,) in
+                self.connection.execute(f"SELECT path FROM trees WHERE {column} = ? ORDER BY path", (signature,))
+                if path != own_path]
+
+    def classes(self, structural: bool = False) -> Dict[str, List[str]]:
+        """
+        Groups the indexed trees by isomorphism
+        :return: the paths of the trees of every signature
+        """
+        column = "structural" if structural else "labelled"
+        classes: Dict[str, List[str]] = {}
+        for signature, path in self.connection.execute(
+                f"SELECT {column}, path FROM trees WHERE {column} IS NOT NULL ORDER BY path"):
+            classes.setdefault(signature, []).append(self._absolute(path))
+        return classes
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Index of the BOM trees of the datasets, up to isomorphism")
+    parser.add_argument("command", choices=["update", "lookup"])
+    parser.add_argument("paths", nargs="*", help="The directories to update (update) or the files to look up (lookup)")
+    parser.add_argument("--index", type=str, help="The sqlite index file (default: datasets/.treeindex.sqlite)")
+    parser.add_argument("--label", choices=["productid", "pname"], default=DEFAULT_LABEL,
+                        help="The label of the labelled signatures (default: productid)")
+    parser.add_argument("--structural", action="store_true", help="Look up the trees with the same structure only")
+    args = parser.parse_intermixed_args(arguments)
+
+    with TreeIndex(args.index, args.label) as index:
+        if args.command == "update":
+            stats = index.update(args.paths or None)
+            print(f"{index.index_file}: {len(index)} trees ({', '.join(f'{n} {k}' for k, n in stats.items())})")
+            return
+
+        for file_path in args.paths:
+            matches = index.lookup(file_path, args.structural)
+            print(f"{file_path}: {len(matches)} isomorphic trees")
+            for match in matches:
+                print(f"    {match}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""
+Module holding the canonical signatures of the BOM trees. The signature of a tree is its AHU (Aho-Hopcroft-Ullman)
+encoding: the digest of every node is computed bottom-up from the label of the node (productid, pname or none, for the
+structure only) and the sorted digests of its children, in a single iterative post-order walk. Two rooted trees are
+isomorphic if and only if their signatures are equal, so the isomorphism of two trees is checked in O(n log n) and the
+trees of a whole dataset are grouped by isomorphism in one pass.
+
+The signature is computed in the same way from an anytree tree being generated and from a JSON document (or a columnar
+.npz file) already written, so the fixed and bounded generators can reject a tree isomorphic with one generated before,
+in the same run or in an existing output directory, before the tree is saved.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import datagen.common.jsonreader as jsonreader
+
+log = logging.getLogger("main")
+
+# the size (in bytes) of the digest of a node
+DIGEST_SIZE = 16
+
+# the default number of times a tree is generated again while it is isomorphic with a tree generated before
+DEFAULT_MAX_ATTEMPTS = 20
+
+# the default label of the nodes (None for a signature of the structure only)
+DEFAULT_LABEL = "productid"
+
+
+class DuplicateTreeError(Exception):
+    """
+    Raised when a generated tree is isomorphic with a tree generated before
+    """
+    pass
+
+
+def _label_bytes(value: Any) -> bytes:
+    """
+    Encodes the label of a node; numpy scalars are encoded as the equivalent Python values, as in the exported JSON
+    """
+    if hasattr(value, "item"):
+        value = value.item()
+    return json.dumps(value).encode("utf-8")
+
+
+def canonical_signature(root: Any, children_of: Callable[[Any], Iterable[Any]],
+                        label_of: Optional[Callable[[Any], Any]]) -> str:
+    """
+    Computes the AHU signature of a rooted tree, with an iterative post-order walk (so any depth is supported)
+
+    :param root: the root of the tree
+    :param children_of: returns the children of a node
+    :param label_of: returns the label of a node, None for a signature of the structure only
+    :return: the signature of the tree, as a hexadecimal string
+    """
+    # the stack holds (node, the digests of its children, the digests of the children of its parent); the digests of
+    # the children are None until the node is entered
+    root_digests: List[bytes] = []
+    stack = [(root, None, root_digests)]
+
+    while stack:
+        node, child_digests, parent_digests = stack.pop()
+
+        if child_digests is None:
+            # the node is left only after all its children were encoded
+            child_digests = []
+            stack.append((node, child_digests, parent_digests))
+            stack.extend((child, None, child_digests) for child in children_of(node))
+            continue
+
+        digest = hashlib.blake2b(_label_bytes(label_of(node)) if label_of else b"", digest_size=DIGEST_SIZE)
+        digest.update(len(child_digests).to_bytes(8, "little"))
+        for child_digest in sorted(child_digests):
+            digest.update(child_digest)
+        parent_digests.append(digest.digest())
+
+    return root_digests[0].hex()
+
+
+def node_signature(root: Any, labelkey: Optional[str] = DEFAULT_LABEL) -> str:
+    """
+    Computes the signature of an anytree tree
+    """
+    label_of = (lambda node: getattr(node, labelkey, None)) if labelkey else None
+    return canonical_signature(root, lambda node: node.children, label_of)
+
+
+def document_signature(document: Dict[str, Any], labelkey: Optional[str] = DEFAULT_LABEL) -> str:
+    """
+    Computes the signature of a tree given as a JSON document (nested dictionaries with a 'children' list)
+    """
+    label_of = (lambda node: node.get(labelkey)) if labelkey else None
+    return canonical_signature(document, lambda node: node.get("children", []), label_of)
+
+
+def document_summary(document: Dict[str, Any], labelkey: Optional[str] = DEFAULT_LABEL) -> Tuple[str, str, int, int]:
+    """
+    Computes, in a single post-order walk of a JSON document, the structural signature of the tree, its signature
+    labelled on labelkey, its number of nodes and its depth (the number of nodes on the longest root-to-leaf path)
+
+    :return: (structural signature, labelled signature, number of nodes, depth)
+    """
+    # as in canonical_signature, but every node keeps the structural and the labelled digests and the height of the
+    # subtrees of its children
+    root_digests: List[Tuple[bytes, bytes, int]] = []
+    stack = [(document, None, root_digests)]
+    nodes = 0
+
+    while stack:
+        node, child_digests, parent_digests = stack.pop()
+
+        if child_digests is None:
+            child_digests = []
+            stack.append((node, child_digests, parent_digests))
+            stack.extend((child, None, child_digests) for child in node.get("children", []))
+            continue
+
+        nodes += 1
+        structural = hashlib.blake2b(b"", digest_size=DIGEST_SIZE)
+        labelled = hashlib.blake2b(_label_bytes(node.get(labelkey)), digest_size=DIGEST_SIZE)
+        for digest in (structural, labelled):
+            digest.update(len(child_digests).to_bytes(8, "little"))
+
+        for child_digest in sorted(digests[0] for digests in child_digests):
+            structural.update(child_digest)
+        for child_digest in sorted(digests[1] for digests in child_digests):
+            labelled.update(child_digest)
+
+        height = 1 + max((digests[2] for digests in child_digests), default=0)
+        parent_digests.append((structural.digest(), labelled.digest(), height))
+
+    structural, labelled, depth = root_digests[0]
+    return structural.hex(), labelled.hex(), nodes, depth
+
+
+def load_document(file_path: str) -> Any:
+    """
+    Reads a BOM from its JSON file or from its columnar .npz file, as a JSON document
+    """
+    if file_path.endswith(".npz"):
+        from datagen.common.columnar import load_npz, tree_document
+        return tree_document(load_npz(file_path))
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        return jsonreader.load(f)
+
+
+def is_bom(document: Any) -> bool:
+    """
+    Checks if a document is a BOM tree (and not e.g. a products, machines or stocks file)
+    """
+    return isinstance(document, dict) and "operationid" in document
+
+
+def bom_files(paths: Iterable[str]) -> List[str]:
+    """
+    Returns the .json and .npz files given or found (recursively) in the directories given, sorted
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, _, file_names in os.walk(path):
+                files.extend(os.path.join(dir_path, name) for name in file_names if name.endswith((".json", ".npz")))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def signature_classes(paths: Iterable[str], labelkey: Optional[str] = DEFAULT_LABEL) -> Dict[str, List[str]]:
+    """
+    Groups the BOMs of the files and directories given by their signatures. The files which cannot be read or are not
+    BOM trees are skipped
+
+    :return: the files of every signature, in the order they were found
+    """
+    classes: Dict[str, List[str]] = {}
+    for file_path in bom_files(paths):
+        try:
+            document = load_document(file_path)
+        except (ValueError, OSError):
+            continue
+        if is_bom(document):
+            classes.setdefault(document_signature(document, labelkey), []).append(file_path)
+    return classes
+
+
+class TreeSignatures:
+    """
+    The signatures of the trees generated for a BOM, used to reject the trees isomorphic with one generated before
+    """
+
+    def __init__(self, labelkey: Optional[str] = DEFAULT_LABEL, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        :param labelkey: the label of the nodes (productid or pname), None for the structure only
+        :param max_attempts: the number of times a tree is generated before it is given up as a duplicate
+        """
+        self.labelkey = labelkey
+        self.max_attempts = max(1, max_attempts)
+        self.signatures = set()
+
+    @classmethod
+    def from_config(cls, unique_trees: Optional[Dict[str, Any]]) -> Optional['TreeSignatures']:
+        """
+        Builds the signatures store from the 'unique_trees' block of a fixed/bounded BOM configuration
+        :return: None if the uniqueness of the trees is disabled
+        """
+        unique_trees = unique_trees or {}
+        if not unique_trees.get("enabled", True):
+            return None
+
+        label = unique_trees.get("label", DEFAULT_LABEL)
+        return cls(None if label == "none" else label, int(unique_trees.get("max_attempts", DEFAULT_MAX_ATTEMPTS)))
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def load(self, directory: str) -> int:
+        """
+        Adds the signatures of the BOMs already written in a directory (and its subdirectories)
+        :return: the number of signatures added
+        """
+        before = len(self.signatures)
+        self.signatures.update(signature_classes([directory], self.labelkey))
+        return len(self.signatures) - before
+
+    def add(self, root: Any) -> str:
+        """
+        Adds the signature of a generated tree
+        :return: the signature of the tree
+        :raises DuplicateTreeError: if the tree is isomorphic with a tree added before
+        """
+        signature = node_signature(root, self.labelkey)
+        if signature in self.signatures:
+            raise DuplicateTreeError(f"The tree is isomorphic with a tree generated before (signature {signature})")
+
+        self.signatures.add(signature)
+        return signature
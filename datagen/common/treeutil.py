@@ -4,6 +4,10 @@ Utility module for tree generation.
 @author Adrian
 """
 
+from typing import Any, Iterator, Tuple
+
+from anytree import ContStyle
+
 
 class Depth:
     depth = 0
@@ -11,3 +15,52 @@ class Depth:
 
 class NodeCounter:
     counter = 0
+
+
+def preorder(root: Any) -> Iterator[Any]:
+    """
+    Iterative equivalent of anytree's PreOrderIter(root), which is recursive and fails for the trees deeper than the
+    recursion limit
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.children))
+
+
+def render_rows(root: Any) -> Iterator[Tuple[str, str, Any]]:
+    """
+    Iterative equivalent of anytree's RenderTree(root) (with the default ContStyle), which is recursive and fails for
+    the trees deeper than the recursion limit
+
+    :return: the (pre, fill, node) rows of the nodes, in pre-order
+    """
+    style = ContStyle()
+    # the nodes to render, each with the fill of its parent and a flag telling if it is the last child (None for root)
+    stack = [(root, "", None)]
+
+    while stack:
+        node, indent, is_last = stack.pop()
+        if is_last is None:
+            pre = fill = ""
+        else:
+            pre = indent + (style.end if is_last else style.cont)
+            fill = indent + (style.empty if is_last else style.vertical)
+        yield pre, fill, node
+
+        children = node.children
+        stack.extend((child, fill, position == len(children) - 1)
+                     for position, child in reversed(list(enumerate(children))))
+
+
+def render_text(root: Any) -> str:
+    """
+    Iterative equivalent of str(RenderTree(root))
+    """
+    lines = []
+    for pre, fill, node in render_rows(root):
+        node_lines = repr(node).splitlines() or [""]
+        lines.append(f"{pre}{node_lines[0]}")
+        lines.extend(f"{fill}{line}" for line in node_lines[1:])
+    return "\n".join(lines)
@@ -22,6 +22,18 @@ def get_abs_file_path(file: str) -> str:
     return config_path
 
 
+def bom_artifact_file(output_file: str, artifact: str) -> str:
+    """
+    Builds the name of a file written together with a BOM (its products, machines or stocks), so that the BOMs of a
+    configuration never write the same file. E.g. for bom_1.json and the products artifact one gets bom_1_products.json
+
+    :param output_file: the output file of the BOM
+    :param artifact: the kind of the content of the file
+    :return: the name of the file
+    """
+    return f"{os.path.splitext(output_file)[0]}_{artifact}.json"
+
+
 def check_and_create_if_not_exists(dir: str) -> None:
     """
     Checks if the directory exists and creates it if it doesn't
@@ -0,0 +1,123 @@
+"""
+Module which runs the BOM entries of a configuration file, one after another or spread across a pool of processes.
+Every entry is generated in its own generation context, with the random generators seeded from the seed sequence of
+the entry, so the output files are the same no matter how many processes are used. A failing entry is reported at the
+end of the batch and does not stop the other ones.
+"""
+
+import logging
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import datagen.common.config as config
+from datagen.common.context import GenerationContext
+from datagen.common.rng import seed_generators
+
+log = logging.getLogger("main")
+
+
+class TaskFailure:
+    """
+    The failure of a BOM entry of the batch
+    """
+
+    def __init__(self, index: int, name: str, error: str):
+        """
+        :param index: the position of the entry in the configuration file
+        :param name: the name of the entry
+        :param error: the formatted traceback of the error
+        """
+        self.index = index
+        self.name = name
+        self.error = error
+
+    def __str__(self) -> str:
+        return f"TaskFailure(index={self.index}, name={self.name})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def current_settings() -> Dict[str, Any]:
+    """
+    Returns the values of the settings in datagen.common.config, which may have been changed from the command line
+    """
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def apply_settings(settings: Dict[str, Any]) -> None:
+    """
+    Sets the values of the settings in datagen.common.config. Used to initialize the worker processes, which do not
+    inherit the changed settings when they are spawned instead of forked
+    """
+    for name, value in settings.items():
+        setattr(config, name, value)
+
+
+def run_task(function: Callable[[Any, GenerationContext], None], entry: Any,
+             sequence: np.random.SeedSequence) -> Optional[str]:
+    """
+    Generates a BOM entry in a new generation context, after seeding the random generators from the seed sequence of
+    the entry
+
+    :param function: the function which generates a BOM entry in a generation context
+    :param entry: the BOM entry
+    :param sequence: the seed sequence of the entry
+    :return: None if the entry was generated, the formatted traceback of the error otherwise
+    """
+    seed_generators(sequence)
+
+    try:
+        function(entry, GenerationContext(sequence))
+    except (Exception, SystemExit):
+        # the generators call sys.exit() for the invalid entries, which must not stop the other entries either
+        return traceback.format_exc()
+
+    return None
+
+
+def run_batch(function: Callable[[Any, GenerationContext], None], entries: Sequence[Any],
+              sequences: Sequence[np.random.SeedSequence], names: Sequence[str],
+              workers: int = 1) -> List[TaskFailure]:
+    """
+    Generates all the BOM entries of a configuration file
+
+    :param function: the function which generates a BOM entry in a generation context. It has to be a module level
+        function, so it can be sent to the worker processes
+    :param entries: the BOM entries
+    :param sequences: the seed sequence of every entry
+    :param names: the name of every entry, used in the failures report
+    :param workers: the number of processes among which the entries are spread. With 1 worker, the entries are
+        generated in the current process
+    :return: the failures of the batch, in the order of the entries
+    """
+    if workers <= 1 or len(entries) <= 1:
+        errors = [run_task(function, entry, sequence) for entry, sequence in zip(entries, sequences)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=apply_settings,
+                                 initargs=(current_settings(),)) as executor:
+            futures = [executor.submit(run_task, function, entry, sequence)
+                       for entry, sequence in zip(entries, sequences)]
+
+            errors = []
+            for future in futures:
+                try:
+                    errors.append(future.result())
+                except Exception:
+                    # the worker process itself died (e.g. it was killed), so the error was not caught in the task
+                    errors.append(traceback.format_exc())
+
+    failures = [TaskFailure(index, name, error)
+                for index, (name, error) in enumerate(zip(names, errors)) if error is not None]
+
+    for failure in failures:
+        log.error(f"The generation of the BOM {failure.name} failed:\n{failure.error}")
+
+    if failures:
+        print(f"{len(failures)} of {len(entries)} BOMs failed: {', '.join(f.name for f in failures)}")
+
+    return failures
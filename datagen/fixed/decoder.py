@@ -25,7 +25,9 @@ class FixedNodesBom:
         shape: str,
         root_directory: str,   # relativ pentru multiboms/<root_directory>
         products_source: str,  # cale catre produses
-        output_root: str       # locul pt salvare rezulate
+        output_root: str,      # locul pt salvare rezulate
+        seed: int | None = None,  # seed-ul din care se deriva fluxurile aleatoare ale arborilor
+        unique_trees: dict | None = None,  # unicitatea arborilor (enabled, label, max_attempts, against)
     ):
         self.products_info = products_info
         self.machines_info = machines_info
@@ -35,6 +37,8 @@ class FixedNodesBom:
         self.root_directory = root_directory
         self.products_source = products_source
         self.output_root = output_root
+        self.seed = seed
+        self.unique_trees = unique_trees or {}
 
 
 class FixedNodesBoms:
@@ -103,6 +107,8 @@ class FixedNodesBomDecoder(JSONDecoder):
             root_directory = b.get("root_directory", "fixed_products")  # relativ pt multiboms
             products_source = b.get("products_source")
             output_root = b.get("output_root", "fixed_output")          # în boms/
+            seed = b.get("seed")                                        # optional
+            unique_trees = b.get("unique_trees", {})                    # optional, implicit activ
 
             if n_nodes is None or k_trees is None:
                 log.error("Missing required keys 'n_nodes' or 'k_trees' in fixed config entry.")
@@ -111,6 +117,10 @@ class FixedNodesBomDecoder(JSONDecoder):
                 log.error("Missing 'products_source' in fixed config entry.")
                 continue
 
+            if unique_trees.get("label", "productid") not in ("productid", "pname", "none"):
+                log.error(f"Invalid unique_trees label: {unique_trees.get('label')} (productid | pname | none).")
+                continue
+
             products_info = [cls._product_info_from_entry(entry, n_nodes) for entry in outputs]
 
             mblock = b.get("machines_info")
@@ -130,6 +140,8 @@ class FixedNodesBomDecoder(JSONDecoder):
                     root_directory=root_directory,
                     products_source=products_source,
                     output_root=output_root,
+                    seed=seed,
+                    unique_trees=unique_trees,
                 )
             )
 
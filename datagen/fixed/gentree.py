@@ -9,9 +9,10 @@ import os
 import math
 import logging
 import random
-from typing import List, Tuple
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
 
-from anytree import AnyNode, RenderTree, PreOrderIter
+from anytree import AnyNode, PreOrderIter
 
 from datagen.multi.gentree import (
     export_tree,
@@ -20,6 +21,7 @@ from datagen.multi.gentree import (
 )
 from datagen.multi.root_dir import RootDir
 from datagen.common.utility import get_abs_file_path, check_and_create_if_not_exists
+from datagen.common.treeutil import render_rows
 
 from datagen.common.sequencer import Sequencer
 from datagen.multi.metainfo import MetaInfo
@@ -42,15 +44,82 @@ def simple_render_tree(root_node, output_file_base: str) -> None:
     print(f"config_path {out_path}")
 
     with open(out_path, "w", encoding="utf-8") as f:
-        for pre, _, node in RenderTree(root_node):
+        for pre, _, node in render_rows(root_node):
             label = getattr(node, "pname", getattr(node, "name", ""))
             f.write(f"{pre}{label}\n")
 
 
 # ---------- Utilitare pentru frontiera ----------
-def _leaves_of(root) -> List:
-    """ Returneaza toate frunzele unei radacini date"""
-    return [n for n in PreOrderIter(root) if len(getattr(n, "children", [])) == 0]
+class _Frontier:
+    """
+    Frontiera arborelui: frunzele, intr-o lista plata (pentru alegeri aleatoare) si grupate pe adancimi (pentru forma
+    deep). Adancimile nevide sunt tinute sortate. Frunzele se adauga si se elimina in O(1), pe masura ce se ataseaza
+    copiii, fara a parcurge arborele. Pentru fiecare frunza se tine si bitsetul (int, bitul pid setat) produselor de pe
+    calea root->frunza, mostenit de la parinte
+    """
+
+    def __init__(self):
+        self.leaves: List = []
+        self.position: Dict[object, int] = {}
+        self.depth: Dict[object, int] = {}
+        self.path_bits: Dict[object, int] = {}
+
+        self.buckets: Dict[int, List] = {}
+        self.bucket_position: Dict[object, int] = {}
+        self.depths: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.leaves)
+
+    @staticmethod
+    def _remove_at(items: List, positions: Dict[object, int], item) -> None:
+        """elimina un element dintr-o lista, mutand ultimul element pe pozitia lui"""
+        i = positions.pop(item)
+        last = items.pop()
+        if last is not item:
+            items[i] = last
+            positions[last] = i
+
+    def add(self, leaf, depth: int, path_bits: int) -> None:
+        self.position[leaf] = len(self.leaves)
+        self.leaves.append(leaf)
+        self.depth[leaf] = depth
+        self.path_bits[leaf] = path_bits
+
+        bucket = self.buckets.get(depth)
+        if bucket is None:
+            bucket = self.buckets[depth] = []
+            insort(self.depths, depth)
+        self.bucket_position[leaf] = len(bucket)
+        bucket.append(leaf)
+
+    def remove(self, leaf) -> None:
+        depth = self.depth.pop(leaf)
+        del self.path_bits[leaf]
+        self._remove_at(self.leaves, self.position, leaf)
+
+        bucket = self.buckets[depth]
+        self._remove_at(bucket, self.bucket_position, leaf)
+        if not bucket:
+            del self.buckets[depth]
+            self.depths.pop(bisect_left(self.depths, depth))
+
+    def choice(self, rng: random.Random):
+        return rng.choice(self.leaves)
+
+    def sample(self, rng: random.Random, k: int) -> List:
+        """k frunze distincte, alese aleator"""
+        return rng.sample(self.leaves, k)
+
+    def deepest(self, rng: random.Random, k: int) -> List:
+        """k frunze, incepand de la adancimea cea mai mare; in cadrul unei adancimi, alese aleator"""
+        picked = []
+        for d in reversed(self.depths):
+            bucket = self.buckets[d]
+            picked.extend(rng.sample(bucket, min(k - len(picked), len(bucket))))
+            if len(picked) >= k:
+                break
+        return picked
 
 
 def _deepest_leaf(leaves: List) -> object:
@@ -76,7 +145,7 @@ def _sample_int_biased_low(rng, lo: int, hi: int, p_single: float = 0.65) -> int
 
 
 def _select_leaves(
-    leaves: List,
+    frontier: _Frontier,
     shape: str,
     remaining: int,
     rng: random.Random,
@@ -92,52 +161,33 @@ def _select_leaves(
     - wide: 70–100% dintre frunze (random în [min_frac_wide, max_frac_wide]), limitat de 'remaining'
     - balanced:  ~jumatate
     """
-    if not leaves or remaining <= 0:
+    if not len(frontier) or remaining <= 0:
         return []
 
     if shape == "deep":
-        # se obtin frunzele ordonate descrescator dupa adancime
-        max_depth = max(l.depth for l in leaves)
-        by_depth = {}
-        for l in leaves:
-            by_depth.setdefault(l.depth, []).append(l)
-        depths = sorted(by_depth.keys(), reverse=True)
-
         # se alege limita L (1..small_max_leaves_deep), bias spre 1 - numarul de frunze care sa aiba copii
-        L_cap = min(small_max_leaves_deep, len(leaves), remaining)
+        L_cap = min(small_max_leaves_deep, len(frontier), remaining)
         L = _sample_int_biased_low(rng, 1, max(1, L_cap), p_single=0.75)
 
         # se aleg cele L frunze incepand de la adancimea cea mai mare
-        picked = []
-        for d in depths:
-            rng.shuffle(by_depth[d])
-            for lf in by_depth[d]:
-                picked.append(lf)
-                if len(picked) >= L:
-                    break
-            if len(picked) >= L:
-                break
-        return picked
+        return frontier.deepest(rng, L)
 
     if shape == "wide":
         # se selecteaza o fractie mare din frunze
         frac = rng.uniform(min_frac_wide, max_frac_wide)
-        L = max(1, int(round(frac * len(leaves))))
-        L = min(L, len(leaves), remaining)  #tinem cont de cate noduri mai avem de generat
-        leaves_cp = list(leaves)
-        rng.shuffle(leaves_cp)
-        return leaves_cp[:L]
+        L = max(1, int(round(frac * len(frontier))))
+        L = min(L, len(frontier), remaining)  #tinem cont de cate noduri mai avem de generat
+        return frontier.sample(rng, L)
 
     # balanced- jumatate din frunze vor avea copii
-    k = max(1, math.ceil(len(leaves) / 2))
-    leaves_cp = list(leaves)
-    rng.shuffle(leaves_cp)
-    return leaves_cp[:min(k, remaining)]
+    k = max(1, math.ceil(len(frontier) / 2))
+    return frontier.sample(rng, min(k, len(frontier), remaining))
 
 
 
 def _allocate_children(
     leaves_sel: List,
+    depths: List[int],
     remaining: int,
     shape: str,
     rng: random.Random,
@@ -181,7 +231,7 @@ def _allocate_children(
     if shape == "wide":
         # sortam index-urile frunzelor descrescator dupa adancime
         idxs = list(range(len(leaves_sel)))
-        idxs.sort(key=lambda i: leaves_sel[i].depth, reverse=True)
+        idxs.sort(key=lambda i: depths[i], reverse=True)
     else:
         idxs = list(range(len(leaves_sel)-1, -1, -1))
 
@@ -206,28 +256,22 @@ def _allocate_children(
 
 
 # ---------- Validare produse ----------
-def _path_pid_set(node) -> set:
-    s = set()
-    crt = node
-    while crt is not None:
-        pid = getattr(crt, "productid", None)
-        if pid is not None:
-            s.add(pid)
-        crt = crt.parent
-    return s
-
-
-def _pick_product_for_leaf(leaf, products) -> object:
-    #Alege un produs random al carui pid NU este în calea pana la radacina
-    used = _path_pid_set(leaf)
-    idxs = list(range(len(products)))
-    random.shuffle(idxs)
-    for i in idxs:
-        p = products[i]
-        pid = getattr(p, "pid", getattr(p, "productid", None))
-        if pid not in used:
+def _pid_bit(pid) -> int:
+    return 1 << pid if pid is not None else 0
+
+
+def _pick_product_for_leaf(used: int, products, tries: int = 32) -> object:
+    """
+    Alege uniform un produs al carui pid NU este în calea pana la radacina (bitsetul 'used'). Se incearca intai
+    extrageri aleatoare; daca produsele de pe cale sunt prea multe, se aleg direct dintre cele eligibile
+    """
+    for _ in range(tries):
+        p = products[random.randrange(len(products))]
+        if not used & _pid_bit(getattr(p, "pid", getattr(p, "productid", None))):
             return p
-    return None
+
+    eligible = [p for p in products if not used & _pid_bit(getattr(p, "pid", getattr(p, "productid", None)))]
+    return random.choice(eligible) if eligible else None
 
 
 def _attach_child(parent, product, qty_min_step_max: Tuple[int, int, int]):
@@ -266,37 +310,52 @@ def create_tree_fixed_nodes(
     if n_total <= 1:
         return
 
+    # frontiera (cu bitseturile cailor) este construita o singura data si actualizata la fiecare atasare
+    frontier = _Frontier()
+    stack = [(root, 0, _pid_bit(getattr(root, "productid", None)))]
+    while stack:
+        node, depth, bits = stack.pop()
+        children = getattr(node, "children", [])
+        if len(children) == 0:
+            frontier.add(node, depth, bits)
+        for child in children:
+            stack.append((child, depth + 1, bits | _pid_bit(getattr(child, "productid", None))))
 
     while count_nodes < n_total:
         remaining = n_total - count_nodes
-        leaves = _leaves_of(root)
 
-        leaves_sel = _select_leaves(leaves, shape, remaining, rng)
+        leaves_sel = _select_leaves(frontier, shape, remaining, rng)
         if not leaves_sel:
-            if leaves:
-                leaves_sel = [rng.choice(leaves)]
+            if len(frontier):
+                leaves_sel = [frontier.choice(rng)]
             else:
                 break
 
-        alloc = _allocate_children(leaves_sel, remaining, shape, rng)
+        depths = [frontier.depth[lf] for lf in leaves_sel]
+        alloc = _allocate_children(leaves_sel, depths, remaining, shape, rng)
         if sum(alloc) == 0:
             break
 
 
         added = 0
-        for lf, c_i in zip(leaves_sel, alloc):
+        for lf, depth, c_i in zip(leaves_sel, depths, alloc):
             if c_i <= 0:
                 continue
+            used = frontier.path_bits[lf]
             for _ in range(c_i):
-                prod = _pick_product_for_leaf(lf, products)
+                prod = _pick_product_for_leaf(used, products)
                 if not prod:
                     # daca nu gasim produs eligibil pe frunza asta, trecem mai departe
                     continue
-                _attach_child(
+                child = _attach_child(
                     lf,
                     prod,
                     (1, 1, 1)  #  copiii pot fi 1, pt radacina din config
                 )
+                if lf in frontier.position:
+                    frontier.remove(lf)
+                frontier.add(child, depth + 1, used | _pid_bit(child.productid))
+
                 count_nodes += 1
                 added += 1
                 if count_nodes >= n_total:
@@ -8,9 +8,11 @@ from datetime import datetime
 from anytree import Node, RenderTree, Resolver
 
 from datagen.common.utility import check_and_create_if_not_exists, get_abs_file_path
+from datagen.common.context import GenerationContext
+from datagen.common.rng import entry_sequences, random_generator, seed_generators
 from datagen.common.sequencer import Sequencer
 from datagen.common.rootprod import RootProduct, RootNode
-from datagen.common.stocks import Stocks
+from datagen.common.treesignature import DuplicateTreeError, TreeSignatures
 
 from datagen.multi.quantity import Quantity
 from datagen.multi.metainfo import MetaInfo
@@ -87,15 +89,59 @@ def _compute_output_dir(fixed_bom) -> str:
     return get_abs_file_path(f"boms/{norm}")
 
 
-def _build_one_tree(fixed_bom, products, output_dir, output_file_base, shape: str, n_nodes: int, idx: int):
-    Sequencer().reset()
-    MetaInfo().reset_machines()
-    MetaInfo().reset_operations()
-    Stocks().reset()
-    ProdMachinesAll.reset()
-    RootProduct.reset()
-    RootNode().reset()
+def _tree_signatures(bom, run_label: str):
+    """
+    Construieste setul de semnaturi pentru unicitatea arborilor unui BOM (None daca unicitatea este dezactivata).
+    Daca 'unique_trees.against' este dat, se incarca si semnaturile BOM-urilor deja generate in acel director
+    """
+    signatures = TreeSignatures.from_config(bom.unique_trees)
+    against = bom.unique_trees.get("against")
+    if signatures is not None and against:
+        against_dir = _resolve_abs_or_rel(against, "boms")
+        loaded = signatures.load(against_dir)
+        log.info(f"[{run_label}] Loaded {loaded} tree signatures from {against_dir}")
+    return signatures
+
+
+def _build_unique_tree(build_tree, tree_sequence, signatures: TreeSignatures = None, run_label: str = "fixed") -> bool:
+    """
+    Construieste un arbore cu build_tree(context, signatures). Cat timp arborele este izomorf cu unul generat inainte,
+    el este regenerat din fluxuri noi, derivate din fluxul arborelui (deci rezultatul ramane reproductibil)
+    :return: False daca nu s-a obtinut un arbore unic dupa numarul maxim de incercari
+    """
+    sequence = tree_sequence
+    attempts = signatures.max_attempts if signatures is not None else 1
+
+    for attempt in range(1, attempts + 1):
+        try:
+            build_tree(GenerationContext(sequence), signatures)
+            return True
+        except DuplicateTreeError as e:
+            log.info(f"[{run_label}] Attempt {attempt}/{attempts}: {e}")
+            sequence = tree_sequence.spawn(1)[0]
+
+    log.warning(f"[{run_label}] No unique tree after {attempts} attempts, the tree is skipped")
+    return False
 
+
+def _build_one_tree(fixed_bom, products, output_dir, output_file_base, shape: str, n_nodes: int, idx: int,
+                    context: GenerationContext = None, signatures: TreeSignatures = None):
+    """
+    Construieste un arbore intr-un context de generare propriu (unul nou daca nu este dat), astfel incat id-urile
+    pornesc de la 0 si nicio stare nu este partajata cu ceilalti arbori. Generatoarele aleatoare sunt initializate
+    din fluxul arborelui, derivat din seed-ul BOM-ului
+    """
+    context = context or GenerationContext()
+    globals_sequence, tree_sequence = context.seed_sequence.spawn(2)
+    seed_generators(globals_sequence)
+
+    with context.activate():
+        _generate_one_tree(fixed_bom, products, output_dir, output_file_base, shape, n_nodes, idx,
+                           random_generator(tree_sequence), signatures)
+
+
+def _generate_one_tree(fixed_bom, products, output_dir, output_file_base, shape: str, n_nodes: int, idx: int,
+                       rng: random.Random, signatures: TreeSignatures = None):
     root_product = random.choice(products)
     if not hasattr(root_product, "operations"):
         root_product.operations = []
@@ -131,9 +177,13 @@ def _build_one_tree(fixed_bom, products, output_dir, output_file_base, shape: st
         products=products,
         n_total=n_nodes,
         shape=shape,
-        rng=random.Random(),
+        rng=rng,
     )
 
+    # arborele izomorf cu unul generat inainte nu este salvat (DuplicateTreeError), ci regenerat de apelant
+    if signatures is not None:
+        signatures.add(root)
+
     out_name = f"{os.path.splitext(output_file_base)[0]}_{idx}.json"
     json_path, tree_path = save_fixed_outputs(root, output_dir, out_name)
 
@@ -171,8 +221,11 @@ def start_fixed(configuration_file_path: str) -> None:
     if not all_boms:
         raise SystemExit("No fixed-nodes BOMs found in configuration.")
 
-    for fixed_bom in all_boms:
+    for fixed_bom, bom_sequence in zip(all_boms, entry_sequences([b.seed for b in all_boms])):
         products = _prepare_products(fixed_bom)
+
+        # fiecare arbore are propriul flux aleator, derivat din fluxul BOM-ului
+        tree_sequences = iter(bom_sequence.spawn(len(fixed_bom.products_info) * fixed_bom.k_trees))
         # directorul baza din config (poate fi absolut, 'boms/...', sau simplu)
         base_output_dir = _compute_output_dir(fixed_bom)
 
@@ -180,19 +233,26 @@ def start_fixed(configuration_file_path: str) -> None:
         run_output_dir = _create_run_folder(base_output_dir)
         log.info(f"[fixed] Run output dir: {run_output_dir}")
 
-        # setul pentru unicitate, resetat pe fiecare rulare a acestui fixed_bom
-        shape_sigs = set()
+        # semnaturile pentru unicitate, resetate pe fiecare rulare a acestui fixed_bom
+        shape_sigs = _tree_signatures(fixed_bom, "fixed")
 
         for prod_info in fixed_bom.products_info:
             base_name = prod_info.output_file
 
             for idx in range(1, fixed_bom.k_trees + 1):
-                _build_one_tree(
-                    fixed_bom=fixed_bom,
-                    products=products,
-                    output_dir=run_output_dir,   
-                    output_file_base=base_name,
-                    shape=fixed_bom.shape,
-                    n_nodes=fixed_bom.n_nodes,
-                    idx=idx,
+                _build_unique_tree(
+                    lambda context, signatures: _build_one_tree(
+                        fixed_bom=fixed_bom,
+                        products=products,
+                        output_dir=run_output_dir,
+                        output_file_base=base_name,
+                        shape=fixed_bom.shape,
+                        n_nodes=fixed_bom.n_nodes,
+                        idx=idx,
+                        context=context,
+                        signatures=signatures,
+                    ),
+                    next(tree_sequences),
+                    shape_sigs,
+                    "fixed",
                 )
@@ -1,12 +1,18 @@
+"""
+Izomorfism de arbori cu radacina (BOM-uri) prin forma canonica AHU (Aho-Hopcroft-Ullman).
+Fiecare nod primeste un hash canonic calculat de jos in sus din eticheta lui si din hash-urile sortate ale copiilor,
+intr-o singura parcurgere iterativa a documentului JSON - O(n log n), fara networkx. Doi arbori sunt izomorfi (rooted,
+etichetati sau doar structural) daca si numai daca hash-urile radacinilor sunt egale.
+Semnatura este aceeasi cu cea folosita de generatoarele fixed/bounded pentru unicitatea arborilor (common/treesignature).
+
+Modul iso accepta si directoare: toate BOM-urile gasite sunt grupate pe clase de izomorfism.
+"""
 from __future__ import annotations
-import json, os
-from typing import Tuple, Optional, Literal
-from collections import Counter
-
-import networkx as nx
-from networkx.algorithms.isomorphism import DiGraphMatcher
+import os
+from typing import Any, Dict, Iterable, List, Optional, Literal
 
 from datagen.common.utility import get_abs_file_path
+from datagen.common.treesignature import document_signature, load_document, signature_classes
 
 LabelKey = Optional[Literal["productid", "pname"]]  # None => doar structural
 
@@ -16,37 +22,17 @@ def _resolve_path(p: str) -> str:
         return p
     return get_abs_file_path(p)
 
-def _load_bom_as_digraph(path: str, labelkey: LabelKey) -> Tuple[nx.DiGraph, int, Counter]:
+def canonical_hash(document: Dict[str, Any], labelkey: LabelKey = "productid") -> str:
     """
-    Construieste un DiGraph parinte->copil din JSON si returneaza:
-      - graful, id-ul radacinii, si (daca e cazul) multisetul etichetelor
-     lab=<label or None>, is_root=<bool>
+    Hash-ul canonic AHU al unui arbore dat ca dictionar imbricat (cu lista 'children').
+      - labelkey in {"productid","pname"} => eticheta nodului intra in hash
+      - labelkey is None                  => doar structura
     """
-    with open(_resolve_path(path), "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    G = nx.DiGraph()
-    next_id = 0
-
-    def add_node(node_obj, is_root=False, parent_id: Optional[int] = None) -> int:
-        nonlocal next_id
-        this_id = next_id
-        next_id += 1
-
-        lab = node_obj.get(labelkey, None) if labelkey else None
-        G.add_node(this_id, lab=lab, is_root=is_root)
-        if parent_id is not None:
-            G.add_edge(parent_id, this_id)
+    return document_signature(document, labelkey)
 
-        for child in node_obj.get("children", []):
-            add_node(child, False, this_id)
-
-        return this_id
-
-    root_id = add_node(data, is_root=True, parent_id=None)
-
-    labs = Counter(nx.get_node_attributes(G, "lab").values()) if labelkey else Counter()
-    return G, root_id, labs
+def bom_hash(path: str, *, labelkey: LabelKey = "productid") -> str:
+    """Hash-ul canonic al BOM-ului dintr-un fisier (.json sau .npz)"""
+    return canonical_hash(load_document(_resolve_path(path)), labelkey)
 
 def is_isomorphic_boms(path_a: str, path_b: str, *, labelkey: LabelKey = "productid") -> bool:
     """
@@ -54,28 +40,14 @@ def is_isomorphic_boms(path_a: str, path_b: str, *, labelkey: LabelKey = "produc
       - labelkey in {"productid","pname"} => izomorfism etichetat pe atributul ales
       - labelkey is None                  => izomorfism strict structural (ignora etichetele)
     """
-    G1, r1, labs1 = _load_bom_as_digraph(path_a, labelkey)
-    G2, r2, labs2 = _load_bom_as_digraph(path_b, labelkey)
-
-    # Fast-fail
-    if G1.number_of_nodes() != G2.number_of_nodes():
-        return False
+    return bom_hash(path_a, labelkey=labelkey) == bom_hash(path_b, labelkey=labelkey)
 
-    if labelkey and labs1 != labs2:
-        return False
-
-    if labelkey and (G1.nodes[r1].get("lab") != G2.nodes[r2].get("lab")):
-        return False
-
-    def node_match(a, b):
-        # rooted: root->root obligatoriu
-        if a.get("is_root") != b.get("is_root"):
-            return False
-        # pt etichetat comparam și 'lab', iar pt structural-only ignoram 'lab'
-        return True if not labelkey else (a.get("lab") == b.get("lab"))
-
-    GM = DiGraphMatcher(G1, G2, node_match=node_match)
-    return GM.is_isomorphic()
+def isomorphism_classes(paths: Iterable[str], *, labelkey: LabelKey = "productid") -> Dict[str, List[str]]:
+    """
+    Grupeaza BOM-urile din fisierele/directoarele date (cautate recursiv) pe clase de izomorfism
+    :return: hash canonic -> fisierele din clasa, in ordinea primei aparitii
+    """
+    return signature_classes([_resolve_path(p) for p in paths], labelkey)
 
 
 def cli_iso(path_a: str, path_b: str, *, labelkey: LabelKey = "productid") -> None:
@@ -83,5 +55,16 @@ def cli_iso(path_a: str, path_b: str, *, labelkey: LabelKey = "productid") -> No
     label_repr = "none" if labelkey is None else labelkey
     print(f"[ISO] label={label_repr}  {os.path.basename(path_a)}  ~  {os.path.basename(path_b)}  =>  {res}")
 
-
-
+def cli_iso_classes(paths: List[str], *, labelkey: LabelKey = "productid") -> None:
+    classes = isomorphism_classes(paths, labelkey=labelkey)
+    label_repr = "none" if labelkey is None else labelkey
+    files = sum(len(members) for members in classes.values())
+    print(f"[ISO] label={label_repr}  {files} BOMs  =>  {len(classes)} isomorphism classes")
+
+    # clasele cu mai multi membri, cele mai mari primele
+    for digest, members in sorted(classes.items(), key=lambda item: -len(item[1])):
+        if len(members) < 2:
+            break
+        print(f"[ISO] {digest}  ({len(members)} BOMs)")
+        for member in members:
+            print(f"        {member}")
@@ -1,10 +1,13 @@
+from datagen.common.context import ContextAttribute, current_context
+
+
 class BomCache:
     """
     Class representing a cache holding the current BOM, to be used from other modules
 
     @author Adrian
     """
-    bom = None
+    bom = ContextAttribute("bom")
 
     @classmethod
     def get_bom(cls):
@@ -12,8 +15,8 @@ class BomCache:
 
     @classmethod
     def add_bom(cls, bom):
-        cls.bom = bom
+        current_context().bom = bom
 
     @classmethod
     def reset(cls):
-        cls.bom = None
+        current_context().bom = None
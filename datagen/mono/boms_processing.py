@@ -17,7 +17,8 @@ from json import JSONDecoder
 from datagen.common.assembly import UnitAssemblyTime, Oee
 from datagen.common.utility import get_abs_file_path
 
-from datagen.mono.maintenance import MaintenanceDuration, MaintenanceInterval
+from datagen.common.maintenancegrid import InfeasibleMaintenanceError
+from datagen.mono.maintenance import Maintenance, MaintenanceDuration, MaintenanceInterval
 from datagen.mono.setup import SetupTime
 from datagen.mono.quantity import Quantity
 from datagen.mono.vtdepth import VerticalTreeDepth
@@ -230,13 +231,27 @@ class BomDecoder(JSONDecoder):
 
             # if we don't have a standard BOM (which means that we have a combination of n-ary tree and vertical trees)
             # we have to deal with distinct BOM types
-            if is_standard_bom:
-                Boms.add_bom(Bom(*vals))
-            else:
-                Boms.add_bom(VerticalTreeBom(*vals))
+            bom = Bom(*vals) if is_standard_bom else VerticalTreeBom(*vals)
+            cls.check_maintenance(bom.name, bom.maintenance_duration, bom.maintenance_interval)
+            Boms.add_bom(bom)
 
         return Boms.get_all()
 
+    @staticmethod
+    def check_maintenance(name: str, maintenance_duration: MaintenanceDuration,
+                          maintenance_interval: MaintenanceInterval) -> None:
+        """
+        Checks that the maintenances of a BOM can be generated, i.e. that a maintenance of the configured duration fits
+        inside a maintenance interval
+
+        :raise InfeasibleMaintenanceError: if no maintenance fits inside a maintenance interval
+        """
+        try:
+            Maintenance.windows_of(maintenance_duration, maintenance_interval)
+        except InfeasibleMaintenanceError as e:
+            log.error(f"Invalid maintenance configuration for the BOM {name}: {e}")
+            raise
+
     @staticmethod
     def handle_error(key) -> Exception:
         log.error(f"No such a key {key} in dictionary kkk")
@@ -1,22 +1,25 @@
 import logging
+import sys
 
+from collections import deque
 from typing import List, Tuple
-from anytree import Node, RenderTree, PreOrderIter
-from anytree.exporter import DotExporter, JsonExporter
-from anytree.importer import JsonImporter
+from anytree import Node
+from anytree.exporter import DotExporter
 from anytree.walker import Walker
 from prettytable import PrettyTable
 
+from datagen.common.bomarrays import BomArrays
+from datagen.common.columnar import export_npz, load_tree
+from datagen.common.jsonwriter import save_tree, write_tree
 from datagen.common.config import PRINT_TABULAR_TREE_PATHS
-from datagen.common.rootprod import RootProduct, RootNode
-from datagen.common.treeutil import NodeCounter
+from datagen.common.pathsampler import PathSampler
+from datagen.common.treeutil import NodeCounter, preorder, render_rows
 from datagen.common.stocks import Stocks
 
 from datagen.mono.boms_processing import Bom
 from datagen.mono.quantity import Quantity
 from datagen.mono.metainfo import MetaInfo
 from datagen.mono.productgenerator import *
-from datagen.mono.pathprods import PathProducts
 
 log = logging.getLogger("main")
 DUPLICATE_NODES_FILE = "./out/duplicate_nodes.txt"
@@ -52,42 +55,37 @@ def export_tree(n: Node, file_path: str, onscreen: bool = True) -> None:
     :param onscreen: if the exported json will be displayed on stdout too
     :return: None
     """
-    exporter = JsonExporter(indent=2, sort_keys=False)
     print(n)
     if onscreen:
-        print(exporter.export(n))
+        write_tree(n, sys.stdout)
+        print()
 
-    with open(file_path, "w") as f:
-        # exporter.write(root, f)
-
-        f.write(exporter.export(n))
+    save_tree(n, file_path)
+    export_npz(n, file_path)
 
 
 def import_tree(file_path: str) -> Node:
     """
-    Deserialize a tree from its associated JSON file
+    Deserialize a tree from its associated JSON (or .npz) file. The file is parsed only once, into BomArrays, and the
+    anytree nodes are built from the arrays
     :param file_path: the path to the file containing the onject serialization
     :return: the Python tree object
     """
-    with open(file_path) as f:
-        tree_as_dict = json.load(f)
-
-    tree_as_str = json.dumps(tree_as_dict)
-    return JsonImporter().import_(tree_as_str)
+    return load_tree(file_path).to_anynode_tree()
 
 
 def render_tree(node: Node) -> None:
-    for line in RenderTree(node):
+    for pre, _, crt_node in render_rows(node):
         print(
-            f"{line.pre} [opid={line.node.operationid}] [{line.node.productid}]  [{line.node.parentid}] [{line.node.code}]  [{line.node.pname}] [{line.node.machines}]")
+            f"{pre} [opid={crt_node.operationid}] [{crt_node.productid}]  [{crt_node.parentid}] [{crt_node.code}]  [{crt_node.pname}] [{crt_node.machines}]")
 
 
 def simple_render_tree(node: Node, bom) -> None:
     rendered_tree = ""
-    for line in RenderTree(node):
-        rendered_tree += f"{line.pre} [{line.node.operationid}]  [{line.node.parentid}] [{line.node.code}]\n"
+    for pre, _, crt_node in render_rows(node):
+        rendered_tree += f"{pre} [{crt_node.operationid}]  [{crt_node.parentid}] [{crt_node.code}]\n"
         print(
-            f"{line.pre} [{line.node.operationid}]  [{line.node.parentid}] [{line.node.code}]")
+            f"{pre} [{crt_node.operationid}]  [{crt_node.parentid}] [{crt_node.code}]")
 
     with open(get_abs_file_path(f"boms/{bom.output_file}.tree"), "w") as f:
         f.write(rendered_tree)
@@ -149,15 +147,16 @@ def walk(node, callback) -> None:
     :param callback: the function called for every walked node
     :return:
     """
-    for crt_node in PreOrderIter(node):
+    for crt_node in preorder(node):
         callback(crt_node)
 
 
-def decorate_stocks_on_node(node: Node) -> None:
-    node.raw_material_id=random.choice(Stocks().stocks).id
-    node.raw_material_quantity=random.randint(1, 10)
+def decorate_stocks_on_node(tree: BomArrays, node: int) -> None:
+    tree.set_attribute(node, "raw_material_id", random.choice(Stocks().stocks).id)
+    tree.set_attribute(node, "raw_material_quantity", random.randint(1, 10))
 
-def create_children(node: Node,
+def create_children(tree: BomArrays,
+                    node: int,
                     num_children: int,
                     depth: int,
                     products: List,
@@ -165,10 +164,12 @@ def create_children(node: Node,
                     bom: Bom,
                     random_children: bool = False) -> None:
     """
-    This function will create a generic tree using recursion. The process looks to work slow
-    for large depths, should be replaced with a faster alternative, for now is usable
+    This function will create a generic tree level by level (breadth first). The nodes waiting for their children
+    are kept in a queue, so there is no recursion involved and the depth of the tree is not limited by the
+    recursion limit of the interpreter
 
-    :param node: the node to which the children are created and attached
+    :param tree: the array-backed tree in which the nodes are created
+    :param node: the index of the node to which the children are created and attached
     :param num_children: the number of children to be created for the specified node
     :param depth: the depth of the tree (the number of levels below the specified node)
     :param seed: the seed used to initialize the random generator.
@@ -178,55 +179,51 @@ def create_children(node: Node,
     :return:
     """
 
-    # exit condition
-    if depth == 0:
-        decorate_stocks_on_node(node)
-        return
-
-    number_of_children = random.randint(1, num_children) if random_children else num_children
-    children_products = []
-    for i in range(number_of_children):
-
-        is_eligible_product = False
-
-        while not is_eligible_product:
-            product = random.choice(products)
-
-            # Check to see if the randomly chosen product is the root of the BOM. If yes, we need to do another pick
-            # The idea is that the root product cannot be used as a child of the BOM elsewhere. The root is the
-            # final product and that's it!
-            if product.productid == RootProduct.product.productid and product.pname == RootProduct.product.pname:
-                continue
-
-            if (product not in PathProducts.products) and (product not in children_products) and (
-                    product is not RootNode().node):
-                log.debug(f'{product.productid} is added to the path')
-                is_eligible_product = True
-                PathProducts.add_product(product)
-                children_products.append(product)
-            else:
-                log.debug(f'{product.productid} is a duplicate product. Picking a new one...')
-                print(f'{product.productid} is a duplicate product. Picking a new one...')
-                continue
-
-        operation_id = Sequencer().index
-        MetaInfo().add_metainfo(product, operation_id)
-
-        new_node = (
-                    f"Node('s{i}', "
-                    f"parent=node, "
-                    f"parentid={node.operationid}, "
-                    f"operationid={operation_id}, "
-                    f"productid={product.productid}, "
-                    f"code='{product.code}', "
-                    f"pname='{product.pname}', "
-                    f"quantity={Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max)}, "
-                    f"machines={str(product.machines)})"
-        )
-
-        NodeCounter.counter += 1
-        log.debug(f"Current number of nodes in the tree is {NodeCounter.counter}")
-
-        create_children(eval(new_node), number_of_children, depth - 1, products, seed, bom,
-                        random_children=random_children)  # recurse!
-        PathProducts.remove_product(product)
+    # every entry holds the node, the maximum number of children and the number of levels still to be created below it
+    queue = deque([(node, num_children, depth)])
+
+    # the sampler excludes the products already used on the path from the root to the current node. The root is on
+    # the path too, so the root product cannot be used as a child of the BOM elsewhere. The root is the final product
+    # and that's it!
+    sampler = PathSampler(products)
+
+    while queue:
+        crt_node, crt_num_children, crt_depth = queue.popleft()
+
+        # exit condition
+        if crt_depth == 0:
+            decorate_stocks_on_node(tree, crt_node)
+            continue
+
+        sampler.follow(tree, crt_node)
+
+        number_of_children = random.randint(1, crt_num_children) if random_children else crt_num_children
+        children_products = []
+        for i in range(number_of_children):
+            product = sampler.draw(int(tree.operationid[crt_node]))
+
+            # the children of a node must have distinct products too
+            sampler.exclude(product.productid)
+            children_products.append(product.productid)
+            log.debug(f'{product.productid} is added to the path')
+
+            operation_id = Sequencer().index
+            MetaInfo().add_metainfo(product, operation_id)
+
+            new_node = tree.add_node(crt_node, {
+                "parentid": int(tree.operationid[crt_node]),
+                "operationid": operation_id,
+                "productid": product.productid,
+                "code": product.code,
+                "pname": product.pname,
+                "quantity": Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max),
+                "machines": product.machines,
+                "name": f"s{i}"})
+
+            NodeCounter.counter += 1
+            log.debug(f"Current number of nodes in the tree is {NodeCounter.counter}")
+
+            queue.append((new_node, number_of_children, crt_depth - 1))
+
+        for productid in children_products:
+            sampler.include(productid)
@@ -58,7 +58,7 @@ def main():
 
     # let's create the memory representation of the products
     decoder = SProductDecoder()
-    products = decoder.decode()
+    products = decoder.decode(bom)
 
     # the product used for the root node. We pop a product from the list because the root must be unique
     root_product = products.pop()
@@ -4,18 +4,26 @@ This is the entry point of data generator
 import sys
 import random
 
-from anytree import Node, RenderTree, Resolver
+from typing import List
+
+from anytree import Node, Resolver
 
 import datagen.mono.maintenance
 import datagen.mono.productgenerator
 import datagen.mono.boms_processing
 import datagen.common.maintenances
 
+from datagen.common.bomarrays import BomArrays
 from datagen.common.config import GENERATE_SIMPLE_TREE
+from datagen.common.context import GenerationContext
 from datagen.common.importer import SProductDecoder
+from datagen.common.maintenancegrid import draw_maintenances
+from datagen.common.rng import entry_sequences
 from datagen.common.sequencer import Sequencer
 from datagen.common.rootprod import RootProduct, RootNode
+from datagen.common.treeutil import render_text
 from datagen.common.utility import get_abs_file_path, check_and_create_if_not_exists
+from datagen.common.workers import TaskFailure, run_batch
 from datagen.common.stocks import Stocks
 
 from datagen.mono.bomcache import BomCache
@@ -37,15 +45,28 @@ def print_name(node: Node) -> None:
 
 def max_nodes_number(children: int, depth: int) -> int:
     """
-    Computes the maximum number of nodes for the BOM tree (m-ary tree) based on its depth and children per node
+    Computes the maximum number of nodes for the BOM tree (m-ary tree) based on its depth and children per node. A tree
+    of depth d has d + 1 levels, the root being on level 0 and the leaves on level d
     """
     max_nodes = 0
-    for i in range(depth):
+    for i in range(depth + 1):
         max_nodes += pow(children, i)
     return max_nodes
 
 
-def bom_process(bom: datagen.mono.boms_processing.Bom):
+def bom_process(bom: datagen.mono.boms_processing.Bom, context: GenerationContext = None) -> None:
+    """
+    Generates a BOM and its products, machines and stocks. The whole state of the generation is kept in the passed
+    context (a new one if none is passed), so BOMs generated one after another do not share anything
+
+    :param bom: the BOM entry from the configuration file
+    :param context: the generation context owning the state of this BOM
+    """
+    with (context or GenerationContext()).activate():
+        generate_bom(bom)
+
+
+def generate_bom(bom: datagen.mono.boms_processing.Bom) -> None:
     # extract the BOM's parameters and put them in constants, so they can be further used
 
     # the name of output file
@@ -104,7 +125,7 @@ def bom_process(bom: datagen.mono.boms_processing.Bom):
 
     # let's create the memory representation of the products
     decoder = SProductDecoder()
-    products = decoder.decode()
+    products = decoder.decode(bom)
 
     # the product used for the root node. We pop a product from the list because the root must be unique
     root_product = random.choice(products)
@@ -130,8 +151,8 @@ def bom_process(bom: datagen.mono.boms_processing.Bom):
     MetaInfo().reset_operations()
     MetaInfo().add_metainfo(root_product, root_operation)
 
-    # create the order corresponding to this BOM
-    random.seed(SEED)
+    # create the order corresponding to this BOM. The random generators were already seeded, from the seed sequence of
+    # the BOM, before its generation started
     # if necessary, generate an order which is attached to this BOM
     # TODO: maybe should be parameterized if useful (or extract the order info directly from BOM)
     # order = Order(Sequencer().index, root_product.productid, root_product.pname, random.randint(1, 100),
@@ -139,27 +160,32 @@ def bom_process(bom: datagen.mono.boms_processing.Bom):
 
     # order.export(f"boms/order_{OUTPUT_FILE}")
 
-    # create the root of the tree
-    root = Node("root", parent=None, operationid=root_operation, productid=root_product.productid,
-                code=root_product.code, pname=root_product.pname,
-                parentid=None, start_date=bom.start_date, delivery_date=bom.delivery_date,
-                quantity=Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max),
-                machines=root_product.machines, metainfo={})
+    # create the root of the tree. The tree is built in an array-backed structure and converted to anytree only
+    # when it is exported. The arrays are sized up front for the maximum number of nodes of the tree
+    tree = BomArrays(capacity=MAX_NODES_NUMBER)
+    root_index = tree.add_node(-1, {"operationid": root_operation, "productid": root_product.productid,
+                                    "code": root_product.code, "pname": root_product.pname,
+                                    "parentid": None, "start_date": bom.start_date,
+                                    "delivery_date": bom.delivery_date,
+                                    "quantity": Quantity.get_quantity(bom.quantity.min, bom.quantity.step,
+                                                                      bom.quantity.max),
+                                    "machines": root_product.machines, "metainfo": {},
+                                    "name": "root"})
 
+    # effectively create the generic tree
+    create_children(tree, root_index, MAX_CHILDREN, MAX_DEPTH, products, SEED, bom, random_children=RANDOMIZE_CHILDREN)
+
+    root = tree.to_anytree()
     RootNode().add_node(root)
 
-    # effectively create the generic tree
-    create_children(root, MAX_CHILDREN, MAX_DEPTH, products, SEED, bom, random_children=RANDOMIZE_CHILDREN)
-
-    # generate the associated maintenances for the machines involved in root product, if necessary
-    for i in maintenance_intervals:
-        for crt_machine_id in MetaInfo().machines:
-            if datagen.mono.productgenerator.ProductGenerator.generate_maintenance(bom):
-                crt_machine = datagen.mono.productgenerator.Machines.get(crt_machine_id)
-                actual_maintenance_interval = datagen.mono.maintenance.Maintenance.build_maintenance_dates_ex(i[0], i[1])
-                datagen.common.maintenances.Maintenances.add(
-                    datagen.mono.maintenance.Maintenance(crt_machine, actual_maintenance_interval[0],
-                                            actual_maintenance_interval[1]))
+    # generate the associated maintenances for the machines involved in root product, if necessary. The whole
+    # interval-by-machine grid is decided and sampled at once
+    for crt_machine_id, start_date, end_date in draw_maintenances(
+            maintenance_intervals, MetaInfo().get_machines(), bom.maintenance_probability,
+            datagen.mono.maintenance.Maintenance.get_maintenance_windows()):
+        crt_machine = datagen.mono.productgenerator.Machines.get(crt_machine_id)
+        datagen.common.maintenances.Maintenances.add(
+            datagen.mono.maintenance.Maintenance(crt_machine, start_date, end_date))
 
     all_encoded_maintenances = datagen.common.maintenances.Maintenances().to_json()
 
@@ -177,7 +203,7 @@ def bom_process(bom: datagen.mono.boms_processing.Bom):
     export_tree(root, get_abs_file_path(f"boms/{OUTPUT_FILE}"), False)
 
     # print the tree to the console for visualization
-    print(RenderTree(root))
+    print(render_text(root))
 
     node = import_tree(get_abs_file_path(f"boms/{OUTPUT_FILE}"))
     render_tree(node)
@@ -189,23 +215,27 @@ def bom_process(bom: datagen.mono.boms_processing.Bom):
         simple_tree_root_node = resolver.get(root, '/root')
 
         # render the smaller tree for debugging purposes
-        print(RenderTree(simple_tree_root_node))
+        print(render_text(simple_tree_root_node))
 
         simple_tree_node = import_tree(get_abs_file_path(f"boms/{OUTPUT_FILE}"))
         simple_render_tree(simple_tree_root_node, bom)
 
 
-def nary_trees(configuration_file_path):
+def nary_trees(configuration_file_path, workers: int = 1) -> List[TaskFailure]:
     """
     Generates an n-ary tree with the number of levels and children per node specified in the configuration file
-    """
-    Sequencer().reset()
 
+    :param configuration_file_path: the path of the configuration file
+    :param workers: the number of processes among which the BOMs are spread
+    :return: the BOMs whose generation failed
+    """
     # generate the list of all the BOMs defined in the system
     all_boms = datagen.mono.boms_processing.BomDecoder.build(configuration_file_path)
 
-    for b in all_boms:
-        bom_process(b)
+    # every BOM is generated in a fresh context, so the ids sequence starts again from 0 for each of them, with the
+    # random generators seeded from a stream derived from the seed of the BOM
+    return run_batch(bom_process, all_boms, entry_sequences([b.seed for b in all_boms]), [b.name for b in all_boms],
+                     workers)
 
 
 if __name__ == "__main__":
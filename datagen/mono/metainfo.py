@@ -1,3 +1,6 @@
+from datagen.common.context import ContextAttribute
+
+
 class MetaInfo(object):
     """
     Singleton that holds info about the products and machines involved in the BOM
@@ -6,37 +9,32 @@ class MetaInfo(object):
     """
     instance = None
 
+    # the meta information is kept in the active generation context. The machines are kept as the keys of an
+    # insertion-ordered dictionary and sorted only when they are gathered
+    products = ContextAttribute("meta_products")
+    operations = ContextAttribute("meta_operations")
+    machines = ContextAttribute("meta_machines")
+    prod_machines = ContextAttribute("meta_prod_machines")
+
     def __new__(cls, *args, **kwargs):
         if cls.instance is None:
             cls.instance = super().__new__(cls, *args, **kwargs)
         return cls.instance
 
     def add_product(self, prodid: int) -> None:
-        if not hasattr(self, 'products'):
-            setattr(self, 'products', [])
-
         self.products.append(prodid)
 
     def add_operation(self, opid: int) -> None:
         """
         Adds the operation meta information in the BOM
         """
-        if not hasattr(self, 'operations'):
-            # the field below is added on a post-creation phase, it is not declared in the constructor
-            self.operations = []
-
         self.operations.append(opid)
 
     def add_machine(self, machineid: int) -> None:
         """
         Adds the machines involved in the fabrication of the product described in BOM
         """
-        if not hasattr(self, 'machines'):
-            setattr(self, 'machines', [])
-
-        # add the attributes below outside the constructor, in a late decoration phase
-        self.machines.append(machineid)
-        self.machines = list(set(self.machines))
+        self.machines[machineid] = None
 
     def add_metainfo(self, product, opid):
         self.add_operation(opid)
@@ -48,15 +46,13 @@ class MetaInfo(object):
         """
         Clears the operations list
         """
-        if hasattr(self, 'operations'):
-            self.operations.clear()
+        self.operations.clear()
 
     def reset_machines(self):
         """
         Cleans the machines list
         """
-        if hasattr(self, 'machines'):
-            self.machines.clear()
+        self.machines.clear()
 
     def get_products(self):
         """
@@ -72,6 +68,6 @@ class MetaInfo(object):
 
     def get_machines(self):
         """
-        Gathers the list of all machines
+        Gathers the list of all machines, sorted by id
         """
-        return self.machines
+        return sorted(self.machines)
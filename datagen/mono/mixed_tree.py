@@ -31,6 +31,7 @@ from anytree import AnyNode, RenderTree, Resolver
 from quantity import Quantity
 from random import choice, randint
 from datagen.common.importer import SProductDecoder, SProduct
+from datagen.common.maintenancegrid import draw_maintenances
 from datagen.common.rootprod import RootProduct, RootNode
 from pathprods import PathProducts
 from metainfo import MetaInfo
@@ -159,7 +160,7 @@ def bom_processing(bom: Bom):
 
     # let's create the memory representation of the products
     decoder = SProductDecoder()
-    products = decoder.decode()
+    products = decoder.decode(bom)
 
     root_product = choice(products)
 
@@ -193,13 +194,11 @@ def bom_processing(bom: Bom):
     create_random_tree(root, 6, products, bom, 3, random_children=True)
 
     # generate the associated maintenances for the machines involved in root product, if necessary
-    for i in maintenance_intervals:
-        for crt_machine_id in MetaInfo().machines:
-            if productgenerator.ProductGenerator.generate_maintenance(bom):
-                crt_machine = productgenerator.Machines.get(crt_machine_id)
-                actual_maintenance_interval = maintenance.Maintenance.build_maintenance_dates_ex(i[0], i[1])
-                maintenances.Maintenances.add(maintenance.Maintenance(crt_machine, actual_maintenance_interval[0],
-                                                                      actual_maintenance_interval[1]))
+    for crt_machine_id, start_date, end_date in draw_maintenances(maintenance_intervals, MetaInfo().get_machines(),
+                                                                  bom.maintenance_probability,
+                                                                  maintenance.Maintenance.get_maintenance_windows()):
+        crt_machine = productgenerator.Machines.get(crt_machine_id)
+        maintenances.Maintenances.add(maintenance.Maintenance(crt_machine, start_date, end_date))
 
     all_encoded_maintenances = maintenances.Maintenances().to_json()
 
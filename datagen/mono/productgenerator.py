@@ -2,15 +2,15 @@ import json
 import logging
 import string
 
-import datagen.common.assembly
-import datagen.mono.setup as setup
-
 from typing import Any, List, Dict, Type
 from json import JSONEncoder
-from scipy.stats import norm, truncnorm
 
+from datagen.common.assembly import sample_oee
+from datagen.common.catalog import ProductCatalog
+from datagen.common.config import EXPORT_MACHINES_FILE
+from datagen.common.context import ContextAttribute
 from datagen.common.sequencer import Sequencer
-from datagen.common.utility import get_abs_file_path
+from datagen.common.utility import get_abs_file_path, bom_artifact_file
 
 from datagen.mono.msequencer import MachineSequencer
 from datagen.mono.setup import *
@@ -36,8 +36,8 @@ log = logging.getLogger("main")
 # the maximum number of machines on which a part is processed
 MAX_ALTERNATIVES_MACHINES: int = 3
 
-# the file where machines are written, in order to build the Machine objects
-MACHINES_FILE = "boms/machines.json"
+# the directory where the machines of a BOM are written, in order to build the Machine objects
+MACHINES_DIR = "boms"
 
 # a list with 200 distinct products, used in our data generator
 products_200 = ["AC compressor", "AC drain hose", "A-pillar", "ABS", "ACE filter",
@@ -145,8 +145,11 @@ class Machines:
     Class containing all the machines in our system
     """
 
-    # list of Machine instances
-    machines: List[Machine] = []
+    # list of Machine instances, kept in the active generation context
+    machines: List[Machine] = ContextAttribute("machines")
+
+    # the same Machine instances, indexed by their id
+    machines_by_id: Dict[int, Machine] = ContextAttribute("machines_by_id")
 
     class MachinesEncoder(JSONEncoder):
         """
@@ -177,9 +180,7 @@ class Machines:
         :param id:
         :return:
         """
-        for m in cls.machines:
-            if m.id == id:
-                return m
+        return cls.machines_by_id.get(id)
 
     def build(self) -> List[Machine]:
         """
@@ -193,32 +194,21 @@ class Machines:
         # be sure to start with a clear list of machines
         if len(self.machines) > 0:
             self.machines.clear()
+        Machines.machines_by_id.clear()
 
         # get the number of machines from the BOM
         machines_number = self.bom.machines_number
 
-        # here we build the machines by passing a unique identifier, a name and a random OEE value
-        for _ in range(machines_number):
-            if self.bom.oee.distribution == "normal":
-                mean, std_dev = distribution_params(self.bom)
-
-                # normal distribution (no truncation)
-                # machine_oee = round(norm.rvs(mean, std_dev), 3)
-
-                # use truncated normal distribution
-                truncated_norm = truncnorm((self.bom.oee.min - mean)/std_dev,
-                                           (self.bom.oee.max - mean) / std_dev,
-                                           loc=mean, scale=std_dev)
-                machine_oee = round((truncated_norm.rvs(1)[0]), 3)
-
-            elif self.bom.oee.distribution == "uniform":
-                machine_oee = round(random.randrange(self.bom.oee.min, self.bom.oee.max), 3)
-            else:
-                raise ValueError("Not a valid value for the statistical distribution")
+        # the OEE values of all the machines are drawn in a single call, from a distribution built once
+        mean, std_dev = distribution_params(self.bom)
+        oee_values = sample_oee(self.bom.oee, mean, std_dev, machines_number)
 
+        # here we build the machines by passing a unique identifier, a name and a random OEE value
+        for machine_oee in oee_values:
             crt_machine = Machine(id=MachineSequencer().id, oee=machine_oee)
 
             Machines.machines.append(crt_machine)
+            Machines.machines_by_id[crt_machine.id] = crt_machine
 
         if has_duplicates(Machines.machines):
             log.error("Duplicate machine found")
@@ -244,14 +234,14 @@ class Machines:
         for m in self.machines:
             encoded_machines.append(encoder.encode(m))
 
-        with open(get_abs_file_path(MACHINES_FILE), "w") as f:
+        with open(get_abs_file_path(f"{MACHINES_DIR}/{bom_artifact_file(self.bom.output_file, 'machines')}"), "w") as f:
             f.write(json.dumps(encoded_machines, indent=4))
 
     @classmethod
-    def import_machines(cls):
+    def import_machines(cls, bom):
         decoded_machines = None
         try:
-            with open(get_abs_file_path(MACHINES_FILE)) as f:
+            with open(get_abs_file_path(f"{MACHINES_DIR}/{bom_artifact_file(bom.output_file, 'machines')}")) as f:
                 decoded_machines = json.load(f)
         except FileNotFoundError as e:
             log.error("The source file for machines was not found...")
@@ -274,7 +264,10 @@ class Product:
                 setattr(self, 'machines', [])
 
             for entry in machines_list:
-                self.machines.append(Machine(entry.get("id"), entry.get("name"), entry.get("oee")))
+                if isinstance(entry, dict):
+                    self.machines.append(Machine(entry.get("id"), entry.get("name"), entry.get("oee")))
+                else:
+                    self.machines.append(Machine(entry.id, entry.name, entry.oee))
             self.machines.sort(key=lambda M: M.id)
 
     def __eq__(self, o: Type['Product']) -> bool:
@@ -325,9 +318,8 @@ class ProductGenerator:
             return random.random() < bom.maintenance_probability
 
     def build(self) -> Product:
-        # prepare the list of existing machines
-        # all_machines = Machines().build()
-        all_machines = Machines.import_machines()
+        # the machines built for the current BOM, taken straight from memory
+        all_machines = Machines.machines
 
         if self.bom.randomize_alternative_machines:
             max_alternative_machine_number = random.randint(1, self.bom.max_alternatives_machines_number)
@@ -343,7 +335,7 @@ class ProductGenerator:
         # for debugging reasons, build a list of Machine objects
         machines_list = []
         for m in machines_per_product:
-            machine = Machine(id=m.get("id"), name=m.get("name"), oee=m.get("oee"))
+            machine = Machine(id=m.id, name=m.name, oee=m.oee)
             machines_list.append(machine)
 
         if has_duplicates(machines_list):
@@ -382,18 +374,27 @@ class ProductGenerator:
 
 class Products:
     """
-    Class dealing with a collection of Product objects. Offers methods for decoration the BOM nodes
+    Class dealing with a collection of Product objects. Offers methods for decoration the BOM nodes. The setup and
+    execution times are kept in a ProductCatalog and added to the machines only when the products are exported
     """
 
+    # the order of the keys in the exported machines
+    MACHINE_KEYS = ("id", "name", "oee", "execution_time", "setup_time")
+
     def __init__(self, bom):
         self.all_products = []
         self.bom = bom
+        self.catalog = None
 
     def build(self) -> List[Product]:
-        for i in range(200):
+        # at least 200 products are generated, more if the BOM needs them (e.g. for very deep trees, as a product
+        # cannot be used twice on the same path)
+        for i in range(max(200, self.bom.prod_number)):
             p = ProductGenerator(self.bom).build()
             self.all_products.append(p)
 
+        self.catalog = ProductCatalog(self.all_products)
+
         return self.all_products
 
     def export(self) -> None:
@@ -404,96 +405,43 @@ class Products:
 
         encoded_products = []
 
-        class Encoder(JSONEncoder):
-            def encode(self, obj) -> Dict[str, Any]:
-                return obj.__dict__
-
-        encoder = Encoder()
+        for i, p in enumerate(self.all_products):
+            encoded_products.append({"productid": p.productid, "code": p.code, "pname": p.pname,
+                                     "machines": self.catalog.machines_of(i, self.MACHINE_KEYS)})
 
-        for p in self.all_products:
-            encoded_products.append(encoder.encode(p))
+        with open(get_abs_file_path(f"boms/{bom_artifact_file(self.bom.output_file, 'products')}"), "w") as f:
+            f.write(json.dumps(encoded_products, indent=4))
 
-        with open(get_abs_file_path("boms/products.json"), "w") as f:
-            f.write(json.dumps(encoded_products, default=lambda o: o.__dict__, indent=4))
+    def identical_machines(self):
+        """
+        The mask of the machines which are considered identical. The number of identical machines is given by a
+        parameter in datagen.json, as a percent from the total number of the machines
+        """
+        max_number_of_identical_machines = int(self.bom.machines_number * self.bom.percent_of_identical_machines)
+        return self.catalog.identical_machines(self.bom.allow_identical_machines, max_number_of_identical_machines)
 
     def add_setup_time(self) -> None:
         """
         this method will decorate the list of machines with a randomly chosen setup time
         :return:
         """
-        time_units_setup = self.bom.setup_time.time_units
-
-        allowed_identical_machines = self.bom.allow_identical_machines
-
-        # the number of identical machines is given by a parameter in datagen.json
-        percent_of_identical_machines = self.bom.percent_of_identical_machines
-
-        max_number_of_identical_machines = int(self.bom.machines_number * percent_of_identical_machines)
-
-        # generate a setup time based on some input parameters
-        setup_time = SetupTime.get_setup_time(self.bom.setup_time.min,
-                                              self.bom.setup_time.step,
-                                              self.bom.setup_time.max)
-
-        for p in self.all_products:
-            # define a counter to count the machines which were set up
-            machines_counter = 0
-
-            for m in p.machines:
-
-                # if identical machines are allowed, retain this value to be reused
-                if allowed_identical_machines and machines_counter < max_number_of_identical_machines:
-                    m.setup_time = self.to_seconds(time_units_setup, setup_time)
-                    machines_counter += 1
-                else:
-                    m.setup_time = self.to_seconds(time_units_setup,
-                                                   setup.SetupTime.get_setup_time(self.bom.setup_time.min,
-                                                                                  self.bom.setup_time.step,
-                                                                                  self.bom.setup_time.max))
+        self.catalog.add_setup_times(self.bom.setup_time.time_units,
+                                     self.bom.setup_time.min,
+                                     self.bom.setup_time.step,
+                                     self.bom.setup_time.max,
+                                     self.identical_machines())
 
     def add_time_units(self) -> None:
         """
-        this method will decorate the machines list with a time specific to create a unit of product
+        this method will decorate the machines list with a time specific to create a unit of product. The generic
+        execution time of a product is drawn from the setup time interval
         :return:
         """
-        time_units_assembly = self.bom.unit_assembly_time.time_units
-        allowed_identical_machines = self.bom.allow_identical_machines
-        percent_of_identical_machines = self.bom.percent_of_identical_machines
-
-        # let's say that the number of identical machines could be only percent_of_identical_machines  from the total
-        # number of the machines
-        max_number_of_identical_machines = int(self.bom.machines_number * percent_of_identical_machines)
-
-        for p in self.all_products:
-            # define a counter to count the machines which were set up
-            machines_counter = 0
-
-            generic_execution_time = self.to_seconds(time_units_assembly,
-                                                     datagen.common.assembly.UnitAssemblyTime.get_unit_assembly_time(
-                                                         self.bom.setup_time.min,
-                                                         self.bom.setup_time.step,
-                                                         self.bom.setup_time.max))
-
-            for m in p.machines:
-                # if identical machines are allowed, retain this value to be reused
-                if allowed_identical_machines and machines_counter < max_number_of_identical_machines:
-                    m.execution_time = self.to_seconds(time_units_assembly, generic_execution_time)
-                    machines_counter += 1
-                else:
-                    m.execution_time = int(generic_execution_time / m.oee)
-
-    def to_seconds(self, time_units, val) -> int:
-        """
-        Transforms a certain duration in seconds, based on the units in which duration is expressed
-        :param time_units:
-        :param val:
-        :return:
-        """
-
-        d = {"seconds": val, "minutes": val * 60, "hours": val * 60 * 60, "days": val * 60 * 60 * 60}
-        res = d.get(time_units, "No such time unit.")
-
-        return res
+        self.catalog.add_execution_times(self.bom.unit_assembly_time.time_units,
+                                         self.bom.setup_time.min,
+                                         self.bom.setup_time.step,
+                                         self.bom.setup_time.max,
+                                         self.identical_machines())
 
     def generate_products(self):
         self.build()
@@ -508,7 +456,10 @@ def generate(bom):
     MachineSequencer().reset()
     machines = Machines(bom)
     machines.build()
-    machines.export()
+
+    # the machines are kept in memory, the JSON file is only an artifact for inspection
+    if EXPORT_MACHINES_FILE:
+        machines.export()
 
     # and the products also, since they can have different number on machines on which they are executed
     products = Products(bom)
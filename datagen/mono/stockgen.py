@@ -10,10 +10,11 @@ import os
 from typing import List
 from json import JSONEncoder, JSONDecoder, dumps, load
 
+from datagen.common.context import current_context
 from datagen.common.sequencer import Sequencer
 from datagen.common.stocks import Stock, Acquisition, Stocks
 from datagen.common.stockgenb import StockGeneratorBase
-from datagen.common.utility import create_future_date, get_abs_file_path
+from datagen.common.utility import create_future_date, get_abs_file_path, bom_artifact_file
 from datagen.mono.boms_processing import Bom
 
 RAW_MATERIALS_PERCENT = 0.2
@@ -47,8 +48,6 @@ class StockGeneratorMono(StockGeneratorBase):
                               [acquisition])
             stocks.add(new_stock)
 
-            cls.stocks.append(new_stock)
-
     @classmethod
     def export(cls, bom):
         """
@@ -63,7 +62,7 @@ class StockGeneratorMono(StockGeneratorBase):
 
         current_directory = os.getcwd()
 
-        with open(get_abs_file_path(f"boms/stocks.json"), "w") as f:
+        with open(get_abs_file_path(f"boms/{bom_artifact_file(bom.output_file, 'stocks')}"), "w") as f:
             f.write(dumps(cls.stocks, default=lambda o: o.__dict__, indent=4))
 
     @classmethod
@@ -76,7 +75,7 @@ class StockGeneratorMono(StockGeneratorBase):
             def decode(self) -> List[Stock]:
                 decoded_stocks = []
 
-                with open(get_abs_file_path(f"boms/stocks.json")) as f:
+                with open(get_abs_file_path(f"boms/{bom_artifact_file(bom.output_file, 'stocks')}")) as f:
                     stocks_list = load(f)
 
                     for crt_stock in stocks_list:
@@ -87,5 +86,5 @@ class StockGeneratorMono(StockGeneratorBase):
                 return decoded_stocks
 
         decoder = StockDecoder()
-        cls.stocks = decoder.decode()
+        current_context().stocks = decoder.decode()
 
@@ -1,16 +1,16 @@
 from datagen.multi.machineinfo import SetupTime, UnitAssemblyTime
 from datagen.multi.quantity import Quantity
-import json
-from anytree.importer import JsonImporter
+import numpy as np
 from datagen.mono.gentree import render_tree
-from anytree import  PreOrderIter, Node
+from anytree import Node
+from datagen.common.bomarrays import AnyNodeTemplate
+from datagen.common.columnar import load_tree
 
 class Instance(object):
     node_index = 0 #needed to create the anytree object
 
-    def __init__(self, input_file_path : str, seed: int = None):
+    def __init__(self, input_file_path : str):
         self.input_file_path : str = input_file_path
-        self.seed = seed
         self.quantity : Quantity = None
         self.setup_time : SetupTime = None
         self.unit_assembly_time : UnitAssemblyTime = None
@@ -19,40 +19,42 @@ class Instance(object):
         self.machine_id_list : list = []
         self.nodes_number = 0
         self.maintenances_list = []
+        self.arrays = None
+        self.template = None
         self.load_instance()
 
     def get_any_tree(self) -> Node:
-        with open(self.input_file_path, 'r') as file:
-            instance = json.load(file)
-            # load anyTree instance from file
-        return JsonImporter().import_(json.dumps(instance))
+        """
+        Builds a new anytree tree of the instance, cloned from the template built when the instance was loaded
+        """
+        return self.template.clone()
 
     def load_instance(self):
         """
-        Load existing information from the instance input file
+        Load existing information from the instance input file. The file is parsed once, into BomArrays, and the
+        statistics are computed on the columns of the arrays. The template of the tree is built once too, every
+        variant gets a clone of it
         """
-        self.any_tree = self.get_any_tree()
-        quantities = []
-        setup_times = []
-        execution_times = []
-        machine_alternatives = []
-        for node in PreOrderIter(self.any_tree):
-
-            if self.nodes_number > 0:
-                # the root node quantity represents the number of product pieces for current command
-                quantities.append(node.quantity)
-            machine_alternatives.append(len(node.machines))
-            for m in node.machines:
-                setup_times.append(m['setup_time'])
-                execution_times.append(m['execution_time'])
-
-            self.nodes_number += 1
-
-        self.quantity = Quantity({'min':min(quantities), 'step':1, 'max':max(quantities)}, seed= self.seed)
-        self.machines_alternatives = max(machine_alternatives)
-        self.setup_time = SetupTime(min(setup_times),max(setup_times), 1, 'seconds', seed= self.seed)
-        self.unit_assembly_time = UnitAssemblyTime(min(execution_times), max(execution_times),1, 'seconds', seed= self.seed)
+        self.arrays = load_tree(self.input_file_path)
+        self.template = AnyNodeTemplate(self.arrays)
+        size = self.arrays.size
+
+        # the root node quantity represents the number of product pieces for current command. The nodes and the
+        # machines without a value are skipped, so they do not change the limits
+        quantities = self.arrays.node_values('quantity', start=1)
+        setup_times = self.arrays.machine_values('setup_time')
+        execution_times = self.arrays.machine_values('execution_time')
+        machine_alternatives = np.diff(self.arrays.machines_indptr[:size + 1])
 
+        self.nodes_number = size
+
+        self.quantity = Quantity({'min': min(quantities), 'step': 1, 'max': max(quantities)})
+        self.machines_alternatives = int(machine_alternatives.max())
+        self.setup_time = SetupTime(min(setup_times), max(setup_times), 1, 'seconds')
+        self.unit_assembly_time = UnitAssemblyTime(min(execution_times), max(execution_times), 1, 'seconds')
+
+        # the instance keeps its own copy of the meta information, the variants get theirs with every new tree
+        self.any_tree = self.get_any_tree()
         self.operation_id_list = self.any_tree.metainfo['operations_list']
         self.machine_id_list = self.any_tree.metainfo['machines_list']
         self.maintenances_list = self.any_tree.metainfo['maintenances']
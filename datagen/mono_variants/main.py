@@ -3,15 +3,25 @@ This is the entry point of data generator
 """
 import random
 from datetime import date, timedelta
+from functools import lru_cache
+from typing import List, Tuple
 
-from anytree import Node, RenderTree, Resolver
+import numpy as np
+from anytree import Node, Resolver
 from pathlib import Path
 
+from datagen.common.context import GenerationContext
+from datagen.common.rng import entry_sequences
+from datagen.common.treeutil import render_rows
+from datagen.common.workers import TaskFailure, run_batch
 from datagen.common.utility import get_abs_file_path
 from datagen.mono_variants.load_instance import Instance
 from datagen.mono_variants.variants_processing import PerturbationVariantDecoder, PerturbationVariant
 from datagen.mono.gentree import render_tree, export_tree
 
+# the number of instances kept loaded in every process; the variants of an instance are generated one after another
+INSTANCES_CACHE_SIZE = 8
+
 def print_name(node) -> None:
     """
     callback function used to traverse the tree and perform a
@@ -22,38 +32,106 @@ def print_name(node) -> None:
     print(node.pname)
 
 
-def process_perturbation(perturbation: PerturbationVariant):
-        print("-------process_perturbation-----------")
-        #perturb existing file
-        output_file_path = get_abs_file_path(perturbation.generated_instances_path)
-
-        for input_file_path in [get_abs_file_path(path) for path in perturbation.initial_instance_path]:
-            instance = Instance(input_file_path, seed = perturbation.seed)
-            for var_no in range(1, perturbation.generated_instances_number + 1):
-                tree = perturbation.perturb(instance, instance.get_any_tree())
-
-                resolver = Resolver('name')
-                root_node = resolver.get(tree, '.')
-                file_name = Path(input_file_path).stem
-                final_file_name = f'{output_file_path}/{file_name}_{perturbation.generated_instances_name}_ao{len(root_node.metainfo['operations_list'])}_am{len(root_node.metainfo['machines_list'])}_{var_no}.json'
-                export_tree(root_node, final_file_name)
-                rendered_tree = ""
-                for line in RenderTree(root_node):
-                    rendered_tree += f"{line.pre} [{line.node.operationid}]  [{line.node.parentid}] [{line.node.code}]\n"
-                    print(
-                        f"{line.pre} [{line.node.operationid}]  [{line.node.parentid}] [{line.node.code}]")
-            
-                with open(f'{final_file_name}.tree', "w", encoding="utf-8") as f:
-                    f.write(rendered_tree)
-
-
-def variate_instance(configuration_file_path : str):
+class VariantTask(object):
+    """
+    A variant to be generated: the perturbation applied, the instance file it starts from and the number of the variant
+    """
+
+    def __init__(self, perturbation: PerturbationVariant, input_file_path: str, output_file_path: str, var_no: int):
+        self.perturbation = perturbation
+        self.input_file_path = input_file_path
+        self.output_file_path = output_file_path
+        self.var_no = var_no
+
+    @property
+    def name(self) -> str:
+        return f"{Path(self.input_file_path).stem}_{self.perturbation.generated_instances_name}_{self.var_no}"
+
+
+@lru_cache(maxsize=INSTANCES_CACHE_SIZE)
+def load_instance(input_file_path: str) -> Instance:
+    """
+    Loads an instance file once per process. The variants do not change the instance, each of them gets its own clone
+    of the instance tree
+    """
+    return Instance(input_file_path)
+
+
+def variant_tasks(perturbation: PerturbationVariant,
+                  sequence: np.random.SeedSequence) -> Tuple[List[VariantTask], List[np.random.SeedSequence]]:
+    """
+    Builds the variants of a perturbation, for all its input files, each with its own random stream
+    :return: the variants and the seed sequence of every variant
+    """
+    print("-------process_perturbation-----------")
+    output_file_path = get_abs_file_path(perturbation.generated_instances_path)
+    input_files = [get_abs_file_path(path) for path in perturbation.initial_instance_path]
+
+    # every input file, and every variant of it, gets its own random stream derived from the perturbation's one, so a
+    # variant is the same whether it is generated in this process or in a worker process
+    tasks, sequences = [], []
+    for input_file_path, file_sequence in zip(input_files, sequence.spawn(len(input_files))):
+        variant_sequences = file_sequence.spawn(perturbation.generated_instances_number)
+        for var_no in range(1, perturbation.generated_instances_number + 1):
+            tasks.append(VariantTask(perturbation, input_file_path, output_file_path, var_no))
+            sequences.append(variant_sequences[var_no - 1])
+
+    return tasks, sequences
+
+
+def process_variant(task: VariantTask, context: GenerationContext = None) -> None:
+    """
+    Generates a variant of an instance. The random generators are already seeded from the stream of the variant
+    """
+    instance = load_instance(task.input_file_path)
+    tree = task.perturbation.perturb(instance, instance.get_any_tree())
+
+    resolver = Resolver('name')
+    root_node = resolver.get(tree, '.')
+    file_name = Path(task.input_file_path).stem
+    final_file_name = f'{task.output_file_path}/{file_name}_{task.perturbation.generated_instances_name}_ao{len(root_node.metainfo['operations_list'])}_am{len(root_node.metainfo['machines_list'])}_{task.var_no}.json'
+    export_tree(root_node, final_file_name)
+    rendered_tree = ""
+    for pre, _, node in render_rows(root_node):
+        rendered_tree += f"{pre} [{node.operationid}]  [{node.parentid}] [{node.code}]\n"
+        print(
+            f"{pre} [{node.operationid}]  [{node.parentid}] [{node.code}]")
+
+    with open(f'{final_file_name}.tree', "w", encoding="utf-8") as f:
+        f.write(rendered_tree)
+
+
+def process_perturbation(perturbation: PerturbationVariant, sequence: np.random.SeedSequence,
+                         workers: int = 1) -> List[TaskFailure]:
+    """
+    Generates all the variants of a perturbation
+    :return: the variants whose generation failed
+    """
+    tasks, sequences = variant_tasks(perturbation, sequence)
+    return run_batch(process_variant, tasks, sequences, [task.name for task in tasks], workers)
+
+
+def variate_instance(configuration_file_path : str, workers: int = 1) -> List[TaskFailure]:
+    """
+    Generates the variants of all the perturbations defined in the configuration file
+
+    :param configuration_file_path: the path of the configuration file
+    :param workers: the number of processes among which the variants are spread
+    :return: the variants whose generation failed
+    """
     #generate the list of all the perturbations variants
     all_perturbations = PerturbationVariantDecoder.build(configuration_file_path)
     print(configuration_file_path, all_perturbations)
     print("all_perturbations", len(all_perturbations))
-    for p in all_perturbations:
-        process_perturbation(p)
+
+    # the variants of all the perturbations and input files are spread together among the workers
+    tasks, sequences = [], []
+    for p, sequence in zip(all_perturbations, entry_sequences([p.seed for p in all_perturbations])):
+        perturbation_tasks, perturbation_sequences = variant_tasks(p, sequence)
+        tasks.extend(perturbation_tasks)
+        sequences.extend(perturbation_sequences)
+
+    return run_batch(process_variant, tasks, sequences, [task.name for task in tasks], workers)
 
 
 if __name__ == '__main__':
@@ -13,6 +13,7 @@ from enum import StrEnum, auto
 from anytree import Node, PreOrderIter
 
 import datagen.common.scampdate
+from datagen.common.criticalpath import critical_path
 from datagen.common.utility import get_abs_file_path
 from datagen.mono_variants.load_instance import Instance
 from datagen.mono_variants.perturbations_types import OperationGraphPerturbationParam, MachinesAssignmentPerturbationsParams
@@ -64,7 +65,7 @@ class PerturbationVariant(object):
         # the instance file from which variants are generated
         self.initial_instance_path: str = initial_instance_path
 
-        # seed used to initialize the random generator
+        # seed from which the random streams of the variants are derived
         self.seed: int = seed
 
         #the number of variants files generated from the initial instance file
@@ -127,25 +128,11 @@ class PerturbationVariant(object):
 
 
     def update_delivery_date(self, op_net : Node):
-        max_path_exec_time = 0
-        for leaf in PreOrderIter(op_net, filter_=lambda node: node.is_leaf):
-            execution_time = 0
-            quantity = 1
-            for operation in leaf.path:
-                quantity *= operation.quantity
-                max_exec_time = 0
-                for machine in operation.machines:
-                    exec_time =  machine['setup_time'] + quantity * machine['execution_time']
-                    if exec_time > max_exec_time:
-                        max_exec_time = exec_time
-
-                execution_time += max_exec_time
-            if max_path_exec_time < execution_time:
-                max_path_exec_time = execution_time
-            print(len(list(leaf.path)), max_exec_time)
-
-
-            print("path:", leaf.path)
+        """
+        Moves the delivery date after the end of the longest processing path, if the path does not fit before it
+        :param op_net: the operation graph
+        """
+        max_path_exec_time = critical_path(op_net).length
         start = datetime.strptime(op_net.start_date, datemask())
         stop = datetime.strptime(op_net.delivery_date, datemask())
         print("length: ", (stop-start).total_seconds())
@@ -167,7 +154,8 @@ class PerturbationVariant(object):
             for machine in operation.machines:
                 used_machine.add(machine["id"])
 
-        op_net.metainfo['maintenances'] = [maintenance for maintenance in instance.maintenances_list if
+        # the maintenances are copied, the renumerotation of the machines must not change the ones of the instance
+        op_net.metainfo['maintenances'] = [dict(maintenance) for maintenance in instance.maintenances_list if
                                                maintenance["machineid"] in used_machine]
         op_net.metainfo['machines_list'] = list(used_machine)
 
@@ -200,7 +188,6 @@ class PerturbationOperationGraph(PerturbationVariant):
                          machines_renumerotation
                          )
         self.perturb_operations_graph: OperationGraphPerturbationParam = perturb_operations_graph
-        random.seed(self.seed)
 
     def __add_nodes(self, nodes_no: int, instance: Instance, op_net: Node):
         """
@@ -323,7 +310,6 @@ class PerturbationMachines(PerturbationVariant):
                          machines_renumerotation
                          )
         self.machine_assignment_perturbation: MachinesAssignmentPerturbationsParams = machine_assignment_perturbation
-        random.seed(self.seed)
 
 
     def __reassign(self, instance: Instance, op_net: Node):
@@ -390,7 +376,7 @@ class PerturbationMachines(PerturbationVariant):
             removed_machines = current_machines[:no_of_machines_to_be_removed]
             current_machines = current_machines[no_of_machines_to_be_removed:]
             current_machines.sort()
-            op_net.metainfo['maintenances'] = [maintenance for maintenance in instance.maintenances_list if maintenance["machineid"] in current_machines]
+            op_net.metainfo['maintenances'] = [dict(maintenance) for maintenance in instance.maintenances_list if maintenance["machineid"] in current_machines]
         else:
             #add machines in current list
             max_machine_id = max(current_machines) + 1
@@ -11,8 +11,10 @@ from json import JSONDecoder, load
 
 from datagen.common.utility import get_abs_file_path
 
+from datagen.common.maintenancegrid import InfeasibleMaintenanceError
 from datagen.multi.machineinfo import MachineInfo, UnitAssemblyTime, SetupTime, MaintenanceDuration, \
     MaintenanceInterval, OEE
+from datagen.multi.maintenance import Maintenance
 from datagen.multi.prodinfo import ProductInfo
 
 log = logging.getLogger("main")
@@ -60,10 +62,13 @@ class MultiBom:
     @machines_info: a list of machines that will be used as entries in the BOM tree
     """
 
-    def __init__(self, products_info, machines_info):
+    def __init__(self, products_info, machines_info, seed=None):
         self.products_info = products_info
         self.machines_info = machines_info
 
+        # the seed from which the random streams of the multi BOM are derived (optional)
+        self.seed = seed
+
 
 class MultiBoms:
     """
@@ -109,6 +114,7 @@ class MultiBomDecoder(JSONDecoder):
 
             products_info = []
             machines_info = None
+            seed = None
 
             for key in b.keys():
 
@@ -143,6 +149,8 @@ class MultiBomDecoder(JSONDecoder):
                     oee = OEE(**b[key])
                 elif key == "setup_time":
                     setup_time = SetupTime(**b[key])
+                elif key == "seed":
+                    seed = b[key]
 
             machine_info = MachineInfo(start_date,
                                        prod_number,
@@ -159,10 +167,15 @@ class MultiBomDecoder(JSONDecoder):
                                        oee,
                                        setup_time)
 
-            MultiBoms.add_multi_bom(MultiBom(products_info, machine_info))
+            try:
+                Maintenance.windows_of(maintenance_duration, maintenance_interval)
+            except InfeasibleMaintenanceError as e:
+                log.error(f"Invalid maintenance configuration for the multi BOM in {root_directory}: {e}")
+                raise
+
+            MultiBoms.add_multi_bom(MultiBom(products_info, machine_info, seed))
 
-            # TODO: check if really needed
-            return MultiBoms.get_all()
+        return MultiBoms.get_all()
 
     @classmethod
     def build(cls, configuration_file_path):
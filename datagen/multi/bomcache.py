@@ -1,10 +1,13 @@
+from datagen.common.context import ContextAttribute, current_context
+
+
 class BomCache:
     """
     Class representing a cache holding the current BOM, to be used from other modules
 
     @author Adrian
     """
-    bom = None
+    bom = ContextAttribute("bom")
 
     @classmethod
     def get_bom(cls):
@@ -12,18 +15,18 @@ class BomCache:
 
     @classmethod
     def add_bom(cls, bom):
-        cls.bom = bom
+        current_context().bom = bom
 
     @classmethod
     def reset(cls):
-        cls.bom = None
+        current_context().bom = None
 
 
 class MultiBomCache:
     """
     Class representing a cache holding the current MultiBOM representation, to be used from other modules
     """
-    multi_bom = None
+    multi_bom = ContextAttribute("multi_bom")
 
     @classmethod
     def get_bom(cls):
@@ -31,8 +34,8 @@ class MultiBomCache:
 
     @classmethod
     def add_bom(cls, multi_bom):
-        cls.multi_bom = multi_bom
+        current_context().multi_bom = multi_bom
 
     @classmethod
     def reset(cls):
-        cls.multi_bom = None
+        current_context().multi_bom = None
@@ -1,27 +1,30 @@
 import logging
 import random
-import json
+import sys
 
-from anytree import Node, RenderTree, PreOrderIter, AnyNode
-from anytree.exporter import DotExporter, JsonExporter
-from anytree.importer import JsonImporter
+from collections import deque
+
+from anytree import Node, AnyNode
+from anytree.exporter import DotExporter
 from anytree.walker import Walker
 
 from prettytable import PrettyTable
 
 from typing import List, Tuple
 
-from datagen.common.rootprod import RootProduct, RootNode
-from datagen.common.treeutil import NodeCounter
+from datagen.common.bomarrays import BomArrays
+from datagen.common.columnar import load_tree
+from datagen.common.jsonwriter import write_tree
+from datagen.common.treeutil import NodeCounter, preorder, render_rows
 from datagen.common.sequencer import Sequencer
 from datagen.common.config import PRINT_TABULAR_TREE_PATHS
+from datagen.common.pathsampler import PathSampler
 from datagen.common.stocks import Stocks
 from datagen.common.utility import get_abs_file_path
 
 from datagen.multi.quantity import Quantity
 from datagen.multi.metainfo import MetaInfo
 from datagen.multi.prodinfo import ProductInfo
-from datagen.multi.pathprods import PathProducts
 from datagen.multi.utility import save_bom
 from datagen.multi.root_dir import RootDir
 from datagen.multi.prodmachine import ProdMachines, ProdMachinesAll
@@ -61,41 +64,35 @@ def export_tree(n: Node, file_path: str, onscreen: bool = True) -> None:
     :param onscreen: if the exported json will be displayed on stdout too
     :return: None
     """
-    exporter = JsonExporter(indent=2, sort_keys=False)
-
-    onscreen = True
     if onscreen:
-        print(exporter.export(n))
+        write_tree(n, sys.stdout)
+        print()
 
-    save_bom(file_path, exporter, n)
+    save_bom(file_path, n)
 
 
 def import_tree(file_path: str) -> Node:
     """
-    Deserialize a tree from its associated JSON file
+    Deserialize a tree from its associated JSON (or .npz) file. The file is parsed only once, into BomArrays, and the
+    anytree nodes are built from the arrays
     :param file_path: the path to the file containing the object serialization
     :return: the Python tree object
     """
-
-    with open(file_path) as f:
-        tree_as_dict = json.load(f)
-
-    tree_as_str = json.dumps(tree_as_dict)
-    return JsonImporter().import_(tree_as_str)
+    return load_tree(file_path).to_anynode_tree()
 
 
 def render_tree(node: Node) -> None:
-    for line in RenderTree(node):
+    for pre, _, crt_node in render_rows(node):
         print(
-            f"{line.pre} [{line.node.productid}]  [{line.node.parentid}] [{line.node.code}]  [{line.node.pname}]")
+            f"{pre} [{crt_node.productid}]  [{crt_node.parentid}] [{crt_node.code}]  [{crt_node.pname}]")
 
 
 def simple_render_tree(node: Node, bom, OUTPUT_FILE) -> None:
     rendered_tree = ""
-    for line in RenderTree(node):
-        rendered_tree += f"{line.pre} [{line.node.operationid}]  [{line.node.parentid}] [{line.node.code}]\n"
+    for pre, _, crt_node in render_rows(node):
+        rendered_tree += f"{pre} [{crt_node.operationid}]  [{crt_node.parentid}] [{crt_node.code}]\n"
         print(
-            f"{line.pre} [{line.node.operationid}]  [{line.node.parentid}] [{line.node.code}]")
+            f"{pre} [{crt_node.operationid}]  [{crt_node.parentid}] [{crt_node.code}]")
 
     with open(get_abs_file_path(f"multiboms/{RootDir().get()}/{OUTPUT_FILE}.tree"), "w") as f:
         f.write(rendered_tree)
@@ -156,21 +153,24 @@ def walk(node, callback) -> None:
     :param callback: the function called for every walked node
     :return:
     """
-    for crt_node in PreOrderIter(node):
+    for crt_node in preorder(node):
         callback(crt_node)
 
 
-def create_children(node: Node,
+def create_children(tree: BomArrays,
+                    node: int,
                     num_children: int,
                     depth: int,
                     products: List,
                     bom: ProductInfo,
                     random_children: bool = False) -> None:
     """
-    This function will create a generic tree using recursion. The process looks to work slow
-    for large depths, should be replaced with a faster alternative, for now is usable
+    This function will create a generic tree level by level (breadth first). The nodes waiting for their children
+    are kept in a queue, so there is no recursion involved and the depth of the tree is not limited by the
+    recursion limit of the interpreter
 
-    :param node: the node to which the children are created and attached
+    :param tree: the array-backed tree in which the nodes are created
+    :param node: the index of the node to which the children are created and attached
     :param num_children: the number of children to be created for the specified node
     :param depth: the depth of the tree (the number of levels below the specified node)
     :param products:
@@ -181,73 +181,69 @@ def create_children(node: Node,
     :return:
     """
 
-    # exit condition
-    if depth == 0:
-        # if we are at this point, we need to reset the list of products for this path
-        # PathProducts.reset()
-        # walk_for_duplicates(node, RootNode().node, bom)
-        return
-
-    number_of_children = random.randint(1, num_children) if random_children else num_children
-    children_products = []
-    for i in range(number_of_children):
-
-        is_eligible_product = False
-
-        while not is_eligible_product:
-            product = random.choice(products)
-
-            # Check to see if the randomly chosen product is the root of the BOM. If yes, we need to do another pick
-            # The idea is that the root product cannot be used as a child of the BOM elsewhere. The root is the
-            # final product and that's it!
-            if product.pid == RootProduct.product.pid and product.pname == RootProduct.product.pname:
-                continue
-
-            if (product not in PathProducts.products) and (product not in children_products) and (product is not RootNode().node):
-                log.debug(f'{product.pid} is added to the path')
-                is_eligible_product = True
-                PathProducts.add_product(product)
-                children_products.append(product)
-            else:
-                log.debug(f'{product.pid} is a duplicate product. Picking a new one...')
-                print(f'{product.pid} is a duplicate product. Picking a new one...')
-                continue
+    # every entry holds the node, the maximum number of children and the number of levels still to be created below it
+    queue = deque([(node, num_children, depth)])
+
+    # the sampler excludes the products already used on the path from the root to the current node. The root is on
+    # the path too, so the root product cannot be used as a child of the BOM elsewhere. The root is the final product
+    # and that's it!
+    sampler = PathSampler(products)
+
+    while queue:
+        crt_node, crt_num_children, crt_depth = queue.popleft()
+
+        # exit condition
+        if crt_depth == 0:
+            continue
+
+        sampler.follow(tree, crt_node)
+
+        number_of_children = random.randint(1, crt_num_children) if random_children else crt_num_children
+        children_products = []
+        for i in range(number_of_children):
+            product = sampler.draw(int(tree.operationid[crt_node]))
+
+            # the children of a node must have distinct products too
+            sampler.exclude(product.pid)
+            children_products.append(product.pid)
+            log.debug(f'{product.pid} is added to the path')
 
-        operation_id = Sequencer().index
-        MetaInfo().add_metainfo(product, operation_id)
+            operation_id = Sequencer().index
+            MetaInfo().add_metainfo(product, operation_id)
 
-        ProdMachinesAll.add(ProdMachines(product.pid, product.machines))
+            ProdMachinesAll.add(ProdMachines(product.pid, product.machines))
 
-        with open("prod.log", "a") as f:
-            f.write(f"\nAdded {product.pid} to the list of products with machines")
+            with open("prod.log", "a") as f:
+                f.write(f"\nAdded {product.pid} to the list of products with machines")
 
-        quantity = Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max)
+            quantity = Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max)
 
-        new_node = f"AnyNode(" \
-                   f"parent=node, " \
-                   f"parentid={node.operationid}, " \
-                   f"operationid={operation_id}, " \
-                   f"productid={product.pid}, " \
-                   f"code='{product.code}', " \
-                   f"pname='{product.code}', " \
-                   f"quantity={quantity}, " \
-                   f"machines={product.machines})"
-        NodeCounter.counter += 1
-        log.debug(f"Current number of nodes in the tree is {NodeCounter.counter}")
+            new_node = tree.add_node(crt_node, {
+                "parentid": int(tree.operationid[crt_node]),
+                "operationid": operation_id,
+                "productid": product.pid,
+                "code": product.code,
+                "pname": product.code,
+                "quantity": quantity,
+                "machines": product.machines})
+            NodeCounter.counter += 1
+            log.debug(f"Current number of nodes in the tree is {NodeCounter.counter}")
 
-        create_children(eval(new_node), number_of_children, depth - 1, products, bom,
-                        random_children=random_children)  # recurse!
-        PathProducts.remove_product(product)
+            queue.append((new_node, number_of_children, crt_depth - 1))
 
+        for pid in children_products:
+            sampler.include(pid)
 
-def create_complex_tree(node: AnyNode, depth: int, products, bom: ProductInfo, num_children: int,
-                       random_children: bool) -> AnyNode:
+
+def create_complex_tree(tree: BomArrays, node: int, depth: int, products, bom: ProductInfo, num_children: int,
+                        random_children: bool) -> int:
     """
     This function is used to create a complex tree of products. The tree is much closer to the real life situations
     and it is a combination of an n-ary tree and one or more vertical trees, which are added at teh last level of
-    the n-ary tree.
+    the n-ary tree. The n-ary tree is created level by level (breadth first), without recursion.
 
-    :param node: The root node of the tree
+    :param tree: The array-backed tree in which the nodes are created
+    :param node: The index of the root node of the tree
     :param depth: The depth of the vertical tree
     :param products: The list of products from which we can choose
     :param bom: The BOM object
@@ -256,51 +252,58 @@ def create_complex_tree(node: AnyNode, depth: int, products, bom: ProductInfo, n
 
     @author: Adrian
     """
-    children_products = []
 
-    if depth == 0:
-        build_vertical_tree(bom, children_products, node, products)
-        return None
+    # every entry holds the node and the number of levels still to be created below it
+    queue = deque([(node, depth)])
 
-    number_of_children = random.randint(1, num_children) if random_children else num_children
+    # the sampler excludes the products already used on the path from the root to the current node
+    sampler = PathSampler(products)
 
-    for _ in range(number_of_children):
+    while queue:
+        crt_node, crt_depth = queue.popleft()
 
-        is_eligible_product = False
+        sampler.follow(tree, crt_node)
 
-        while not is_eligible_product:
-            product = random.choice(products)
+        if crt_depth == 0:
+            build_vertical_tree(tree, bom, sampler, crt_node)
+            continue
 
-            # Check to see if the randomly chosen product is the root of the BOM. If yes, we need to do another pick
-            # The idea is that the root product cannot be used as a child of the BOM elsewhere. The root is the
-            # final product and that's it!
+        number_of_children = random.randint(1, num_children) if random_children else num_children
+        children_products = []
 
-            if (product not in PathProducts.products) and (product not in children_products) and (product is not RootNode().node):
-                log.debug(f'{product.pid} is added to the path')
-                is_eligible_product = True
-                operation_id = Sequencer().index
-                MetaInfo().add_metainfo(product, operation_id)
-                ProdMachinesAll.add(ProdMachines(product.pid, product.machines))
-                PathProducts.add_product(product)
-                children_products.append(product)
-            else:
-                log.debug(f'The product with the id {product.pid} is a duplicate product. Picking a new one...')
-                continue
+        for _ in range(number_of_children):
+            product = sampler.draw(int(tree.operationid[crt_node]))
+
+            # the children of a node must have distinct products too
+            sampler.exclude(product.pid)
+            children_products.append(product.pid)
+            log.debug(f'{product.pid} is added to the path')
 
-            new_node_str = f"AnyNode(parent=node, parentid={node.operationid}, operationid={operation_id}, productid={product.pid}, " \
-                       f"code='{product.code}', pname='{product.code}', quantity={Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max)})"
+            operation_id = Sequencer().index
+            MetaInfo().add_metainfo(product, operation_id)
+            ProdMachinesAll.add(ProdMachines(product.pid, product.machines))
 
-            # no need to return the node from create_random_tree() function because the node is added to the tree based
-            # on the parent node
-            create_complex_tree(eval(new_node_str), depth - 1, products, bom, num_children, random_children)
-            PathProducts.remove_product(product)
+            new_node = tree.add_node(crt_node, {
+                "parentid": int(tree.operationid[crt_node]),
+                "operationid": operation_id,
+                "productid": product.pid,
+                "code": product.code,
+                "pname": product.code,
+                "quantity": Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max)})
+
+            queue.append((new_node, crt_depth - 1))
+
+        for pid in children_products:
+            sampler.include(pid)
 
     return node
 
 
-def build_vertical_tree(bom, children_products, node, products):
+def build_vertical_tree(tree: BomArrays, bom, sampler: PathSampler, node: int):
     """
     Builds a vertical tree of products. The vertical tree is added at the last level of the n-ary tree
+
+    :param sampler: the sampler of products, following the path from the root to the node
     """
 
     generate_tree = random.random() < bom.vertical_tree_depth.probability
@@ -309,49 +312,32 @@ def build_vertical_tree(bom, children_products, node, products):
         current_node = node
         tree_depth = bom.vertical_tree_depth.get_depth(bom.vertical_tree_depth.min, bom.vertical_tree_depth.step,
                                                        bom.vertical_tree_depth.max)
-        for i in range(tree_depth):
-
-            while True:
-
-                product = random.choice(products)
 
-                # Check to see if the randomly chosen product is the root of the BOM. If yes, we need to do
-                # another pick. The idea is that the root product cannot be used as a child of the BOM elsewhere.
-                # The root is the final product and that's it!
-
-                if (product not in PathProducts.products) and (product not in children_products) and (
-                        product is not RootNode().node):
-                    log.debug(f'The product with the id {product.pid} is added to the path')
-                    operation_id = Sequencer().index
-                    MetaInfo().add_metainfo(product, operation_id)
-                    ProdMachinesAll.add(ProdMachines(product.pid, product.machines))
-                    children_products.append(product)
-                    break
-                else:
-                    log.debug(f'The product with the id {product.pid} is a duplicate product. Picking a new one...')
+        for i in range(tree_depth):
+            product = sampler.draw(int(tree.operationid[current_node]))
+            log.debug(f'The product with the id {product.pid} is added to the path')
+            operation_id = Sequencer().index
+            MetaInfo().add_metainfo(product, operation_id)
+            ProdMachinesAll.add(ProdMachines(product.pid, product.machines))
 
             if i == tree_depth - 1:
                 """
                 We are at the leaf level of the vertical tree.
                 """
-                new_node_str = f"AnyNode(" \
-                               f"parent=current_node, " \
-                               f"parentid={current_node.operationid}, " \
-                               f"operationid={operation_id}, " \
-                               f"raw_material_id={random.choice(Stocks().stocks).id}, " \
-                               f"raw_material_quantity={random.randint(1, 10)}, " \
-                               f"productid={product.pid}, " \
-                               f"code='{product.code}', " \
-                               f"pname='{product.code}', " \
-                               f"quantity={Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max)})"
-                current_node = eval(new_node_str)
+                attributes = {"parentid": int(tree.operationid[current_node]),
+                              "operationid": operation_id,
+                              "raw_material_id": random.choice(Stocks().stocks).id,
+                              "raw_material_quantity": random.randint(1, 10)}
             else:
-                new_node_str = f"AnyNode(" \
-                               f"parent=current_node, " \
-                               f"parentid={current_node.operationid}, " \
-                               f"operationid={operation_id}, " \
-                               f"productid={product.pid}, " \
-                               f"code='{product.code}', " \
-                               f"pname='{product.code}', " \
-                               f"quantity={Quantity.get_quantity(bom.quantity.min, bom.quantity.step, bom.quantity.max)})"
-                current_node = eval(new_node_str)
+                attributes = {"parentid": int(tree.operationid[current_node]),
+                              "operationid": operation_id}
+
+            attributes.update({"productid": product.pid,
+                               "code": product.code,
+                               "pname": product.code,
+                               "quantity": Quantity.get_quantity(bom.quantity.min, bom.quantity.step,
+                                                                 bom.quantity.max)})
+            current_node = tree.add_node(current_node, attributes)
+
+            # the products of the vertical tree are on the path of its nodes too
+            sampler.follow(tree, current_node)
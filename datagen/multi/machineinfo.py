@@ -6,13 +6,11 @@ This module is related to the machines information in the system
 import random
 
 class UnitAssemblyTime:
-    def __init__(self, min: int, max: int, step: int, time_units: str, seed : int = None):
+    def __init__(self, min: int, max: int, step: int, time_units: str):
         self.min = min
         self.max = max
         self.step = step
         self.time_units = time_units
-        if seed is not None:
-            random.seed(seed)
 
     def generate_value(self) -> int:
         return random.randint(self.min, self.max)
@@ -40,13 +38,11 @@ class OEE:
 
 
 class SetupTime:
-    def __init__(self, min: int, max: int, step: int, time_units: str, seed : int = None):
+    def __init__(self, min: int, max: int, step: int, time_units: str):
         self.min = min
         self.max = max
         self.step = step
         self.time_units = time_units
-        if seed is not None:
-            random.seed(seed)
 
     def generate_value(self) -> int:
         return random.randint(self.min, self.max)
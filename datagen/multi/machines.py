@@ -4,15 +4,17 @@ import logging
 from json import JSONEncoder, dumps, load
 from typing import Any, List, AnyStr, Dict
 from anytree.exporter import JsonExporter
-from scipy.stats import norm, truncnorm
 
-from datagen.common.utility import get_abs_file_path
+from datagen.common.assembly import sample_oee
+from datagen.common.context import ContextAttribute
+from datagen.common.utility import get_abs_file_path, check_and_create_if_not_exists
 
 from datagen.multi.msequencer import MachineSequencer
 from datagen.multi.distribution import distribution_params
 
 # the file where machines are written, in order to build the Machine objects
-MACHINES_FILE = "temp/machines.json"
+# the file where the machines of a multi BOM are written, in its root directory
+MACHINES_FILE = "machines.json"
 
 log = logging.getLogger("main")
 
@@ -69,8 +71,11 @@ class Machines:
     Class containing all the machines in our system
     """
 
-    # list of Machine instances
-    machines: List[Machine] = []
+    # list of Machine instances, kept in the active generation context
+    machines: List[Machine] = ContextAttribute("machines")
+
+    # the same Machine instances, indexed by their id
+    machines_by_id: Dict[int, Machine] = ContextAttribute("machines_by_id")
 
     def __init__(self, bom):
 
@@ -93,9 +98,7 @@ class Machines:
         :param id:
         :return:
         """
-        for m in cls.machines:
-            if m.id == id:
-                return m
+        return cls.machines_by_id.get(id)
 
     def build(self) -> List[Machine]:
         """
@@ -109,32 +112,21 @@ class Machines:
         # be sure to start with a clear list of machines
         if len(self.machines) > 0:
             self.machines.clear()
+        Machines.machines_by_id.clear()
 
         # get the number of machines from the BOM
         machines_number = self.bom.machines_info.machines_number
 
-        # here we build the machines by passing a unique identifier, a name and a random OEE value
-        for _ in range(machines_number):
-            if self.bom.machines_info.oee.distribution == "normal":
-                mean, std_dev = distribution_params(self.bom)
-
-                # normal distribution (no truncation)
-                # machine_oee = round(norm.rvs(mean, std_dev), 3)
-
-                # use truncated normal distribution
-                truncated_norm = truncnorm((self.bom.machines_info.oee.min - mean) / std_dev,
-                                           (self.bom.machines_info.oee.max - mean) / std_dev,
-                                           loc=mean, scale=std_dev)
-                machine_oee = round((truncated_norm.rvs(1)[0]), 3)
-
-            elif self.bom.oee.distribution == "uniform":
-                machine_oee = round(random.randrange(self.bom.oee.min, self.bom.oee.max), 3)
-            else:
-                raise ValueError("Not a valid value for the statistical distribution")
+        # the OEE values of all the machines are drawn in a single call, from a distribution built once
+        mean, std_dev = distribution_params(self.bom)
+        oee_values = sample_oee(self.bom.machines_info.oee, mean, std_dev, machines_number)
 
+        # here we build the machines by passing a unique identifier, a name and a random OEE value
+        for machine_oee in oee_values:
             crt_machine = Machine(id=MachineSequencer().id, oee=machine_oee)
 
             Machines.machines.append(crt_machine)
+            Machines.machines_by_id[crt_machine.id] = crt_machine
 
         return Machines.machines
 
@@ -157,14 +149,15 @@ class Machines:
         for m in self.machines:
             encoded_machines.append(encoder.encode(m))
 
-        with open(get_abs_file_path(MACHINES_FILE), "w") as f:
+        check_and_create_if_not_exists(f"multiboms/{self.bom.machines_info.root_directory}")
+        with open(get_abs_file_path(f"multiboms/{self.bom.machines_info.root_directory}/{MACHINES_FILE}"), "w") as f:
             f.write(dumps(encoded_machines, indent=4))
 
     @classmethod
-    def import_machines(cls):
+    def import_machines(cls, multi_bom):
         decoded_machines = None
         try:
-            with open(get_abs_file_path(MACHINES_FILE)) as f:
+            with open(get_abs_file_path(f"multiboms/{multi_bom.machines_info.root_directory}/{MACHINES_FILE}")) as f:
                 decoded_machines = load(f)
         except FileNotFoundError as e:
             log.error("The source file for machines was not found...")
@@ -14,15 +14,22 @@ import datagen.common.maintenances
 
 from datetime import datetime
 from random import choice
+from typing import List
 
-from anytree import Node, RenderTree, Resolver
+from anytree import Node, Resolver
 
+from datagen.common.bomarrays import BomArrays
 from datagen.common.rootprod import RootProduct, RootNode
 from datagen.common.sequencer import Sequencer
 from datagen.common.scampdate import datemask
 from datagen.common.config import GENERATE_SIMPLE_TREE
+from datagen.common.context import GenerationContext, current_context
+from datagen.common.maintenancegrid import draw_maintenances
+from datagen.common.rng import entry_sequences, seed_generators
 from datagen.common.stocks import Stocks
+from datagen.common.treeutil import render_text
 from datagen.common.utility import check_and_create_if_not_exists, get_abs_file_path
+from datagen.common.workers import TaskFailure, run_batch
 
 from datagen.multi.bom import MultiBomDecoder, MultiBoms, MultiBom
 from datagen.multi.maintenance import Maintenance
@@ -52,10 +59,11 @@ def print_name(node: Node) -> None:
 
 def max_nodes_number(children: int, depth: int) -> int:
     """
-    Computes the maximum number of nodes for the BOM tree (m-ary tree) based on its depth and children per node
+    Computes the maximum number of nodes for the BOM tree (m-ary tree) based on its depth and children per node. A tree
+    of depth d has d + 1 levels, the root being on level 0 and the leaves on level d
     """
     max_nodes = 0
-    for i in range(depth):
+    for i in range(depth + 1):
         max_nodes += pow(children, i)
     return max_nodes
 
@@ -72,7 +80,19 @@ def compute_end_delivery_date(multi_bom: MultiBom) -> datetime:
     return max(all_end_delivery_dates)
 
 
-def process_bom(multi_bom: MultiBom) -> None:
+def process_bom(multi_bom: MultiBom, context: GenerationContext = None) -> None:
+    """
+    Generates a multi BOM in the passed generation context (a new one if none is passed). The products, machines,
+    stocks and ids generated for a multi BOM are shared by its BOMs, but never by two multi BOMs
+
+    :param multi_bom: the multi BOM entry from the multi-config.json file
+    :param context: the generation context owning the state of this multi BOM
+    """
+    with (context or GenerationContext()).activate():
+        generate_multi_bom(multi_bom)
+
+
+def generate_multi_bom(multi_bom: MultiBom) -> None:
     """
     Because we have to do with a multiple BOM, we have to iterate over all the BOMs defined in the multi-config.json
     and generate the trees for each of them
@@ -87,6 +107,9 @@ def process_bom(multi_bom: MultiBom) -> None:
     bomcache.MultiBomCache.add_bom(multi_bom)
     RootDir().set(multi_bom.machines_info.root_directory)
 
+    # the sampler of the maintenance dates, shared by all the BOMs of the multi BOM
+    maintenance_windows = Maintenance.get_maintenance_windows()
+
     # generate the products that will be used to populate the BOM tree
     random_product_generator = RandomProductGenerator(multi_bom)
     random_product_generator.generate_products()
@@ -96,7 +119,14 @@ def process_bom(multi_bom: MultiBom) -> None:
     stocks_generator.generate_stocks(multi_bom)
     stocks_generator.export(multi_bom)
 
-    for crt_bom in multi_bom.products_info:
+    # every BOM of the multi BOM gets its own random stream, spawned from the stream of the multi BOM
+    bom_sequences = current_context().seed_sequence.spawn(len(multi_bom.products_info))
+
+    # the trees of the multi BOM, with the machines and the maintenances they were generated with, checked at the end
+    generated_trees = []
+
+    for crt_bom, bom_sequence in zip(multi_bom.products_info, bom_sequences):
+        seed_generators(bom_sequence)
 
         # if one need to attach the vertical tree to the n-ary tree
         # to avoid having the auxiliary vertical tree, set the min parameter of the vertical_tree_depth in the
@@ -161,35 +191,45 @@ def process_bom(multi_bom: MultiBom) -> None:
         MetaInfo().add_metainfo(root_product, root_operation)
         ProdMachinesAll.add(ProdMachines(root_product.pid, root_product.machines))
 
-        root = Node("root", parent=None, operationid=root_operation, productid=root_product.pid,
-                    code=root_product.code, pname=root_product.code,
-                    parentid=None, start_date=multi_bom.machines_info.start_date,
-                    delivery_date=crt_bom.delivery_date,
-                    priority=random.randint(1, 10),
-                    quantity=Quantity.get_quantity(crt_bom.quantity.min,
-                                                   crt_bom.quantity.step,
-                                                   crt_bom.quantity.max))
-
-        RootNode().add_node(root)
+        # the tree is built in an array-backed structure and converted to anytree only when it is exported. The arrays
+        # are sized up front for the maximum number of nodes of the tree, including the vertical trees on the leaves
+        if GENERATE_COMPLEX_TREE:
+            MAX_NODES_NUMBER += pow(MAX_CHILDREN, MAX_DEPTH) * crt_bom.vertical_tree_depth.max
+        tree = BomArrays(capacity=MAX_NODES_NUMBER)
+        root_index = tree.add_node(-1, {"operationid": root_operation, "productid": root_product.pid,
+                                        "code": root_product.code, "pname": root_product.code,
+                                        "parentid": None, "start_date": multi_bom.machines_info.start_date,
+                                        "delivery_date": crt_bom.delivery_date,
+                                        "priority": random.randint(1, 10),
+                                        "quantity": Quantity.get_quantity(crt_bom.quantity.min,
+                                                                          crt_bom.quantity.step,
+                                                                          crt_bom.quantity.max),
+                                        "name": "root"})
 
         if GENERATE_COMPLEX_TREE:
-            create_complex_tree(root, MAX_DEPTH, products, crt_bom, MAX_CHILDREN, random_children=RANDOMIZE_CHILDREN)
+            create_complex_tree(tree, root_index, MAX_DEPTH, products, crt_bom, MAX_CHILDREN,
+                                random_children=RANDOMIZE_CHILDREN)
         else:
             # effectively create the generic tree
-            create_children(root, MAX_CHILDREN, MAX_DEPTH, products, crt_bom, random_children=RANDOMIZE_CHILDREN)
+            create_children(tree, root_index, MAX_CHILDREN, MAX_DEPTH, products, crt_bom,
+                            random_children=RANDOMIZE_CHILDREN)
 
-        # generate the associated maintenances for the machines involved in root product, if necessary
-        for i in maintenance_intervals:
-            for crt_machine_id in MetaInfo().machines:
-                if RandomProductGenerator.is_maintenance_generated(multi_bom):
-                    crt_machine = Machines.get(crt_machine_id)
-                    actual_maintenance_interval = Maintenance.build_maintenance_dates_ex(i[0], i[1])
-                    datagen.common.maintenances.Maintenances.add(Maintenance(crt_machine, actual_maintenance_interval[0],
-                                                              actual_maintenance_interval[1]))
+        root = tree.to_anytree()
+        RootNode().add_node(root)
+
+        # generate the associated maintenances for the machines involved in root product, if necessary. The whole
+        # interval-by-machine grid is decided and sampled at once
+        for crt_machine_id, start_date, end_date in draw_maintenances(
+                maintenance_intervals, MetaInfo().get_machines(), multi_bom.machines_info.maintenance_probability,
+                maintenance_windows):
+            crt_machine = Machines.get(crt_machine_id)
+            datagen.common.maintenances.Maintenances.add(Maintenance(crt_machine, start_date, end_date))
 
         all_maintenances = datagen.common.maintenances.Maintenances.get_maintenances()
         all_encoded_maintenances = datagen.common.maintenances.Maintenances().to_json()
 
+        generated_trees.append((root, MetaInfo().get_machines(), all_encoded_maintenances))
+
         # decorate the root node with some meta information  related to the products ids in the BOM and
         # the list of the unique ids of the alternate machines involved in the BOM
         resolver = Resolver('name')
@@ -201,7 +241,7 @@ def process_bom(multi_bom: MultiBom) -> None:
         export_tree(root, get_abs_file_path(f"multiboms/{RootDir().get()}/{OUTPUT_FILE}"), False)
 
         # print the tree to the console for visualization
-        print(RenderTree(root))
+        print(render_text(root))
 
         node = import_tree(get_abs_file_path(f"multiboms/{RootDir().get()}/{OUTPUT_FILE}"))
         render_tree(node)
@@ -213,7 +253,7 @@ def process_bom(multi_bom: MultiBom) -> None:
             simple_tree_root_node = resolver.get(root, '/root')
 
             # render the smaller tree for debugging purposes
-            print(RenderTree(simple_tree_root_node))
+            print(render_text(simple_tree_root_node))
 
             simple_tree_node = import_tree(get_abs_file_path(f"multiboms/{RootDir().get()}/{OUTPUT_FILE}"))
             simple_render_tree(simple_tree_root_node, crt_bom, OUTPUT_FILE)
@@ -227,19 +267,31 @@ def process_bom(multi_bom: MultiBom) -> None:
 
     print("Running the sanity checker...")
 
-    SanityChecker(root, metainfo).walk(root)
+    # every tree is checked against the machines and the maintenances it was generated with
+    for crt_root, crt_machines, crt_maintenances in generated_trees:
+        SanityChecker(crt_root, {"machines_list": crt_machines, "maintenances": crt_maintenances,
+                                 "prod_machines": metainfo["prod_machines"]}).walk(crt_root)
 
     print("End of sanity check...")
 
 
-def start(configuration_file_path : str) -> None:
+def start(configuration_file_path : str, workers: int = 1) -> List[TaskFailure]:
+    """
+    Generates all the multi BOMs defined in the configuration file
+
+    :param configuration_file_path: the path of the configuration file
+    :param workers: the number of processes among which the multi BOMs are spread
+    :return: the multi BOMs whose generation failed
+    """
     MultiBomDecoder.build(configuration_file_path)
 
     # all the BOMS in the system
     all_boms = MultiBoms.get_all()
 
-    for multi_bom in all_boms:
-        process_bom(multi_bom)
+    # every multi BOM is generated in a fresh context, with the random generators seeded from a stream derived from its
+    # seed and its position in the configuration file
+    return run_batch(process_bom, all_boms, entry_sequences([multi_bom.seed for multi_bom in all_boms]),
+                     [multi_bom.machines_info.root_directory for multi_bom in all_boms], workers)
 
 
 if __name__ == "__main__":
@@ -247,11 +299,4 @@ if __name__ == "__main__":
     check_and_create_if_not_exists("multiboms")
     check_and_create_if_not_exists("temp")
 
-    MultiBomDecoder.build("config/multi-config.json")
-
-    # all the BOMS in the system
-    all_boms = MultiBoms.get_all()
-
-    for multi_bom in all_boms:
-
-        process_bom(multi_bom)
+    start("config/multi-config.json")
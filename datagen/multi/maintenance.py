@@ -1,12 +1,11 @@
-import datetime as dt
-import math
-import random
-
 from typing import Any, Dict, List, Tuple
 from datetime import datetime
 
 from datagen.multi.bomcache import BomCache, MultiBomCache
 
+import numpy as np
+
+from datagen.common.maintenancegrid import MaintenanceWindows, format_date, interval_grid, parse_date
 from datagen.common.scampdate import datemask
 from datagen.common.sequencer import Sequencer
 
@@ -67,7 +66,7 @@ class Maintenance(object):
             return NotImplemented
 
     def __hash__(self) -> int:
-        return hash((self.machineid,))
+        return hash((self.machineid, self.start_date, self.end_date))
 
     @staticmethod
     def to_hours(val: int, time_units: str) -> int:
@@ -122,179 +121,48 @@ class Maintenance(object):
 
 
     @classmethod
-    def get_maintenance_intervals(cls, multi_bom) -> List:
+    def get_maintenance_intervals(cls, multi_bom) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Computes the maintenance intervals possible inside the product's lifecycle
+        Computes the maintenance intervals possible inside the product's lifecycle, as datetime64 arrays holding the
+        start dates and the end dates of the intervals
         """
-        bom = BomCache.get_bom()
-        prod_start_date = multi_bom.machines_info.start_date
-        prod_end_date = cls.compute_end_delivery_date(multi_bom).strftime(datemask())
-
-        maintenance_interval_value = multi_bom.machines_info.maintenance_interval.duration
-        maintenance_interval_time_units = multi_bom.machines_info.maintenance_interval.time_units
-
-        maintenance_interval_hours = cls.to_hours(maintenance_interval_value, maintenance_interval_time_units)
-        maintenance_interval_seconds = cls.to_seconds(maintenance_interval_hours, "hours")
-
-        # how long it takes to make a product
-        duration = dt.datetime.strptime(prod_end_date, datemask()) - dt.datetime.strptime(
-            prod_start_date, datemask())
-        duration_in_sec = duration.total_seconds()
-
-        maintenance_occurrences = int(duration_in_sec / maintenance_interval_seconds)
-        maintenance_intervals = []
-
-        for i in range(maintenance_occurrences):
-            interval = list()
-            start_interval = dt.datetime.strptime(prod_start_date, datemask()) + \
-                dt.timedelta(hours=(i * maintenance_interval_hours))
-            end_interval = dt.datetime.strptime(prod_start_date, datemask()) + \
-                dt.timedelta(hours=((i + 1) * maintenance_interval_hours))
-            if end_interval <= cls.compute_end_delivery_date(multi_bom):
-                interval.append(start_interval)
-                interval.append(end_interval)
-                maintenance_intervals.append(interval)
-
-        return maintenance_intervals
-
-    def build_maintenance_dates(self) -> Tuple[str, str]:
-
-        bom = BomCache.get_bom()
-        step = bom.maintenance_duration.step
-        min_duration = bom.maintenance_duration.min_duration
-        max_duration = bom.maintenance_duration.max_duration
-        time_units = bom.maintenance_duration.time_units
-
-        maintenance_interval_value = bom.maintenance_interval.duration
-        maintenance_interval_time_units = bom.maintenance_interval.time_units
-
-        maintenance_interval_hours = self.to_hours(maintenance_interval_value, maintenance_interval_time_units)
-
-        # determine the value of the step param, expressed in hours
-        step_in_hours = self.to_hours(step, time_units)
-
-        # number of steps in the interval [start_interval, end_interval]
-        steps_number = int(maintenance_interval_hours // step_in_hours)
-
-        # delta between max_duration and min_duration
-        maintenance_delta = self.to_hours(max_duration, time_units) - self.to_hours(min_duration, time_units)
-
-        # number of possible steps inside the maintenance period
-        steps_in_maintenance = math.floor(int(maintenance_delta / step_in_hours))
-
-        # flag to check if the generated pair of dates satisfies the limit conditions
-        right_pair_values = False
-
-        # to create the maintenance dates, we take a random number from the interval [1, steps_number]
-        # and we use it as time delta to define the maintenance_start_date. Then, we add the defined step to
-        # define the maintenance_end_date. We check then against the limits of the product dates
-
-        maintenance_dates = []
-
-        for k in range(len(self.maintenance_interval)):
-            while not right_pair_values:
-
-                # create a list containing possible value for the maintenance, containing the min and the max duration.
-                # the values are expressed in hours
-                possible_maintenances = {self.to_hours(min_duration, time_units),
-                                         self.to_hours(max_duration, time_units)}
-
-                random_start = random.randint(1, steps_number)
-                maintenance_start_date = self.maintenance_interval[k][0] + dt.timedelta(hours=random_start)
-                random_duration = self.to_hours(min_duration, time_units) + random.randint(1,
-                                                                                           steps_in_maintenance) * step_in_hours
-                possible_maintenances.add(random_duration)
+        machines_info = multi_bom.machines_info
 
-                # extract a random value of duration from the possible ones
-                random_interval = random.choice(list(possible_maintenances))
-                maintenance_end_date = maintenance_start_date + dt.timedelta(hours=random_interval)
+        maintenance_interval_hours = cls.to_hours(machines_info.maintenance_interval.duration,
+                                                  machines_info.maintenance_interval.time_units)
 
-                maintenance_interval_end_date = self.maintenance_interval[k][1]
+        # the end delivery date is computed once, for all the intervals
+        return interval_grid(parse_date(machines_info.start_date),
+                             np.datetime64(cls.compute_end_delivery_date(multi_bom), "us"),
+                             maintenance_interval_hours)
 
-                if maintenance_start_date < maintenance_interval_end_date \
-                        and maintenance_end_date < maintenance_interval_end_date \
-                        and maintenance_start_date < maintenance_end_date:
-
-                    maintenance_dates_tmp = (maintenance_start_date.strftime(datemask()),
-                                             maintenance_end_date.strftime(datemask()))
-                    maintenance_dates.append(maintenance_dates_tmp)
-                    right_pair_values = False
-                    break
+    @classmethod
+    def windows_of(cls, maintenance_duration: MaintenanceDuration,
+                   maintenance_interval: MaintenanceInterval) -> MaintenanceWindows:
+        """
+        Builds the sampler of the maintenance dates from a maintenance duration and a maintenance interval. For
+        example, a maintenance interval is defined by a start date and an end date, and the sampled maintenance is an
+        inner interval, smaller.
 
-        # avoid the maintenance_interval field to be serialized, se we delete it
-        del self.maintenance_interval
+        :raise InfeasibleMaintenanceError: if no maintenance of the given duration fits inside a maintenance interval
+        """
+        time_units = maintenance_duration.time_units
 
-        return maintenance_dates
+        return MaintenanceWindows(cls.to_hours(maintenance_interval.duration, maintenance_interval.time_units),
+                                  cls.to_hours(maintenance_duration.min_duration, time_units),
+                                  cls.to_hours(maintenance_duration.max_duration, time_units),
+                                  cls.to_hours(maintenance_duration.step, time_units))
 
     @classmethod
-    def build_maintenance_dates_ex(cls, start_maintenance_interval, end_maintenance_interval) -> Tuple[str, str]:
+    def get_maintenance_windows(cls) -> MaintenanceWindows:
         """
-        Computes the maintenance dates inside a maintenance interval. For example, a maintenance interval is defined
-        by a start date and an end date, and the result of the computation is an inner interval, smaller.
+        Builds the sampler of the maintenance dates inside the maintenance intervals of the multi BOM
         """
+        machines_info = MultiBomCache.get_bom().machines_info
 
-        bom = MultiBomCache.get_bom()
-        step = bom.machines_info.maintenance_duration.step
-        min_duration = bom.machines_info.maintenance_duration.min_duration
-        max_duration = bom.machines_info.maintenance_duration.max_duration
-        time_units = bom.machines_info.maintenance_duration.time_units
-
-        maintenance_interval_value = bom.machines_info.maintenance_interval.duration
-        maintenance_interval_time_units = bom.machines_info.maintenance_interval.time_units
-
-        maintenance_interval_hours = cls.to_hours(maintenance_interval_value, maintenance_interval_time_units)
-
-        # determine the value of the step param, expressed in hours
-        step_in_hours = cls.to_hours(step, time_units)
-
-        # number of steps in the interval [start_interval, end_interval]
-        steps_number = int(maintenance_interval_hours // step_in_hours)
-
-        # delta between max_duration and min_duration
-        maintenance_delta = cls.to_hours(max_duration, time_units) - cls.to_hours(min_duration, time_units)
-
-        # number of possible steps inside the maintenance period
-        steps_in_maintenance = math.floor(int(maintenance_delta / step_in_hours))
-
-        # flag to check if the generated pair of dates satisfies the limit conditions
-        right_pair_values = False
-
-        # to create the maintenance dates, we take a random number from the interval [1, steps_number]
-        # and we use it as time delta to define the maintenance_start_date. Then, we add the defined step to
-        # define the maintenance_end_date. We check then against the limits of the product dates
-
-        maintenance_dates = []
-
-        while not right_pair_values:
-
-            # create a list containing possible value for the maintenance, containing the min and the max duration.
-            # the values are expressed in hours
-            possible_maintenances = {cls.to_hours(min_duration, time_units),
-                                     cls.to_hours(max_duration, time_units)}
-
-            random_start = random.randint(1, steps_number)
-            maintenance_start_date = start_maintenance_interval + dt.timedelta(hours=random_start)
-            random_duration = cls.to_hours(min_duration, time_units) + random.randint(1,
-                                                                                      steps_in_maintenance) * step_in_hours
-            possible_maintenances.add(random_duration)
-
-            # extract a random value of duration from the possible ones
-            random_interval = random.choice(list(possible_maintenances))
-            maintenance_end_date = maintenance_start_date + dt.timedelta(hours=random_interval)
-
-            maintenance_interval_end_date = end_maintenance_interval
-
-            if maintenance_start_date < maintenance_interval_end_date \
-                    and maintenance_end_date < maintenance_interval_end_date \
-                    and maintenance_start_date < maintenance_end_date:
-
-                maintenance_dates_tmp = (maintenance_start_date.strftime(datemask()),
-                                         maintenance_end_date.strftime(datemask()))
-                maintenance_dates.append(maintenance_dates_tmp)
-                right_pair_values = False
-                break
-
-        return maintenance_dates_tmp
+        return cls.windows_of(machines_info.maintenance_duration, machines_info.maintenance_interval)
 
     def to_json(self):
-        return self.__dict__
+        # the dates are kept as datetime64 values and formatted only when the maintenance is exported
+        return {"id": self.id, "machineid": self.machineid, "start_date": format_date(self.start_date),
+                "end_date": format_date(self.end_date)}
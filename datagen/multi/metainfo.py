@@ -1,6 +1,7 @@
 from json import JSONEncoder, dumps
 from typing import List, Dict, Any
 
+from datagen.common.context import ContextAttribute
 from datagen.multi.utility import save_metainfo
 from datagen.multi.prodmachine import ProdMachines, ProdMachinesAll
 
@@ -13,6 +14,13 @@ class MetaInfo(object):
     """
     instance = None
 
+    # the meta information is kept in the active generation context. The machines are kept as the keys of an
+    # insertion-ordered dictionary and sorted only when they are gathered
+    products = ContextAttribute("meta_products")
+    operations = ContextAttribute("meta_operations")
+    machines = ContextAttribute("meta_machines")
+    prod_machines = ContextAttribute("meta_prod_machines")
+
     def __new__(cls, *args, **kwargs):
         if cls.instance is None:
             cls.instance = super().__new__(cls, *args, **kwargs)
@@ -31,40 +39,24 @@ class MetaInfo(object):
         save_metainfo(f"metainfo.json", metainfo)
 
     def add_product(self, prodid: int) -> None:
-        if not hasattr(self, 'products'):
-            setattr(self, 'products', [])
-
         self.products.append(prodid)
 
     def add_operation(self, opid: int) -> None:
         """
         Adds the operation meta information in the BOM
         """
-        if not hasattr(self, 'operations'):
-            # the field below is added on a post-creation phase, it is not declared in the constructor
-            self.operations = []
-
         self.operations.append(opid)
 
     def add_machine(self, machineid: int) -> None:
         """
         Adds the machines involved in the fabrication of the product described in BOM
         """
-        if not hasattr(self, 'machines'):
-            setattr(self, 'machines', [])
-
-        # add the attributes below outside the constructor, in a late decoration phase
-        self.machines.append(machineid)
-        self.machines = list(set(self.machines))
+        self.machines[machineid] = None
 
     def add_prod_machines(self, prodid: int, machines: List[int]) -> None:
         """
         Adds the machines involved in the fabrication of the product described in BOM
         """
-        if not hasattr(self, 'prod_machines'):
-            # the field below is added on a post-creation phase, it is not declared in the constructor
-            self.prod_machines = []
-
         prod_machines = ProdMachines(prodid, machines)
         self.prod_machines.append(prod_machines)
 
@@ -78,15 +70,13 @@ class MetaInfo(object):
         """
         Clears the operations list
         """
-        if hasattr(self, 'operations'):
-            self.operations.clear()
+        self.operations.clear()
 
     def reset_machines(self):
         """
         Cleans the machines list
         """
-        if hasattr(self, 'machines'):
-            self.machines.clear()
+        self.machines.clear()
 
     def get_products(self):
         """
@@ -102,9 +92,9 @@ class MetaInfo(object):
 
     def get_machines(self):
         """
-        Gathers the list of all machines
+        Gathers the list of all machines, sorted by id
         """
-        return self.machines
+        return sorted(self.machines)
 
     def get_prod_machines(self):
         """
@@ -1,10 +1,13 @@
+from datagen.common.context import ContextAttribute, current_context
+
+
 class MachineSequencer(object):
     """
     Singleton class to generate unique ids for the machines in data generator
     """
 
-    # this will hold the current sequence
-    index = 0
+    # this will hold the current sequence, kept in the active generation context
+    index = ContextAttribute("machine_sequence")
 
     _instance: object = None
 
@@ -14,8 +17,9 @@ class MachineSequencer(object):
         return cls._instance
 
     def __init__(self):
-        self.id = MachineSequencer.index
-        MachineSequencer.index += 1
+        context = current_context()
+        self.id = context.machine_sequence
+        context.machine_sequence += 1
 
     @classmethod
     def reset(cls) -> None:
@@ -23,4 +27,4 @@ class MachineSequencer(object):
         Resets the sequencer
         :return:
         """
-        MachineSequencer.index = 1
+        current_context().machine_sequence = 1
@@ -1,5 +1,7 @@
 from anytree import Node
 
+from datagen.common.context import ContextAttribute
+
 from datagen.multi.product import Product
 
 
@@ -11,7 +13,7 @@ class PathProducts:
     """
 
     instance = None
-    products = list()
+    products = ContextAttribute("path_products")
 
     def __new__(cls, *args, **kwargs):
         if cls.instance is None:
@@ -45,7 +47,7 @@ class PathNodes:
     @author Adrian
     """
     instance = None
-    nodes = list()
+    nodes = ContextAttribute("path_nodes")
 
     def __new__(cls, *args, **kwargs):
         if cls.instance is None:
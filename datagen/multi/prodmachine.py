@@ -1,3 +1,15 @@
+from typing import Any, Hashable, List, Tuple
+
+from datagen.common.context import ContextAttribute
+
+
+def machines_key(machines: List[Any]) -> Tuple[Hashable, ...]:
+    """
+    Builds a hashable key of a list of machines, given as dictionaries or as Machine objects
+    """
+    return tuple(tuple(m.items()) if isinstance(m, dict) else m for m in machines)
+
+
 class ProdMachines:
 
     def __init__(self, id, machines):
@@ -11,23 +23,23 @@ class ProdMachines:
             return False
 
     def __hash__(self):
-        combined_attributes = str(self.productid) + str(self.machines)
-        return hash(combined_attributes)
+        return hash((self.productid, machines_key(self.machines)))
 
 
 class ProdMachinesAll:
 
-    all_prods_machines = []
+    # the distinct product-machines pairs, by (product id, machines) key, in the order they were added
+    all_prods_machines = ContextAttribute("prod_machines")
 
     @classmethod
     def add(cls, prod_machines):
-        cls.all_prods_machines.append(prod_machines)
-        cls.all_prods_machines = list(set(cls.all_prods_machines))
+        cls.all_prods_machines.setdefault((prod_machines.productid, machines_key(prod_machines.machines)),
+                                          prod_machines)
 
     @classmethod
     def get(cls):
-        return sorted(cls.all_prods_machines, key=lambda x: x.productid)
+        return sorted(cls.all_prods_machines.values(), key=lambda x: x.productid)
 
     @classmethod
     def reset(cls):
-        cls.all_prods_machines.clear()
\ No newline at end of file
+        cls.all_prods_machines.clear()
@@ -3,13 +3,10 @@ import random
 
 class Quantity(object):
 
-    def __init__(self, dct, seed = None):
+    def __init__(self, dct):
         self.min = dct["min"]
         self.step = dct["step"]
         self.max = dct["max"]
-        if seed is not None:
-            random.seed(seed)
-
 
     def genereate_quantity(self) -> int:
         steps_number = (self.max - self.min) // self.step
@@ -9,17 +9,18 @@ import random
 import string
 
 from typing import List, Any, Dict
-from json import JSONEncoder, JSONDecoder, dumps, load
+from json import JSONDecoder, dumps, load
 
-from datagen.common.assembly import UnitAssemblyTime
 
+from datagen.common.catalog import ProductCatalog
+from datagen.common.config import EXPORT_MACHINES_FILE
+from datagen.common.context import ContextAttribute
 from datagen.common.sequencer import Sequencer
 from datagen.common.utility import get_abs_file_path, check_and_create_if_not_exists
 
 from datagen.multi.msequencer import MachineSequencer
 from datagen.multi.machines import Machine, Machines
 from datagen.multi.product import Product
-from datagen.multi.setup import SetupTime
 from datagen.multi.bom import MultiBom
 
 NUMBER_OF_PRODUCTS = 100
@@ -36,8 +37,11 @@ class RandomProductGenerator:
     Class representing a random product generator
     """
 
-    # class level. holds all the products in the system
-    all_products = list()
+    # the order of the keys in the exported machines
+    MACHINE_KEYS = ("id", "name", "oee", "setup_time", "execution_time")
+
+    # holds all the products of the multi BOM, kept in the active generation context
+    all_products = ContextAttribute("products")
 
     def __init__(self, multi_bom):
         """
@@ -46,6 +50,9 @@ class RandomProductGenerator:
         """
         self.multi_bom = multi_bom
 
+        # the setup and execution times of the products, added to the machines only when the products are exported
+        self.catalog = None
+
     @staticmethod
     def is_maintenance_generated(bom) -> bool:
         """
@@ -72,7 +79,8 @@ class RandomProductGenerator:
         """
         Builds a single product with a random name
         """
-        all_machines = Machines.import_machines()
+        # the machines built for the current multi BOM, taken straight from memory
+        all_machines = Machines.machines
 
         if self.multi_bom.machines_info.randomize_alternative_machines:
             max_alternative_machines_number = random.randint(1,
@@ -88,7 +96,7 @@ class RandomProductGenerator:
 
         machines_list = []
         for m in machines_per_product:
-            machine = Machine(id=m.get("id"), name=m.get("name"), oee=m.get("oee"))
+            machine = Machine(id=m.id, name=m.name, oee=m.oee)
             machines_list.append(machine)
 
         return Product(self.productid(), self.code(4), self.part() if generated_names_from_words else self.code(4),
@@ -106,11 +114,16 @@ class RandomProductGenerator:
         MachineSequencer().reset()
         machines = Machines(self.multi_bom)
         machines.build()
-        machines.export()
+
+        # the machines are kept in memory, the JSON file is only an artifact for inspection
+        if EXPORT_MACHINES_FILE:
+            machines.export()
 
         for i in range(self.multi_bom.machines_info.prod_number):
             RandomProductGenerator.all_products.append(self.build_product())
 
+        self.catalog = ProductCatalog(RandomProductGenerator.all_products)
+
         self.add_setup_time()
         self.add_time_units()
         self.export()
@@ -142,102 +155,46 @@ class RandomProductGenerator:
         """
         encoded_products = []
 
-        class Encoder(JSONEncoder):
-            def encode(self, obj) -> Dict[str, Any]:
-                return obj.__dict__
-
-        encoder = Encoder()
-
-        for p in RandomProductGenerator.all_products:
-            encoded_products.append(encoder.encode(p))
+        for i, p in enumerate(RandomProductGenerator.all_products):
+            encoded_products.append({"id": p.id, "code": p.code, "pname": p.pname,
+                                     "machines": self.catalog.machines_of(i, self.MACHINE_KEYS)})
 
         check_and_create_if_not_exists(f"multiboms/{self.multi_bom.machines_info.root_directory}")
 
         with open(get_abs_file_path(f"multiboms/{self.multi_bom.machines_info.root_directory}/rand_products.json"),
                   "w") as f:
-            f.write(dumps(encoded_products, default=lambda o: o.__dict__, indent=4))
-            # dump(encoded_products, f, default=lambda o: o.__dict__, indent=4)
+            f.write(dumps(encoded_products, indent=4))
+
+    def identical_machines(self):
+        """
+        The mask of the machines which are considered identical. The number of identical machines is given by a
+        parameter in multi-config.json, as a percent from the total number of the machines
+        """
+        machines_info = self.multi_bom.machines_info
+        max_number_of_identical_machines = int(machines_info.machines_number *
+                                               machines_info.percent_of_identical_machines)
+        return self.catalog.identical_machines(machines_info.allow_identical_machines,
+                                               max_number_of_identical_machines)
 
     def add_setup_time(self) -> None:
         """
         this method will decorate the list of machines with a randomly chosen setup time
         :return:
         """
-        time_units_setup = self.multi_bom.machines_info.setup_time.time_units
-
-        allowed_identical_machines = self.multi_bom.machines_info.allow_identical_machines
-
-        # the number of identical machines is given by a parameter in datagen.json
-        percent_of_identical_machines = self.multi_bom.machines_info.percent_of_identical_machines
-
-        max_number_of_identical_machines = int(
-            self.multi_bom.machines_info.machines_number * percent_of_identical_machines)
-
-        # generate a setup time based on some input parameters
-        setup_time = SetupTime.get_setup_time(self.multi_bom.machines_info.setup_time.min,
-                                              self.multi_bom.machines_info.setup_time.step,
-                                              self.multi_bom.machines_info.setup_time.max)
-
-        for p in self.all_products:
-            # define a counter to count the machines which were set up
-            machines_counter = 0
-
-            for m in p.machines:
-
-                # if identical machines are allowed, retain this value to be reused
-                if allowed_identical_machines and machines_counter < max_number_of_identical_machines:
-                    m.setup_time = self.to_seconds(time_units_setup, setup_time)
-                    machines_counter += 1
-                else:
-                    setuptime = self.to_seconds(time_units_setup,
-                                                SetupTime.get_setup_time(self.multi_bom.machines_info.setup_time.min,
-                                                                         self.multi_bom.machines_info.setup_time.step,
-                                                                         self.multi_bom.machines_info.setup_time.max))
-                    m.setup_time = setuptime
+        setup_time = self.multi_bom.machines_info.setup_time
+        self.catalog.add_setup_times(setup_time.time_units, setup_time.min, setup_time.step, setup_time.max,
+                                     self.identical_machines())
 
     def add_time_units(self) -> None:
         """
-        this method will decorate the machines list with a time specific to create a unit of product
+        this method will decorate the machines list with a time specific to create a unit of product. The generic
+        execution time of a product is drawn from the setup time interval
         :return:
         """
-        time_units_assembly = self.multi_bom.machines_info.unit_assembly_time.time_units
-        allowed_identical_machines = self.multi_bom.machines_info.allow_identical_machines
-        percent_of_identical_machines = self.multi_bom.machines_info.percent_of_identical_machines
-
-        # let's say that the number of identical machines could be only percent_of_identical_machines  from the total
-        # number of the machines
-        max_number_of_identical_machines = int(
-            self.multi_bom.machines_info.machines_number * percent_of_identical_machines)
-
-        for p in self.all_products:
-            # define a counter to count the machines which were set up
-            machines_counter = 0
-
-            generic_execution_time = self.to_seconds(time_units_assembly,
-                                                     UnitAssemblyTime.get_unit_assembly_time(
-                                                         self.multi_bom.machines_info.setup_time.min,
-                                                         self.multi_bom.machines_info.setup_time.step,
-                                                         self.multi_bom.machines_info.setup_time.max))
-
-            for m in p.machines:
-                # if identical machines are allowed, retain this value to be reused
-                if allowed_identical_machines and machines_counter < max_number_of_identical_machines:
-                    m.execution_time = self.to_seconds(time_units_assembly, generic_execution_time)
-                    machines_counter += 1
-                else:
-                    m.execution_time = int(generic_execution_time / m.oee)
-
-    def to_seconds(self, time_units, val) -> int:
-        """
-        Transforms a certain duration in seconds, based on the units in which duration is expressed
-        :param time_units:
-        :param val:
-        :return:
-        """
-
-        d = {"seconds": val, "minutes": val * 60, "hours": val * 60 * 60, "days": val * 60 * 60 * 60}
-        res = d.get(time_units, "No such time unit.")
-        return res
+        setup_time = self.multi_bom.machines_info.setup_time
+        self.catalog.add_execution_times(self.multi_bom.machines_info.unit_assembly_time.time_units,
+                                         setup_time.min, setup_time.step, setup_time.max,
+                                         self.identical_machines())
 
 
 class RandomProductDecoder(JSONDecoder):
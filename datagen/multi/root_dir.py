@@ -1,3 +1,6 @@
+from datagen.common.context import ContextAttribute, current_context
+
+
 class RootDir(object):
     """
     Singleton class holding the root directory of a multi-bom configuration
@@ -5,8 +8,8 @@ class RootDir(object):
     @author Adrian
     """
 
-    # this will hold the root directory for a multi-bom configuration
-    root_dir = ""
+    # this will hold the root directory for a multi-bom configuration, kept in the active generation context
+    root_dir = ContextAttribute("root_dir")
 
     _instance: object = None
 
@@ -16,7 +19,7 @@ class RootDir(object):
         return cls._instance
 
     def set(self, root_dir):
-        RootDir.root_dir = root_dir
+        current_context().root_dir = root_dir
 
     def get(self):
         return self.root_dir
@@ -26,4 +29,4 @@ class RootDir(object):
         Resets the root_dir variable
         :return: None
         """
-        RootDir.root_dir = ""
+        current_context().root_dir = ""
@@ -1,42 +1,115 @@
+"""
+Module holding the sanity checker of the generated multi BOM trees. The indexes of the meta information (the products
+of the product/machines pairs and the machines list) are built once, then the tree is checked in a single iterative
+depth-first walk, so the check is linear in the number of nodes and can be left on for large trees.
+
+The invariants checked are:
+    - every product of the tree has a product/machines pair
+    - a product is used only once on every root-to-leaf path
+    - the parentid of every node is the operationid of its parent
+    - every machine of the tree is in the machines list
+    - every maintenance is attached to a machine of the machines list
+"""
+
 import logging
 
-from anytree import PreOrderIter
+from typing import Any, Dict, List
 
 log = logging.getLogger("main")
 
 
+def _field(item: Any, key: str) -> Any:
+    """
+    Returns a field of a machine or of a maintenance, given as a dictionary or as an object
+    """
+    return item.get(key) if isinstance(item, dict) else getattr(item, key, None)
+
+
 class SanityChecker:
-    found = False
 
-    def __init__(self, node, metainfo):
+    def __init__(self, node, metainfo: Dict[str, Any]):
+        """
+        :param node: the root node of the tree
+        :param metainfo: the meta information of the tree (machines_list, maintenances and prod_machines)
+        """
         self.node = node
         self.metainfo = metainfo
 
-    def walk(self, node):
+        # the indexes are built once, so every node is checked in constant time
+        self.products = {prod_machines.productid for prod_machines in metainfo.get("prod_machines", [])}
+        self.machines = set(metainfo.get("machines_list", []))
+
+        self.violations: List[str] = []
+
+    def walk(self, node) -> List[str]:
         """
-        Walks through the tree and checks if the current node's product id belongs to the list of product/machines pairs
-        :return:
+        Walks through the tree, depth-first, and checks the invariants of every node and of the maintenances
+        :return: the violations found
         """
-        for crt_node in PreOrderIter(node):
-            self.check(crt_node)
+        self.violations = []
+        self.check_maintenances()
+
+        # the products on the current path, with the number of times they appear on it
+        path_products: Dict[Any, int] = {}
 
-        if SanityChecker.found:
+        # the nodes to visit, each with a flag telling if the node is entered (False) or left (True)
+        stack = [(node, False)]
+
+        while stack:
+            crt_node, leaving = stack.pop()
+            productid = getattr(crt_node, "productid", None)
+
+            if leaving:
+                path_products[productid] -= 1
+                if path_products[productid] == 0:
+                    del path_products[productid]
+                continue
+
+            self.check(crt_node, path_products)
+
+            path_products[productid] = path_products.get(productid, 0) + 1
+            stack.append((crt_node, True))
+            stack.extend((child, False) for child in reversed(crt_node.children))
+
+        for violation in self.violations:
+            log.error(f"Sanity check: {violation}")
+
+        if self.violations:
+            print(f"Sanity check failed: {len(self.violations)} violations")
+        else:
             print("Sanity check passed")
 
-    def check(self, node):
-        found = False
+        return self.violations
 
-        # get all the product/machines pairs
-        prod_machines = self.metainfo.get("prod_machines")
+    def check(self, node, path_products: Dict[Any, int]) -> None:
+        """
+        Checks the invariants of a node, given the products on the path from the root to its parent
+        """
+        productid = getattr(node, "productid", None)
 
-        # iterate through all the product/machines pairs and see if the current node product id is in the list
-        for crt_prod_machines in prod_machines:
-            if crt_prod_machines.productid == node.productid:
-                SanityChecker.found = True
+        if productid not in self.products:
+            self.violations.append(f"Product id {productid} not found in the list of product/machines pairs")
 
-                break
-            else:
-                continue
+        if productid in path_products:
+            self.violations.append(f"Product id {productid} is used more than once on the path to operation "
+                                   f"{getattr(node, 'operationid', None)}")
+
+        parent = node.parent
+        if parent is not None and getattr(node, "parentid", None) != getattr(parent, "operationid", None):
+            self.violations.append(f"Operation {getattr(node, 'operationid', None)} has the parentid "
+                                   f"{getattr(node, 'parentid', None)} instead of "
+                                   f"{getattr(parent, 'operationid', None)}")
+
+        for machine in getattr(node, "machines", None) or []:
+            if _field(machine, "id") not in self.machines:
+                self.violations.append(f"Machine id {_field(machine, 'id')} of operation "
+                                       f"{getattr(node, 'operationid', None)} not found in the machines list")
 
-            if not SanityChecker.found:
-                log.info(f"Product id {node.productid} not found in the list of product/machines pairs")
+    def check_maintenances(self) -> None:
+        """
+        Checks that every maintenance is attached to a machine of the machines list
+        """
+        for maintenance in self.metainfo.get("maintenances", []):
+            if _field(maintenance, "machineid") not in self.machines:
+                self.violations.append(f"Maintenance {_field(maintenance, 'id')} is attached to the machine "
+                                       f"{_field(maintenance, 'machineid')}, not found in the machines list")
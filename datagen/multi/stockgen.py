@@ -10,6 +10,7 @@ import os
 from typing import List
 from json import JSONEncoder, JSONDecoder, dumps, load
 
+from datagen.common.context import current_context
 from datagen.common.sequencer import Sequencer
 from datagen.common.utility import get_abs_file_path
 
@@ -49,8 +50,6 @@ class StockGeneratorMulti(StockGeneratorBase):
                               [acquisition])
             stocks.add(new_stock)
 
-            cls.stocks.append(new_stock)
-
     @classmethod
     def export(cls, multi_bom):
         """
@@ -89,5 +88,5 @@ class StockGeneratorMulti(StockGeneratorBase):
                 return decoded_stocks
 
         decoder = StockDecoder()
-        cls.stocks = decoder.decode()
+        current_context().stocks = decoder.decode()
 
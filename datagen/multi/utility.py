@@ -3,10 +3,11 @@ import random
 import os
 
 from json import dumps
-from anytree.exporter import JsonExporter
 
 from datagen.multi.root_dir import RootDir
 import datagen.common.utility as cu
+from datagen.common.columnar import export_npz
+from datagen.common.jsonwriter import save_tree
 
 
 MAX_DAYS = 30
@@ -31,7 +32,7 @@ def create_future_date() -> datetime:
     return end_date
 
 
-def save_bom(bom_file, exporter: JsonExporter, node):
+def save_bom(bom_file, node):
     # save the initial directory because at the end of the function we want to restore it back
     initial_dir = os.getcwd()
 
@@ -43,8 +44,8 @@ def save_bom(bom_file, exporter: JsonExporter, node):
         os.makedirs(destination_path)
 
     os.chdir(destination_path)
-    with open(bom_file, 'w') as f:
-        f.write(exporter.export(node))
+    save_tree(node, bom_file)
+    export_npz(node, bom_file)
 
     # restore the initial directory
     os.chdir(initial_dir)
@@ -5,12 +5,14 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 import argparse
 
+import datagen.common.config as config
+
 from datagen.multi.main import start
 from datagen.mono.main_all import nary_trees
 from datagen.mono_variants.main import variate_instance
 from datagen.fixed.main import start_fixed
 from datagen.bounded.main import start_bounded
-from datagen.izomorf import cli_iso   
+from datagen.izomorf import cli_iso, cli_iso_classes
 
 def errored_action() -> None:
     print("Invalid mode. Please use one of: multi, mono, variate, fixed, iso")
@@ -24,43 +26,75 @@ actions = {
     # "iso" NU intra aici pt pentru ca nu foloseste configFilePath
 }
 
-parser = argparse.ArgumentParser(description="SCAMP-ML data generator")
-
-# mode + argumente comune
-parser.add_argument("mode", help="Working mode: multi | mono | variate | fixed | iso")
-
-# pentru modurile existente: config path
-parser.add_argument("-c", "--configFilePath", type=str, help="Configuration file path")
-
-# pentru iso: doua fisiere si eticheta (productid|pname|none)
-parser.add_argument("--bomA", type=str, help="Path to first BOM (.json) for iso mode")
-parser.add_argument("--bomB", type=str, help="Path to second BOM (.json) for iso mode")
-parser.add_argument(
-    "--label",
-    choices=["productid", "pname", "none"],
-    default="productid",
-    help="Label attribute for isomorphism (default: productid). Use 'none' for structural-only."
-)
-
-args = parser.parse_args()
-
-# pentru ISO (nu foloseste configFilePath)
-if args.mode == "iso":
-    if not args.bomA or not args.bomB:
-        print("For 'iso' mode you must provide both --bomA and --bomB paths.")
-        sys.exit(2)
-    labelkey = None if args.label == "none" else args.label
-    cli_iso(args.bomA, args.bomB, labelkey=labelkey)
-    sys.exit(0)
-
-# Restul modurilor raman neschimbate
-action = actions.get(args.mode, errored_action)
-action(args.configFilePath)
-
+# modurile in care intrarile din fisierul de configurare (BOM-uri sau variante) pot fi distribuite pe mai multe procese
+parallel_modes = {"multi", "mono", "variate"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SCAMP-ML data generator")
+
+    # mode + argumente comune
+    parser.add_argument("mode", help="Working mode: multi | mono | variate | fixed | iso")
+
+    # pentru modurile existente: config path
+    parser.add_argument("-c", "--configFilePath", type=str, help="Configuration file path")
+
+    # pentru multi, mono si variate: numarul de procese intre care se distribuie BOM-urile (variantele)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes among which the BOMs or variants are spread (multi, mono and variate modes, default: 1)")
+
+    # pentru toate modurile de generare: scrie si formatul columnar .npz langa fiecare JSON al unui BOM
+    parser.add_argument("--npz", action="store_true",
+                        help="Also write every generated BOM in the columnar .npz format, alongside its JSON file")
+
+    # pentru iso: doua fisiere (sau directoare / o lista de cai) si eticheta (productid|pname|none)
+    parser.add_argument("--bomA", type=str, help="Path to first BOM (.json | .npz) or directory for iso mode")
+    parser.add_argument("--bomB", type=str, help="Path to second BOM (.json | .npz) or directory for iso mode")
+    parser.add_argument("--paths", type=str, nargs="+",
+                        help="BOM files or directories grouped into isomorphism classes in iso mode")
+    parser.add_argument(
+        "--label",
+        choices=["productid", "pname", "none"],
+        default="productid",
+        help="Label attribute for isomorphism (default: productid). Use 'none' for structural-only."
+    )
+
+    args = parser.parse_args()
+
+    # pentru ISO (nu foloseste configFilePath)
+    if args.mode == "iso":
+        labelkey = None if args.label == "none" else args.label
+        # cu --paths sau cu directoare se raporteaza clasele de izomorfism ale tuturor BOM-urilor gasite
+        paths = args.paths or [p for p in (args.bomA, args.bomB) if p]
+        if args.paths or any(os.path.isdir(p) for p in paths):
+            cli_iso_classes(paths, labelkey=labelkey)
+            sys.exit(0)
+        if not args.bomA or not args.bomB:
+            print("For 'iso' mode you must provide both --bomA and --bomB paths, or directories / --paths.")
+            sys.exit(2)
+        cli_iso(args.bomA, args.bomB, labelkey=labelkey)
+        sys.exit(0)
+
+    config.EXPORT_NPZ = args.npz
+
+    # Restul modurilor raman neschimbate
+    action = actions.get(args.mode, errored_action)
+    if args.mode in parallel_modes:
+        # BOM-urile care au esuat sunt raportate la final, fara a opri restul lotului
+        if action(args.configFilePath, workers=args.workers):
+            sys.exit(1)
+    else:
+        action(args.configFilePath)
+
+
+# procesele worker importa acest modul, deci generarea porneste doar la rularea directa
+if __name__ == "__main__":
+    main()
 
 """
 py datagen\rungenerator.py bounded -c config\bounded-config.json
 py datagen\rungenerator.py iso --bomA ... --bomB ... --label pname| none
+py datagen\rungenerator.py iso --paths dir1 dir2 file.json --label productid| pname| none
 py datagen\rungenerator.py bounded -c config\fixed-config.json
 py datagen\config\generate_variants_config.py --help
 
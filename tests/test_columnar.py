@@ -0,0 +1,66 @@
+"""
+Round trip of the BOM trees of the datasets through the columnar format: every tree read back from its .npz file has to
+be exported in exactly the same JSON as the original one
+"""
+
+import json
+import os
+import sys
+
+import pytest
+from anytree.exporter import JsonExporter
+from anytree.importer import JsonImporter
+
+from datagen.common.bomarrays import BomArrays
+from datagen.common.columnar import arrays_from_document, load_npz, save_npz
+from datagen.common.treesignature import bom_files, is_bom
+
+DATASETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets")
+
+# the deepest trees of the datasets are exported recursively by anytree
+sys.setrecursionlimit(100000)
+
+
+def _dataset_trees():
+    return [path for path in bom_files([DATASETS]) if path.endswith(".json")]
+
+
+def _export(root) -> str:
+    return JsonExporter(indent=2, sort_keys=False).export(root)
+
+
+@pytest.mark.parametrize("file_path", _dataset_trees(), ids=lambda path: os.path.relpath(path, DATASETS))
+def test_dataset_round_trip(file_path, tmp_path):
+    with open(file_path, encoding="utf-8") as f:
+        document = json.load(f)
+    if not is_bom(document):
+        pytest.skip("not a BOM tree")
+
+    npz_file = str(tmp_path / "tree.npz")
+    save_npz(arrays_from_document(document), npz_file)
+
+    expected = _export(JsonImporter().import_(json.dumps(document)))
+    assert _export(load_npz(npz_file).to_anynode_tree()) == expected
+
+
+def test_values_not_fitting_the_columns(tmp_path):
+    machines = [{"id": 1, "name": "Machine_01", "oee": 1, "execution_time": 2.5, "setup_time": 3},
+                {"id": 2, "name": "Machine_02", "execution_time": 4, "setup_time": 5, "speed": 1.5},
+                {"setup_time": True, "id": "M3", "oee": 0.75}]
+    root = {"parentid": None, "operationid": 1, "productid": 1, "quantity": 2.0, "machines": machines}
+    child = {"parentid": -1, "operationid": 2, "productid": None, "quantity": 1, "code": 7, "machines": None}
+
+    arrays = BomArrays()
+    arrays.add_node(-1, root)
+    arrays.add_node(0, child)
+
+    npz_file = str(tmp_path / "tree.npz")
+    save_npz(arrays, npz_file)
+
+    for loaded in (arrays, load_npz(npz_file)):
+        for index, attributes in enumerate((root, child)):
+            assert json.dumps(loaded.attributes_of(index)) == json.dumps(attributes)
+
+        assert sorted(loaded.machine_values("oee")) == [0.75, 1]
+        assert sorted(loaded.machine_values("execution_time")) == [2.5, 4]
+        assert loaded.node_values("quantity", start=1) == [1]
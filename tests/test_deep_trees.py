@@ -0,0 +1,54 @@
+"""
+The trees deeper than the recursion limit are rendered, walked and read back without recursion
+"""
+
+import json
+import sys
+
+from anytree import AnyNode, RenderTree
+
+from datagen.common import jsonreader
+from datagen.common.treeutil import preorder, render_rows, render_text
+
+DEPTH = sys.getrecursionlimit() * 3
+
+
+def _chain(depth: int) -> AnyNode:
+    root = node = AnyNode(operationid=0)
+    for operationid in range(1, depth):
+        node = AnyNode(operationid=operationid, parent=node)
+    return root
+
+
+def test_render_as_anytree():
+    root = AnyNode(operationid=0)
+    first = AnyNode(operationid=1, parent=root)
+    AnyNode(operationid=2, parent=first, code="multi\nline")
+    AnyNode(operationid=3, parent=first)
+    AnyNode(operationid=4, parent=root)
+
+    assert list(render_rows(root)) == [tuple(row) for row in RenderTree(root)]
+    assert render_text(root) == str(RenderTree(root))
+
+
+def test_deep_chain():
+    root = _chain(DEPTH)
+
+    assert [node.operationid for node in preorder(root)] == list(range(DEPTH))
+    assert len(render_text(root).splitlines()) == DEPTH
+
+
+def test_read_deep_document():
+    text = '{"operationid": 0, "children": [' * DEPTH + "{}" + "]}" * DEPTH
+    document = jsonreader.loads(text)
+
+    depth = 0
+    while document:
+        document = document["children"][0]
+        depth += 1
+    assert depth == DEPTH
+
+
+def test_read_as_json():
+    text = '{"a": [1, 2.5, -3e4, true, false, null, "\\u00e9\\n", {}, []], "b": {"c": NaN}, "d": 1.0}'
+    assert json.dumps(jsonreader._loads_iterative(text)) == json.dumps(json.loads(text))